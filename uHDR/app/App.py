@@ -17,7 +17,7 @@
 # import
 # ------------------------------------------------------------------------------------------
 from __future__ import annotations
-import copy
+import os
 from typing import Optional, Tuple, List, Dict
 
 from numpy import ndarray
@@ -28,6 +28,8 @@ from app.Jexif import Jexif
 from app.ImageFIles import ImageFiles
 from app.Tags import Tags
 from app.SelectionMap import SelectionMap
+from app.RenderWorker import RenderWorker
+from app.HistogramService import HistogramService
 from guiQt.MainWindow import MainWindow
 from guiQt.LightBlock import LightBlock
 from hdrCore import image as Image, processing
@@ -68,20 +70,35 @@ class App:
         }
         self.show_mask = False
 
+        # Persistent process pipe: only nodes downstream of a change are recomputed
+        self.process_pipe: processing.ProcessPipe = processing.ProcessPipe()
+        self.node_ids: Dict[str, int] = {
+            'exposure': self.process_pipe.append(processing.exposure(), {'EV': self.exposure_value}, 'exposure'),
+            'contrast': self.process_pipe.append(processing.contrast(), {'contrast': self.contrast_value}, 'contrast'),
+            'saturation': self.process_pipe.append(processing.saturation(), {'saturation': self.saturation_value}, 'saturation'),
+            'lightnessmask': self.process_pipe.append(processing.lightnessMask(), self.lightness_mask_params(), 'lightnessmask'),
+            'tonecurve': self.process_pipe.append(processing.Ycurve(), self.tone_curve_params(), 'tonecurve'),
+            'colorEditor': self.process_pipe.append(processing.colorEditor(), self.color_editor_params(), 'colorEditor'),
+        }
+        self.render_worker: RenderWorker = RenderWorker(self.process_pipe)
+        self.histogram_service: HistogramService = HistogramService()
+
         # Initialize image management
         self.images_management: ImageFiles = ImageFiles()
         self.images_management.imageLoaded.connect(self.image_loaded_callback)
         self.images_management.setPrefs()
+        self.images_management.setPreviewPipe(self.process_pipe.toDict())
         self.images_management.checkExtra()
         nb_images: int = self.images_management.setDirectory(preferences.Prefs.Prefs.currentDir)
 
         # Initialize tags
-        all_tags_in_dir: dict[str, dict[str, bool]] = Tags.aggregateTagsFiles(preferences.Prefs.Prefs.currentDir, preferences.Prefs.Prefs.extraPath)
+        all_tags_in_dir: dict[str, dict[str, bool]] = self.images_management.catalog.aggregateTags()
         self.tags: Tags = Tags(Tags.aggregateTagsData([preferences.Prefs.Prefs.tags, all_tags_in_dir]))
         
         # Initialize selection map
         self.selection_map: SelectionMap = SelectionMap(self.images_management.getImagesFilesnames())
         self.selected_image_idx: int | None = None
+        self.pending_selection: str | None = None      # selected image waiting to be loaded
 
         # Initialize main window
         self.main_window: MainWindow = MainWindow(nb_images, self.tags.toGUI())
@@ -113,6 +130,11 @@ class App:
         self.main_window.scoreSelectionChanged.connect(self.score_selection_changed_callback)
         self.main_window.showSelectionChanged.connect(self.on_show_selection_changed)
         self.main_window.lightnessMaskChanged.connect(self.on_lightness_mask_changed)
+        self.render_worker.imageRendered.connect(self.image_rendered_callback)
+        self.histogram_service.histogramReady.connect(self.main_window.setEditorHistograms)
+        if QApplication.instance(): QApplication.instance().aboutToQuit.connect(self.render_worker.stop)
+        if QApplication.instance(): QApplication.instance().aboutToQuit.connect(self.histogram_service.stop)
+        if QApplication.instance(): QApplication.instance().aboutToQuit.connect(self.images_management.close)
 
     def get_image_range_index(self: App) -> tuple[int, int]:
         """Return the index range (min index, max index) of images displayed by the gallery."""
@@ -137,6 +159,8 @@ class App:
     def request_images_callback(self: App, min_idx: int, max_idx: int) -> None:
         """Callback: called when images are requested (occurs when page or zoom level is changed)."""
         image_filenames: list[str] = self.images_management.getImagesFilesnames()
+        # images of displayed page are not evicted from image cache
+        self.images_management.pin('page', [name for name in map(self.selection_map.selectedIndexToImageName, range(min_idx, max_idx + 1)) if name is not None])
         for s_idx in range(min_idx, max_idx + 1):
             g_idx: int | None = self.selection_map.selectedlIndexToGlobalIndex(s_idx) 
             if g_idx is not None:
@@ -144,22 +168,39 @@ class App:
             else:
                 self.main_window.setGalleryImage(s_idx, None)
 
+        # metadata of visible page first, then next and previous pages (prefetch)
+        page_size: int = max_idx - min_idx + 1
+        s_indices: list[int] = list(range(min_idx, max_idx + 1)) + list(range(max_idx + 1, max_idx + 1 + page_size)) + list(range(min_idx - page_size, min_idx))
+        names: list[str] = [name for name in map(self.selection_map.selectedIndexToImageName, s_indices) if name is not None]
+        self.images_management.requestMetadata(names)
+
     def image_loaded_callback(self: App, filename: str):
         """Callback: called when requested image is loaded (asynchronous loading)."""
-        image: ndarray = self.images_management.images[filename]
+        image: ndarray = self.images_management.getGalleryImage(filename)
         image_idx = self.selection_map.imageNameToSelectedIndex(filename)         
         if image_idx is not None:
             self.main_window.setGalleryImage(image_idx, image)
+        if filename == self.pending_selection and self.selected_image_idx is not None:
+            self.image_selected_callback(self.selected_image_idx)
 
     def image_selected_callback(self: App, index):
         self.selected_image_idx = index
         g_idx: int | None = self.selection_map.selectedlIndexToGlobalIndex(index)
         if g_idx is not None:
-            img: ndarray = self.images_management.getImage(self.images_management.getImagesFilesnames()[g_idx])
+            # edited image (and its preview) is not evicted from image cache
+            self.images_management.pin('edited', [self.images_management.getImagesFilesnames()[g_idx]])
+            img: ndarray | None = self.images_management.getImage(self.images_management.getImagesFilesnames()[g_idx])
+            if img is None:
+                # image evicted from cache or not loaded yet: editor is set when image is loaded (see image_loaded_callback)
+                self.pending_selection = self.images_management.getImagesFilesnames()[g_idx]
+                self.images_management.requestLoad(self.pending_selection)
+                return
+            self.pending_selection = None
             tags: Tags = self.images_management.getImageTags(self.images_management.getImagesFilesnames()[g_idx])
             exif: dict[str, str] = self.images_management.getImageExif(self.images_management.getImagesFilesnames()[g_idx])
             score: int = self.images_management.getImageScore(self.images_management.getImagesFilesnames()[g_idx])
             self.main_window.setEditorImage(img)
+            self.histogram_service.requestHistogram(img)
             image_filename: str = self.images_management.getImagesFilesnames()[g_idx] 
             image_path: str = self.images_management.imagePath 
             self.main_window.setInfo(image_filename, image_path, *Jexif.toTuple(exif))
@@ -170,8 +211,15 @@ class App:
 
             # Reset original and modified images
             self.original_image = Image.Image(self.images_management.imagePath, self.images_management.getImagesFilesnames()[g_idx], img, Image.imageType.SDR, False, Image.ColorSpace.sRGB())
-            self.modified_image = copy.deepcopy(self.original_image)
-            self.apply_all_adjustments()
+            self.modified_image = self.original_image
+            self.process_pipe.setImage(self.original_image)
+
+            # preview already rendered with current adjustments: no recomputation
+            preview: ndarray | None = self.images_management.previewCache.get(os.path.join(image_path, image_filename), self.process_pipe.toDict(), img.shape[:2])
+            if preview is not None:
+                self.show_preview(image_filename, preview)
+            else:
+                self.apply_all_adjustments()
 
     def tag_changed_callback(self: App, key: tuple[str, str], value: bool) -> None:
         if self.selected_image_idx is not None:
@@ -187,63 +235,27 @@ class App:
 
     def score_selection_changed_callback(self: App, list_selected_score: list[bool]) -> None:
         """Called when selection changed."""
-        image_scores: dict[str, int] = self.images_management.imageScore
         selected_scores: list[int] = [i for i, selected in enumerate(list_selected_score) if selected]
-        self.selection_map.selectByScore(image_scores, selected_scores)
+        self.selection_map.applySelection(self.images_management.getScoreSelection(selected_scores))
         self.update_gallery()
 
-    def adjust_exposure(self, ev_value):
-        self.exposure_value = ev_value
+    def set_node_parameters(self, name: str, params: dict) -> None:
+        """Set parameters of a process pipe node (marks it and downstream nodes dirty) and update display."""
+        self.process_pipe.setParameters(self.node_ids[name], params)
+        self.images_management.setPreviewPipe(self.process_pipe.toDict())
         self.apply_all_adjustments()
 
-    def adjust_contrast(self, value):
-        self.contrast_value = value
-        self.apply_all_adjustments()
-
-    def adjust_saturation(self, value):
-        self.saturation_value = value
-        self.apply_all_adjustments()
-        
-    def on_editor_value_changed(self, values: dict) -> None:
-        self.editor_values.update(values)
-        self.apply_all_adjustments()
-        
-    def on_lightness_mask_changed(self, mask: dict) -> None:
-        self.lightness_mask_values.update(mask)
-        self.apply_all_adjustments()
-        
-    def on_show_selection_changed(self, show: bool) -> None:
-        self.show_mask = show
-        self.apply_all_adjustments()
-
-    def apply_all_adjustments(self):
-        if self.modified_image is None:
-            return
-
-        # Start from the original image
-        self.modified_image = copy.deepcopy(self.original_image)
-
-        # Apply exposure adjustment
-        self.modified_image = processing.exposure().compute(self.modified_image, EV=self.exposure_value)
-
-        # Apply contrast adjustment
-        self.modified_image = processing.contrast().compute(self.modified_image, contrast=self.contrast_value)
-
-        # Apply saturation adjustment
-        self.modified_image = processing.saturation().compute(self.modified_image, saturation=self.saturation_value)
-        
-        # Apply lightness mask
-        lightness_mask_params = {
+    def lightness_mask_params(self) -> dict:
+        return {
             'shadows': self.lightness_mask_values.get('shadows', False),
             'blacks': self.lightness_mask_values.get('blacks', False),
             'mediums': self.lightness_mask_values.get('mediums', False),
             'whites': self.lightness_mask_values.get('whites', False),
             'highlights': self.lightness_mask_values.get('highlights', False),
         }
-        self.modified_image = processing.lightnessMask().compute(self.modified_image, **lightness_mask_params)
 
-        # Apply highlights adjustment
-        highlights_params = {
+    def tone_curve_params(self) -> dict:
+        return {
             'start': [0, 0],
             'shadows': [10, self.shadows_value],
             'blacks': [30, self.blacks_value],
@@ -252,10 +264,9 @@ class App:
             'highlights': [90, self.highlight_value],
             'end': [100, 100]
         }
-        self.modified_image = processing.Ycurve().compute(self.modified_image, **highlights_params)
 
-        # Apply color editor adjustments
-        color_params = {
+    def color_editor_params(self) -> dict:
+        return {
             'selection': self.color_selection,
             'edit': {
                 'hue': self.editor_values['hue shift'],
@@ -266,37 +277,80 @@ class App:
             'tolerance': 0.1,
             'mask': self.show_mask,
         }
-        self.modified_image = processing.colorEditor().compute(self.modified_image, **color_params)
+
+    def adjust_exposure(self, ev_value):
+        self.exposure_value = ev_value
+        self.set_node_parameters('exposure', {'EV': self.exposure_value})
+
+    def adjust_contrast(self, value):
+        self.contrast_value = value
+        self.set_node_parameters('contrast', {'contrast': self.contrast_value})
+
+    def adjust_saturation(self, value):
+        self.saturation_value = value
+        self.set_node_parameters('saturation', {'saturation': self.saturation_value})
+        
+    def on_editor_value_changed(self, values: dict) -> None:
+        self.editor_values.update(values)
+        self.set_node_parameters('colorEditor', self.color_editor_params())
+        
+    def on_lightness_mask_changed(self, mask: dict) -> None:
+        self.lightness_mask_values.update(mask)
+        self.set_node_parameters('lightnessmask', self.lightness_mask_params())
+        
+    def on_show_selection_changed(self, show: bool) -> None:
+        self.show_mask = show
+        self.set_node_parameters('colorEditor', self.color_editor_params())
+
+    def apply_all_adjustments(self):
+        if self.modified_image is None:
+            return
+
+        # Recompute from the first dirty node in the render worker (latest request wins)
+        self.render_worker.requestRender()
+
+    def image_rendered_callback(self, color_data: ndarray, generation: int, final: bool) -> None:
+        """Callback: called when the render worker has computed a preview level of the process pipe (final: full resolution)."""
+        # rendered with another image or other parameters (e.g. image selected since): dropped
+        if generation != self.process_pipe.generation: return
 
         # Update the image in the user interface
-        if isinstance(self.modified_image, Image.Image):
-            image_name = self.selection_map.selectedIndexToImageName(self.selected_image_idx)
-            if image_name:
-                self.images_management.images[image_name] = self.modified_image.colorData
-                self.main_window.setEditorImage(self.modified_image.colorData)
-        else:
-            print(f"Unexpected processed image type: {type(self.modified_image)}")
+        image_name = self.selection_map.selectedIndexToImageName(self.selected_image_idx)
+        if image_name:
+            if not final:
+                # coarse level: editor only (gallery preview, histogram and cache use the full resolution level)
+                self.main_window.setEditorImage(color_data)
+                return
+            self.show_preview(image_name, color_data)
+            # cache preview (rendered with current image and parameters)
+            self.images_management.previewCache.put(os.path.join(self.images_management.imagePath, image_name), self.process_pipe.toDict(), color_data)
+
+    def show_preview(self, image_name: str, color_data: ndarray) -> None:
+        """Display rendered preview in editor and gallery (the source image is kept for next renders)."""
+        self.images_management.setPreview(image_name, color_data)
+        self.main_window.setEditorImage(color_data)
+        self.histogram_service.requestHistogram(color_data)
 
     def adjust_highlights(self, value: float) -> None:
         self.highlight_value = value
-        self.apply_all_adjustments()
+        self.set_node_parameters('tonecurve', self.tone_curve_params())
             
     def adjust_shadows(self, value: float) -> None:
         self.shadows_value = value
-        self.apply_all_adjustments()
+        self.set_node_parameters('tonecurve', self.tone_curve_params())
         
     def adjust_blacks(self, value: float) -> None:
         self.blacks_value = value
-        self.apply_all_adjustments()
+        self.set_node_parameters('tonecurve', self.tone_curve_params())
         
     def adjust_mediums(self, value: float) -> None:
         self.mediums_value = value
-        self.apply_all_adjustments()
+        self.set_node_parameters('tonecurve', self.tone_curve_params())
         
     def adjust_whites(self, value: float) -> None:
         self.whites_value = value
-        self.apply_all_adjustments()
+        self.set_node_parameters('tonecurve', self.tone_curve_params())
 
     def on_selection_changed(self, selection: Dict[str, Tuple[int, int]]) -> None:
         self.color_selection = selection
-        self.apply_all_adjustments()
+        self.set_node_parameters('colorEditor', self.color_editor_params())
@@ -0,0 +1,166 @@
+# uHDR: HDR image editing software
+#   Copyright (C) 2022  remi cozot
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+# hdrCore project 2020-2022
+# author: remi.cozot@univ-littoral.fr
+
+# import
+# ------------------------------------------------------------------------------------------
+from __future__ import annotations
+import os, json, sqlite3, threading
+from app.Tags import Tags
+from preferences.Prefs import Prefs
+# ------------------------------------------------------------------------------------------
+# --- class Catalog ------------------------------------------------------------------------
+# ------------------------------------------------------------------------------------------
+debug : bool = False
+class Catalog:
+    """ per-directory catalog of image metadata in extra directory: '.uHDR/catalog.db' (SQLite).
+        - one row per image file: score, tags (json), exif summary (json), thumbnail filename
+        - records of a page of images are read with one query (see records), scores of the whole directory too (see scores)
+        - writes are buffered and committed in one transaction (see flush)
+        - existing '.tags', '.score' and '.jexif' sidecar files are imported once, when the catalog is created
+    """
+    # class attributes
+    # -----------------------------------------------------------------
+    fileName : str = 'catalog.db'
+    version : int = 1                   # schema version (sqlite user_version)
+    batchSize : int = 256               # buffered writes are committed at least every batchSize updates
+    columns : tuple[str, ...] = ('score', 'tags', 'exif', 'thumbnail')
+    maxVariables : int = 900            # max number of sqlite query parameters
+
+    # constructor
+    # -----------------------------------------------------------------
+    def __init__(self: Catalog, imageDir: str, extraDir: str) -> None:
+        self.imageDir : str = imageDir
+        self.extraDir : str = extraDir
+        self.dbFilename : str = os.path.join(imageDir, extraDir, Catalog.fileName)
+
+        self.lock : threading.Lock = threading.Lock()        # updated from loading threads
+        self.pending : dict[str, dict[str, object]] = {}    # buffered writes: name -> {column: value}
+
+        os.makedirs(os.path.join(imageDir, extraDir), exist_ok=True)
+        self.connection : sqlite3.Connection|None = sqlite3.connect(self.dbFilename, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] < Catalog.version:
+            with self.connection:
+                self.connection.execute('CREATE TABLE IF NOT EXISTS images (name TEXT PRIMARY KEY, score INTEGER, tags TEXT, exif TEXT, thumbnail TEXT)')
+                self.connection.execute('CREATE INDEX IF NOT EXISTS images_score ON images (score)')
+                self.importSidecars()
+                self.connection.execute(f'PRAGMA user_version={Catalog.version}')
+
+    # methods
+    # -----------------------------------------------------------------
+    def importSidecars(self: Catalog) -> None:
+        """import '.score', '.tags' and '.jexif' sidecar files of extra directory (one transaction, sidecars are kept)."""
+        extraPath : str = os.path.join(self.imageDir, self.extraDir)
+        rows : dict[str, dict[str, object]] = {}
+        for entry in os.scandir(extraPath):
+            ext : str = os.path.splitext(entry.name)[1]
+            column : str|None = {'.score': 'score', '.tags': 'tags', '.jexif': 'exif'}.get(ext, None)
+            if column is None: continue
+            try:
+                with open(entry.path) as f: data : dict = json.load(f)
+            except (OSError, ValueError):
+                print(f'[ERROR] Catalog.importSidecars: can not read "{entry.path}", skipped')
+                continue
+            value : object = data.get('score', 0) if column == 'score' else json.dumps(data)
+            # sidecar of image file 'name.ext' is 'name.' + 'score' (imageFilename[:-3] + 'score', see Score, Tags, Jexif)
+            rows.setdefault(entry.name[:-len(ext)+1], {})[column] = value
+
+        if not rows: return
+        # sidecars are resolved with image files only (not '.json' metadata files, ...), unresolved sidecars are skipped
+        imageNames : dict[str, str] = {f[:-3]: f for f in os.listdir(self.imageDir) if f.endswith(tuple(Prefs.imgExt))}
+        records : list[tuple] = [(imageNames[base], row.get('score', None), row.get('tags', None), row.get('exif', None)) for base, row in rows.items() if base in imageNames]
+        self.connection.executemany('INSERT OR REPLACE INTO images (name, score, tags, exif) VALUES (?,?,?,?)', records)
+
+        if debug : print(f'Catalog.importSidecars(): {len(records)} image(s) imported')
+
+    # -----------------------------------------------------------------
+    def records(self: Catalog, names: list[str]|None = None) -> dict[str, dict[str, object]]:
+        """image records (all images of directory if names is None): name -> {'score': int|None, 'tags': dict|None, 'exif': dict|None, 'thumbnail': str|None}."""
+        self.flush()
+        query : str = 'SELECT name, score, tags, exif, thumbnail FROM images'
+        if names is None:   batches : list[list[str]] = [[]]
+        else:               batches = [names[i:i+Catalog.maxVariables] for i in range(0, len(names), Catalog.maxVariables)]
+
+        rows : list[tuple] = []
+        with self.lock:
+            if self.connection is None: return {}
+            for batch in batches:
+                if names is None:   rows += self.connection.execute(query).fetchall()
+                else:               rows += self.connection.execute(query+f' WHERE name IN ({",".join("?"*len(batch))})', batch).fetchall()
+
+        res : dict[str, dict[str, object]] = {}
+        for name, score, tags, exif, thumbnail in rows:
+            res[name] = {
+                'score':        score,
+                'tags':         json.loads(tags) if tags else None,
+                'exif':         json.loads(exif) if exif else None,
+                'thumbnail':    thumbnail
+            }
+        return res
+
+    # -----------------------------------------------------------------
+    def scores(self: Catalog) -> dict[str, int]:
+        """scores of images of directory (one query, images without score are not included)."""
+        self.flush()
+        with self.lock:
+            if self.connection is None: return {}
+            return dict(self.connection.execute('SELECT name, score FROM images WHERE score IS NOT NULL').fetchall())
+
+    # -----------------------------------------------------------------
+    def aggregateTags(self: Catalog) -> dict[str, dict[str,bool]]:
+        """aggregate image tags of directory (see Tags.aggregateTagsData)."""
+        self.flush()
+        with self.lock:
+            if self.connection is None: return {}
+            allTags : list[dict[str, dict[str,bool]]] = [json.loads(tags) for (tags,) in self.connection.execute('SELECT tags FROM images WHERE tags IS NOT NULL')]
+        return Tags.aggregateTagsData(allTags)
+
+    # -----------------------------------------------------------------
+    def update(self: Catalog, name: str, **values: object) -> None:
+        """buffer update of image record, columns: score (int), tags (dict), exif (dict), thumbnail (str)."""
+        if debug : print(f'Catalog.update({name}, {values})')
+        for column, value in values.items():
+            if column not in Catalog.columns: raise KeyError(f'Catalog.update: unknown column "{column}"')
+            if column in ('tags', 'exif'): values[column] = json.dumps(value)
+        with self.lock:
+            self.pending.setdefault(name, {}).update(values)
+            full : bool = len(self.pending) >= Catalog.batchSize
+        if full: self.flush()
+
+    # -----------------------------------------------------------------
+    def flush(self: Catalog) -> None:
+        """commit buffered updates in one transaction."""
+        with self.lock:
+            if not self.pending or self.connection is None: return
+            pending, self.pending = self.pending, {}
+            with self.connection:
+                for name, values in pending.items():
+                    columns : list[str] = list(values.keys())
+                    self.connection.execute('INSERT OR IGNORE INTO images (name) VALUES (?)', (name,))
+                    self.connection.execute(f'UPDATE images SET {", ".join(c+"=?" for c in columns)} WHERE name=?', [values[c] for c in columns]+[name])
+
+        if debug : print(f'Catalog.flush(): {len(pending)} image(s)')
+
+    # -----------------------------------------------------------------
+    def close(self: Catalog) -> None:
+        """commit buffered updates and close database."""
+        self.flush()
+        with self.lock:
+            if self.connection is not None: self.connection.close()
+            self.connection = None
+# ------------------------------------------------------------------------------------------
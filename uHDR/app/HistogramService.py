@@ -0,0 +1,97 @@
+# uHDR: HDR image editing software
+#   Copyright (C) 2022  remi cozot
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+# hdrCore project 2020-2022
+# author: remi.cozot@univ-littoral.fr
+
+# import
+# ------------------------------------------------------------------------------------------
+from __future__ import annotations
+import threading
+from timeit import default_timer as timer
+import numpy as np
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QGuiApplication
+from hdrCore import image
+# ------------------------------------------------------------------------------------------
+# --- class HistogramService(QObject) ------------------------------------------------------
+# ------------------------------------------------------------------------------------------
+debug : bool = False
+class HistogramService(QObject):
+    """ computes R, G, B and Y histograms (linear and log space) of the preview in a dedicated thread.
+        - requests are coalesced: only the latest preview is computed (latest wins)
+        - computations are throttled to the display refresh rate
+        - histograms are sent with histogramReady signal (queued to the UI thread):
+          {'linear': {'R','G','B','Y': image.Histogram}, 'log': {'R','G','B','Y': image.Histogram}}
+    """
+    # class attributes
+    # -----------------------------------------------------------------
+    histogramReady : pyqtSignal = pyqtSignal(object)    # dict: linear and log histograms
+    histogramRequested : pyqtSignal = pyqtSignal()      # internal: wakes up the worker thread
+
+    nbBins : int = 256
+
+    # constructor
+    # -----------------------------------------------------------------
+    def __init__(self: HistogramService) -> None:
+        super().__init__()
+
+        self.pending : image.Image|None = None
+        self.pendingLock : threading.Lock = threading.Lock()     # pending is set by UI thread, taken by worker thread
+        self.lastTime : float = 0.0
+
+        screen = QGuiApplication.primaryScreen() if QGuiApplication.instance() else None
+        refreshRate : float = screen.refreshRate() if screen and screen.refreshRate() > 0 else 60.0
+        self.interval : float = 1.0/refreshRate
+
+        self.thread : QThread = QThread()
+        self.moveToThread(self.thread)
+        self.histogramRequested.connect(self.compute)
+        self.thread.start()
+
+    # -----------------------------------------------------------------
+    def requestHistogram(self: HistogramService, colorData: np.ndarray) -> None:
+        """request histograms of the preview (display sRGB color data, called from UI thread)."""
+        if debug : print(f'HistogramService.requestHistogram(colorData={colorData.shape})')
+
+        # the image caches its luminance plane: Y is computed once for linear and log histograms
+        img : image.Image = image.Image('.', 'preview', colorData, image.imageType.SDR, False, image.ColorSpace.sRGB())
+        with self.pendingLock: self.pending = img
+        self.histogramRequested.emit()
+
+    # -----------------------------------------------------------------
+    @pyqtSlot()
+    def compute(self: HistogramService) -> None:
+        """compute histograms of the latest preview (worker thread)."""
+        wait : float = self.lastTime + self.interval - timer()
+        if wait > 0: QThread.msleep(int(wait*1000))     # throttling: requests received meanwhile are coalesced
+
+        with self.pendingLock: img, self.pending = self.pending, None
+        if img is None: return
+
+        self.lastTime = timer()
+        histograms : dict = {
+            'linear':   image.Histogram.buildRGBY(img, HistogramService.nbBins, logSpace=False, range=(0.0, 1.0)),
+            'log':      image.Histogram.buildRGBY(img, HistogramService.nbBins, logSpace=True)
+        }
+        if debug : print(f'HistogramService.compute(): done in {timer()-self.lastTime:.3f} s')
+
+        self.histogramReady.emit(histograms)
+
+    # -----------------------------------------------------------------
+    def stop(self: HistogramService) -> None:
+        """stop worker thread."""
+        with self.pendingLock: self.pending = None
+        self.thread.quit()
+        self.thread.wait()
+# ------------------------------------------------------------------------------------------
@@ -0,0 +1,119 @@
+# uHDR: HDR image editing software
+#   Copyright (C) 2022  remi cozot
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+# hdrCore project 2020-2022
+# author: remi.cozot@univ-littoral.fr
+
+# import
+# ------------------------------------------------------------------------------------------
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable
+from numpy import ndarray
+# ------------------------------------------------------------------------------------------
+# --- class ImageCache ---------------------------------------------------------------------
+# ------------------------------------------------------------------------------------------
+debug : bool = False
+class ImageCache:
+    """ memory-bounded cache of decoded images (color data).
+        - size-capped (maxBytes) with LRU eviction
+        - pinned entries are never evicted: pins are set by group (e.g. displayed page, edited image)
+        - onEvict(key) is called for each evicted entry, cache lock held (keeps caller state consistent)
+        - counters: hits, misses, evictions
+    """
+    # constructor
+    # -----------------------------------------------------------------
+    def __init__(self: ImageCache, maxBytes: int, onEvict: Callable[[Hashable], None]|None = None) -> None:
+        self.maxBytes : int = maxBytes
+        self.onEvict : Callable[[Hashable], None]|None = onEvict
+
+        self.lock : threading.RLock = threading.RLock()     # entries are added from loading threads
+        self.entries : OrderedDict[Hashable, ndarray] = OrderedDict()   # least recently used first
+        self.nbBytes : int = 0
+        self.pinned : dict[str, set[Hashable]] = {}         # group -> pinned keys
+
+        # counters
+        self.hits : int = 0
+        self.misses : int = 0
+        self.evictions : int = 0
+
+    # methods
+    # -----------------------------------------------------------------
+    def __contains__(self: ImageCache, key: Hashable) -> bool: return key in self.entries
+
+    def __len__(self: ImageCache) -> int: return len(self.entries)
+
+    def __repr__(self: ImageCache) -> str:
+        return f'ImageCache: {len(self.entries)} entries, {self.nbBytes/(1024*1024):.1f}/{self.maxBytes/(1024*1024):.1f} MB, hits: {self.hits}, misses: {self.misses}, evictions: {self.evictions}'
+
+    # -----------------------------------------------------------------
+    def get(self: ImageCache, key: Hashable) -> ndarray|None:
+        """cached image (None if not cached), marked as most recently used."""
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    # -----------------------------------------------------------------
+    def put(self: ImageCache, key: Hashable, data: ndarray) -> None:
+        """add (or replace) image, evict least recently used unpinned images."""
+        with self.lock:
+            self.nbBytes -= self.entries[key].nbytes if key in self.entries else 0
+            self.entries[key] = data
+            self.entries.move_to_end(key)
+            self.nbBytes += data.nbytes
+            self.evict()
+
+    # -----------------------------------------------------------------
+    def remove(self: ImageCache, key: Hashable) -> None:
+        """remove image (onEvict is not called)."""
+        with self.lock:
+            if key in self.entries: self.nbBytes -= self.entries.pop(key).nbytes
+
+    # -----------------------------------------------------------------
+    def pin(self: ImageCache, group: str, keys: Iterable[Hashable]) -> None:
+        """pin keys of group (replaces previous keys of group), pinned images are not evicted."""
+        with self.lock:
+            self.pinned[group] = set(keys)
+            self.evict()
+
+    # -----------------------------------------------------------------
+    def isPinned(self: ImageCache, key: Hashable) -> bool:
+        return any(key in keys for keys in self.pinned.values())
+
+    # -----------------------------------------------------------------
+    def evict(self: ImageCache) -> None:
+        """remove least recently used unpinned images until cache size is under maxBytes (most recently used is kept)."""
+        with self.lock:
+            if self.nbBytes <= self.maxBytes: return
+            for key in list(self.entries.keys())[:-1]:
+                if self.nbBytes <= self.maxBytes: break
+                if self.isPinned(key): continue
+                self.nbBytes -= self.entries.pop(key).nbytes
+                self.evictions += 1
+                if self.onEvict: self.onEvict(key)
+
+                if debug : print(f'ImageCache.evict({key}): {self}')
+
+    # -----------------------------------------------------------------
+    def clear(self: ImageCache) -> None:
+        """remove all images and pins (onEvict is not called, counters are kept)."""
+        with self.lock:
+            self.entries.clear()
+            self.pinned.clear()
+            self.nbBytes = 0
+# ------------------------------------------------------------------------------------------
@@ -17,14 +17,18 @@
 # import
 # ------------------------------------------------------------------------------------------
 from __future__ import annotations
-import os
+import os, copy, functools, multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future
 from matplotlib import image as imagePLT
-from core.image import Image, filenamesplit
+from core.image import Image, filenamesplit, writeThumbnail
+import numpy as np
 from numpy import ndarray
-from PyQt6.QtCore import QObject, pyqtSignal, QThreadPool, QRunnable
+from PyQt6.QtCore import QObject, pyqtSignal, QThreadPool, QRunnable, QThread
 from app.Jexif import Jexif
 from app.Tags import Tags
-from app.Score import Score
+from app.Catalog import Catalog
+from app.PreviewCache import PreviewCache
+from app.ImageCache import ImageCache
 from core.image import Image
 from preferences.Prefs import Prefs
 # ------------------------------------------------------------------------------------------
@@ -52,18 +56,35 @@ class ImageFiles(QObject):
         self.imageIsLoaded : dict[str, bool] = {}
         self.imageIsThumbnail : dict[str, bool] = {}
         
-        self.images : dict[str, ndarray] = {}
-
-        ## score
+        ## images and rendered previews (edited images displayed in gallery): memory-bounded cache
+        ## keys: (name, 'image') and (name, 'preview'), evicted images are no more loaded
+        self.images : ImageCache = ImageCache(Prefs.imageCacheBytes, self.imageEvicted)
+        self.previewCache : PreviewCache = PreviewCache(self.imagePath, self.extraPath)
+        ## process pipe parameters (ProcessPipe.toDict()) of previews displayed in gallery: those of the editor
+        self.previewPipe : list|None = None
+        ## catalog: score, tags, exif and thumbnail of images (created by setDirectory)
+        self.catalog : Catalog|None = None
+
+        ## score: all images of directory, score index: score -> image names (updated incrementally)
         self.imageScore : dict[str,int] = {}
+        self.scoreIndex : dict[int, set[str]] = {}
 
-        ## tags
+        ## tags and exif: loaded on demand (visible page) and prefetched (next and previous pages)
         self.imageTags : dict[str, Tags] = {}
         ## exif in json
         self.imageExif : dict[str,dict[str,str]] = {}
         
         # thread pool
         self.pool = QThreadPool.globalInstance() # get a global pool
+        ## metadata loading: low priority, one thread (exif reading is I/O bound)
+        self.metadataPool : QThreadPool = QThreadPool()
+        self.metadataPool.setMaxThreadCount(1)
+        self.metadataPool.setThreadPriority(QThread.Priority.LowPriority)
+        self.directoryVersion : int = 0     # metadata loaded for a previous directory are dropped
+
+        # thumbnails pre-generation: worker processes
+        self.thumbnailPool : ProcessPoolExecutor | None = None
+        self.thumbnailFutures : dict[str, Future] = {}
 
     # methods
     # -----------------------------------------------------------------
@@ -73,12 +94,21 @@ class ImageFiles(QObject):
 
         self.imageIsThumbnail   = {}
 
-        self.images             = {}
+        self.images.clear()
 
         self.imageScore         = {}
+        self.scoreIndex         = {}
         self.imageTags          = {}
         self.imageExif          = {}
 
+        # cancel metadata prefetching of previous directory
+        self.metadataPool.clear()
+        self.directoryVersion += 1
+
+        # cancel thumbnails pre-generation of previous directory
+        for future in self.thumbnailFutures.values(): future.cancel()
+        self.thumbnailFutures   = {}
+
     # -----------------------------------------------------------------
     def __repr__(self: ImageFiles) -> str:
         res ='-------------------  imageFiles -------------------------------'
@@ -111,6 +141,7 @@ class ImageFiles(QObject):
         """update attributes according preferences."""
         self.imagePath = Prefs.currentDir
         self.extraPath = Prefs.extraPath
+        self.images.maxBytes = Prefs.imageCacheBytes
     
     # -----------------------------------------------------------------    
     def setDirectory(self: ImageFiles, dirPath: str) -> int:
@@ -120,6 +151,9 @@ class ImageFiles(QObject):
 
         self.reset()
         self.imagePath = dirPath
+        self.previewCache = PreviewCache(self.imagePath, self.extraPath)
+        if self.catalog is not None: self.catalog.close()
+        self.catalog = None
         # scan directory
         ext : tuple[str]= tuple(Prefs.imgExt)
         filenames = sorted(os.listdir(dirPath))
@@ -128,21 +162,90 @@ class ImageFiles(QObject):
 
         for filename in self.imageFilenames: self.imageIsLoaded[filename] = False
 
-        # preload exif, score, tags, ...
+        # scores from catalog (one query), tags and exif are loaded by page (see loadMetadata)
         self.checkExtra()
+        self.catalog = Catalog(self.imagePath, self.extraPath)
+        self.pregenerateThumbnails()
 
+        scores : dict[str, int] = self.catalog.scores()
         for filename in self.imageFilenames:
-            # tags
-            self.imageTags[filename] = Tags.load(self.imagePath, filename, self.extraPath)
-            # jexif
-            self.imageExif[filename] = Jexif.load(self.imagePath, filename, self.extraPath)
-            # score
-            self.imageScore[filename] = Score.load(self.imagePath, filename, self.extraPath)
-
-            
+            self.imageScore[filename] = scores.get(filename, 0)
+            self.scoreIndex.setdefault(self.imageScore[filename], set()).add(filename)
 
         return len(self.imageFilenames)
     
+    # -----------------------------------------------------------------
+    def loadMetadata(self: ImageFiles, filenames: list[str], directoryVersion: int|None = None) -> None:
+        """load tags and exif of images not loaded yet: one catalog query, exif read from image file if not in catalog."""
+        if directoryVersion is None: directoryVersion = self.directoryVersion
+        filenames = [f for f in filenames if f not in self.imageExif]
+        if not filenames or self.catalog is None: return
+
+        if debug : print(f'ImageFiles.loadMetadata({filenames})')
+
+        catalog : Catalog = self.catalog
+        records : dict[str, dict] = catalog.records(filenames)
+
+        # exif not in catalog: one exiftool request
+        missing : list[str] = [f for f in filenames if not records.get(f, {}).get('exif', None)]
+        exifs : dict[str, dict[str,str]] = Jexif.readMany(self.imagePath, missing) if missing else {}
+        for filename, exif in exifs.items():
+            if not Jexif.isDefault(exif): catalog.update(filename, exif=exif)
+        catalog.flush()
+
+        if directoryVersion != self.directoryVersion: return    # directory changed meanwhile
+        for filename in filenames:
+            record : dict = records.get(filename, {})
+            self.imageTags.setdefault(filename, Tags(record['tags'] if record.get('tags', None) else {}))
+            self.imageExif.setdefault(filename, exifs[filename] if filename in exifs else record['exif'])
+
+    # -----------------------------------------------------------------
+    def requestMetadata(self: ImageFiles, filenames: list[str]) -> None:
+        """load tags and exif of images in background (low priority), replaces pending requests."""
+        self.metadataPool.clear()
+        self.metadataPool.start(RunLoadMetadata(self, filenames))
+
+    # -----------------------------------------------------------------
+    def thumbnailFilename(self: ImageFiles, filename: str) -> str:
+        """thumbnail filename of image file (in extra directory)."""
+        path, name, ext = filenamesplit(os.path.join(self.imagePath, filename))
+        return os.path.join(path, self.extraPath, Prefs.thumbnailPrefix+name+'.'+ext)
+
+    # -----------------------------------------------------------------
+    def pregenerateThumbnails(self: ImageFiles) -> None:
+        """generate missing thumbnails of directory in worker processes (gallery order: first page first)."""
+        missing : list[str] = [f for f in self.imageFilenames if not os.path.exists(self.thumbnailFilename(f))]
+        if not missing: return
+
+        if debug : print(f'ImageFiles.pregenerateThumbnails(): {len(missing)} thumbnail(s)')
+
+        # spawn (not fork): the process runs Qt threads, thread pools and the exiftool pipe
+        if self.thumbnailPool is None: self.thumbnailPool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context('spawn'))
+        for filename in missing:
+            self.thumbnailFutures[filename] = self.thumbnailPool.submit(writeThumbnail, os.path.join(self.imagePath, filename), self.thumbnailFilename(filename), Prefs.thumbnailMaxSize)
+            self.thumbnailFutures[filename].add_done_callback(functools.partial(self.setThumbnailWritten, filename))
+
+    # -----------------------------------------------------------------
+    def setThumbnailWritten(self: ImageFiles, filename: str, future: Future|None = None) -> None:
+        """record thumbnail file of image in catalog (called from worker threads, future: pre-generation task if any)."""
+        if (future is not None) and (future.cancelled() or future.exception() is not None): return
+        if self.catalog is not None: self.catalog.update(filename, thumbnail=os.path.basename(self.thumbnailFilename(filename)))
+
+    # -----------------------------------------------------------------
+    def stopThumbnails(self: ImageFiles) -> None:
+        """stop thumbnails pre-generation (pending thumbnails are cancelled)."""
+        if self.thumbnailPool is not None:
+            self.thumbnailPool.shutdown(wait=False, cancel_futures=True)
+            self.thumbnailPool = None
+        self.thumbnailFutures = {}
+
+    # -----------------------------------------------------------------
+    def close(self: ImageFiles) -> None:
+        """stop thumbnails pre-generation, commit and close catalog."""
+        self.stopThumbnails()
+        if self.catalog is not None: self.catalog.close()
+        self.catalog = None
+
     # -----------------------------------------------------------------
     def requestLoad(self: ImageFiles, filename: str, thumbnail : bool=True): 
         """add a image loading request to pool thread."""
@@ -150,14 +253,6 @@ class ImageFiles(QObject):
         if debug : print(f'ImageFiles.requestLoad({filename}, thumbnail={thumbnail})')
 
         if self.imageIsLoaded[filename] != True:
-            # extra
-            self.imageTags[filename] = Tags.load(self.imagePath, filename, self.extraPath)
-            # jexif
-            self.imageExif[filename] = Jexif.load(self.imagePath, filename, self.extraPath)
-            # score
-            self.imageScore[filename] = Score.load(self.imagePath, filename, self.extraPath)
-
-
             # image
             filename_ = os.path.join(self.imagePath,filename)
             self.pool.start(RunLoadImage(self,filename_, thumbnail))
@@ -171,9 +266,7 @@ class ImageFiles(QObject):
         if debug : print(f'ImageFiles.endLoadImage( error={error}, {filename})')
 
         if not error:
-            filename = filename.split('\\')[-1]
-            self.imageIsLoaded[filename] = True 
-
+            filename = os.path.basename(filename)
             self.imageLoaded.emit(filename)
 
 
@@ -181,23 +274,69 @@ class ImageFiles(QObject):
             self.requestLoad(filename)  
     
     # -----------------------------------------------------------------
-    def getImage(self: ImageFiles, name: str, thumbnail : bool = True) -> ndarray:
-        """get image, assumption image is loaded"""
+    def getImage(self: ImageFiles, name: str, thumbnail : bool = True) -> ndarray|None:
+        """get image, assumption image is loaded (None if evicted meanwhile)"""
+
+        return self.images.get((name, 'image'))
+
+    # -----------------------------------------------------------------
+    def getGalleryImage(self: ImageFiles, name: str) -> ndarray|None:
+        """get image displayed in gallery: rendered preview if image has been edited, else image."""
 
-        return self.images[name]
+        preview : ndarray|None = self.images.get((name, 'preview')) if (name, 'preview') in self.images else None
+        return preview if preview is not None else self.images.get((name, 'image'))
+
+    # -----------------------------------------------------------------
+    def setImage(self: ImageFiles, name: str, colorData: ndarray) -> None:
+        """add loaded image to cache (called from loading threads)."""
+        with self.images.lock:
+            self.images.put((name, 'image'), colorData)
+            self.imageIsLoaded[name] = True
+
+    # -----------------------------------------------------------------
+    def setPreview(self: ImageFiles, name: str, colorData: ndarray) -> None:
+        """add rendered preview (edited image) to cache."""
+        self.images.put((name, 'preview'), colorData)
+
+    # -----------------------------------------------------------------
+    def setPreviewPipe(self: ImageFiles, processPipeDict: list) -> None:
+        """set process pipe parameters of gallery previews: previews rendered with other parameters are dropped."""
+        if processPipeDict == self.previewPipe: return
+        self.previewPipe = copy.deepcopy(processPipeDict)
+        with self.images.lock:
+            for key in [key for key in self.images.entries if key[1] == 'preview']: self.images.remove(key)
+
+    # -----------------------------------------------------------------
+    def imageEvicted(self: ImageFiles, key: tuple[str, str]) -> None:
+        """called by image cache when an image is evicted (cache lock held): image has to be loaded again."""
+        name, kind = key
+        if kind == 'image' and name in self.imageIsLoaded: self.imageIsLoaded[name] = False
+
+    # -----------------------------------------------------------------
+    def pin(self: ImageFiles, group: str, names: list[str]) -> None:
+        """pin images and previews of group (e.g. 'page': displayed page, 'edited': edited image), pinned images are not evicted."""
+        self.images.pin(group, [(name, kind) for name in names for kind in ('image', 'preview')])
     
     # -----------------------------------------------------------------
     def getImageTags(self: ImageFiles, name : str) -> Tags: 
+        if name not in self.imageExif: self.loadMetadata([name])
         return self.imageTags[name]
     
     # -----------------------------------------------------------------
     def getImageExif(self: ImageFiles, name : str) -> dict[str,str]: 
+        if name not in self.imageExif: self.loadMetadata([name])
         return self.imageExif[name]
     
     # -----------------------------------------------------------------
     def getImageScore(self: ImageFiles, name : str) ->int: 
         return self.imageScore[name]
     
+    # -----------------------------------------------------------------
+    def getScoreSelection(self: ImageFiles, scores: list[int]) -> list[tuple[str,bool]]:
+        """selection of images which score is in scores (score index), in directory order."""
+        selected : set[str] = set().union(*(self.scoreIndex.get(score, set()) for score in scores))
+        return [(name, name in selected) for name in self.imageFilenames]
+    
     # -----------------------------------------------------------------   
     def checkExtra(self: ImageFiles) -> None:
         ePath: str = os.path.join(self.imagePath, self.extraPath) 
@@ -209,17 +348,19 @@ class ImageFiles(QObject):
     # -----------------------------------------------------------------
     def updateImageTag(self, imageName: str, type: str, name: str, value: bool) -> None:
 
-
+        if imageName not in self.imageExif: self.loadMetadata([imageName])
         self.imageTags[imageName].add(type, name, value)
-        self.imageTags[imageName].save(self.imagePath, self.extraPath, imageName)
+        self.catalog.update(imageName, tags=self.imageTags[imageName].tags)
+        self.catalog.flush()
     
     # -----------------------------------------------------------------
     def updateImageScore(self: ImageFiles, imageName: str, value: int) -> None:
 
-
+        self.scoreIndex.get(self.imageScore.get(imageName, 0), set()).discard(imageName)
+        self.scoreIndex.setdefault(value, set()).add(imageName)
         self.imageScore[imageName] = value
-
-        Score.save(self.imagePath, self.extraPath, imageName,self.imageScore[imageName])
+        self.catalog.update(imageName, score=value)
+        self.catalog.flush()
 
 # ------------------------------------------------------------------------------------------
 # --- RunLoadImage(QRunnable) --------------------------------------------------------------
@@ -241,27 +382,39 @@ class RunLoadImage(QRunnable):
             # first check file exists ?
             if os.path.exists(self.filename):
 
+                name : str = os.path.basename(self.filename)
+
                 # thumbnail ?
                 if self.thumbnail : # thumbnail not original image
 
                     # thumbnail exitsts ?
-                    path, name, ext = filenamesplit(self.filename)
-                    thumbnailName : str = os.path.join(path, Prefs.extraPath, Prefs.thumbnailPrefix+name+'.'+ext)
+                    thumbnailName : str = self.parent.thumbnailFilename(name)
                     
-                    if os.path.exists(thumbnailName):
-                        imageSmall : Image = Image.read(thumbnailName)
-                    else:
-                        imageBig : Image = Image.read(self.filename)
-                        imageSmall : Image = imageBig.buildThumbnail(Prefs.thumbnailMaxSize)
-                        imageSmall.write(thumbnailName)
+                    if not os.path.exists(thumbnailName):
+                        future : Future | None = self.parent.thumbnailFutures.get(name, None)
+                        try:
+                            # wait for pre-generation, or generate in this thread if not (or no more) scheduled
+                            if (future is None) or (future.cancel()): 
+                                writeThumbnail(self.filename, thumbnailName, Prefs.thumbnailMaxSize)
+                                self.parent.setThumbnailWritten(name)
+                            else: future.result()
+                        except Exception:
+                            writeThumbnail(self.filename, thumbnailName, Prefs.thumbnailMaxSize)
+                            self.parent.setThumbnailWritten(name)
+                    imageSmall : Image = Image.read(thumbnailName)
                     
+                    # preview rendered with editor parameters: same look in gallery and editor, no recomputation
+                    previewPipe : list|None = self.parent.previewPipe
+                    preview : ndarray|None = self.parent.previewCache.get(self.filename, previewPipe, imageSmall.cData.shape[:2]) if previewPipe is not None else None
+                    if preview is not None: self.parent.setPreview(name, preview)
+
                     #set thumbnail to parent <class ImageFiles>
-                    self.parent.images[self.filename.split('\\')[-1]] = imageSmall.cData 
+                    self.parent.setImage(name, imageSmall.cData)
 
                 else: # original image not thumbnail
 
                     imageBig = Image.read(self.filename)
-                    self.parent.images[self.filename.split('\\')[-1]] = imageBig.cData              
+                    self.parent.setImage(name, imageBig.cData)              
             
             self.parent.endLoadImage(False, self.filename)
         except(IOError, ValueError) as e:
@@ -269,4 +422,25 @@ class RunLoadImage(QRunnable):
     # -----------------------------------------------------------------
 # ------------------------------------------------------------------------------------------
 
- 
\ No newline at end of file
+ 
+# ------------------------------------------------------------------------------------------
+# --- RunLoadMetadata(QRunnable) -----------------------------------------------------------
+# ------------------------------------------------------------------------------------------
+class RunLoadMetadata(QRunnable):
+    def __init__(self: RunLoadMetadata, parent: ImageFiles, filenames: list[str]):
+
+        super().__init__()
+        self.parent: ImageFiles = parent
+        self.filenames : list[str] = filenames
+        self.directoryVersion : int = parent.directoryVersion
+    
+    # -----------------------------------------------------------------
+    def run(self: RunLoadMetadata):
+
+        if debug : print(f'RunLoadMetadata.run({len(self.filenames)} images)')
+
+        try:
+            self.parent.loadMetadata(self.filenames, self.directoryVersion)
+        except Exception as e:
+            print(f'[ERROR] RunLoadMetadata.run(): {e}')
+# ------------------------------------------------------------------------------------------
@@ -25,6 +25,13 @@ from hdrCore.Exif import Exif
 debug : bool = False
 # ------------------------------------------------------------------------------------------ 
 class Jexif: 
+    default : dict[str, str] = {"Color Space": "unkwown", "Bits Per Sample": "-1", "Type": "unkwown", "Size": "-1 x -1"} # default value (returned as copy)
+
+    @staticmethod
+    def isDefault(exifDict: dict[str, str]) -> bool:
+        """True if exif is the default value (exif could not be read)."""
+        return exifDict == Jexif.default
+
     @staticmethod
     def load(imageDir: str, imageFilename: str, extraDir : str) -> dict[str, str]:
         # check if extra '.uHDR' dir exist
@@ -36,16 +43,24 @@ class Jexif:
                     jexif : dict[str, str] =  json.load(exifFile)
                     return jexif
             else: 
-                rawExif : dict[str, str] | None = Exif.readExif(imageDir,imageFilename)
-                if rawExif:
-                    jexif : dict[str, str] = Exif.recoverExifData(rawExif) 
-                    
+                jexif : dict[str, str] = Jexif.read(imageDir, imageFilename)
+                if not Jexif.isDefault(jexif):
                     # save jexif file
-                    exifFilename= os.path.join(imageDir,extraDir,imageFilename[:-3]+'jexif')
                     with open(exifFilename, 'w') as exifFile:
                         json.dump(jexif, exifFile)                   
-                    return jexif
-        return {"Color Space": "unkwown", "Bits Per Sample": "-1", "Type": "unkwown", "Size": "-1 x -1"} # default value
+                return jexif
+        return dict(Jexif.default)
+
+    @staticmethod
+    def read(imageDir: str, imageFilename: str) -> dict[str, str]:
+        """read exif summary from image file (exiftool), Jexif.default if exif can not be read."""
+        return Jexif.readMany(imageDir, [imageFilename])[imageFilename]
+
+    @staticmethod
+    def readMany(imageDir: str, imageFilenames: list[str]) -> dict[str, dict[str, str]]:
+        """read exif summary of image files (one exiftool request), Jexif.default for files which exif can not be read."""
+        rawExifs : dict[str, dict[str, str]] = Exif.readExifMany(imageDir, imageFilenames)
+        return {f: Exif.recoverExifData(rawExifs[f]) if rawExifs[f] else dict(Jexif.default) for f in imageFilenames}
 
     @staticmethod
     def toTuple(exifDict: dict[str, str]) -> tuple[tuple[int,int], str, str, int] :
@@ -0,0 +1,141 @@
+# uHDR: HDR image editing software
+#   Copyright (C) 2022  remi cozot
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+# hdrCore project 2020-2022
+# author: remi.cozot@univ-littoral.fr
+
+# import
+# ------------------------------------------------------------------------------------------
+from __future__ import annotations
+import os, json, hashlib, functools, threading
+from collections import OrderedDict
+import numpy as np
+from preferences.Prefs import Prefs
+# ------------------------------------------------------------------------------------------
+# --- class PreviewCache -------------------------------------------------------------------
+# ------------------------------------------------------------------------------------------
+debug : bool = False
+class PreviewCache:
+    """ content-addressed cache of rendered previews in extra directory: '.uHDR/previews'.
+        - entry key: source file identity (size, mtime, hash of first and last blocks), process pipe hash, resolution
+        - entries are stored as uint8 or float16 numpy files (Prefs.previewCacheFormat)
+        - size-capped (Prefs.previewCacheBytes) with LRU eviction, last use is file modification time
+    """
+    # class attributes
+    # -----------------------------------------------------------------
+    dirName : str = 'previews'
+    hashBlockSize : int = 64*1024
+
+    # constructor
+    # -----------------------------------------------------------------
+    def __init__(self: PreviewCache, imageDir: str, extraDir: str) -> None:
+        self.cachePath : str = os.path.join(imageDir, extraDir, PreviewCache.dirName)
+        self.lock : threading.Lock = threading.Lock()       # previews are read from loading threads
+
+        # LRU index: entry filename -> bytes, least recently used first
+        self.entries : OrderedDict[str, int] = OrderedDict()
+        self.nbBytes : int = 0
+        if os.path.isdir(self.cachePath):
+            files : list[os.DirEntry] = [f for f in os.scandir(self.cachePath) if f.name.endswith('.npy')]
+            for f in sorted(files, key=lambda f: f.stat().st_mtime):
+                self.entries[f.name] = f.stat().st_size
+                self.nbBytes += f.stat().st_size
+
+    # keys
+    # -----------------------------------------------------------------
+    @staticmethod
+    def sourceKey(filename: str) -> str|None:
+        """source file identity: size, modification time and hash of first and last blocks (None if file does not exist)."""
+        if not os.path.isfile(filename): return None
+        st : os.stat_result = os.stat(filename)
+        return _fastHash(os.path.abspath(filename), st.st_size, st.st_mtime_ns)
+
+    @staticmethod
+    def pipeKey(processPipeDict: list) -> str:
+        """hash of process pipe parameters (ProcessPipe.toDict())."""
+        return hashlib.blake2b(json.dumps(processPipeDict, sort_keys=True, default=str).encode(), digest_size=8).hexdigest()
+
+    @staticmethod
+    def entryName(sourceKey: str, pipeKey: str, resolution: tuple[int,int]) -> str:
+        return f'{sourceKey}-{pipeKey}-{resolution[0]}x{resolution[1]}.npy'
+
+    # methods
+    # -----------------------------------------------------------------
+    def get(self: PreviewCache, filename: str, processPipeDict: list, resolution: tuple[int,int]) -> np.ndarray|None:
+        """cached preview of image file rendered with process pipe at resolution (height, width), None if not cached."""
+        sourceKey : str|None = PreviewCache.sourceKey(filename)
+        if sourceKey is None: return None
+        return self.load(PreviewCache.entryName(sourceKey, PreviewCache.pipeKey(processPipeDict), resolution))
+
+    # -----------------------------------------------------------------
+    def put(self: PreviewCache, filename: str, processPipeDict: list, colorData: np.ndarray) -> None:
+        """store preview (display color data in [0,1]) of image file rendered with process pipe, evict least recently used previews."""
+        sourceKey : str|None = PreviewCache.sourceKey(filename)
+        if sourceKey is None: return
+        name : str = PreviewCache.entryName(sourceKey, PreviewCache.pipeKey(processPipeDict), colorData.shape[:2])
+
+        if Prefs.previewCacheFormat == 'float16':   data : np.ndarray = colorData.astype(np.float16)
+        else:                                       data = (np.clip(colorData, 0.0, 1.0)*255 + 0.5).astype(np.uint8)
+
+        os.makedirs(self.cachePath, exist_ok=True)
+        entryFilename : str = os.path.join(self.cachePath, name)
+        tmpFilename : str = entryFilename + f'.{threading.get_ident()}.tmp'
+        with open(tmpFilename, 'wb') as f: np.save(f, data)
+        os.replace(tmpFilename, entryFilename)                  # atomic: readers never see a partial entry
+
+        with self.lock:
+            self.nbBytes -= self.entries.pop(name, 0)
+            self.entries[name] = os.path.getsize(entryFilename)
+            self.nbBytes += self.entries[name]
+        self.evict()
+
+        if debug : print(f'PreviewCache.put({filename}): {name} ({self.nbBytes} bytes in cache)')
+
+    # -----------------------------------------------------------------
+    def load(self: PreviewCache, name: str) -> np.ndarray|None:
+        """load entry as float32 color data, mark it as most recently used."""
+        with self.lock:
+            if name not in self.entries: return None
+            self.entries.move_to_end(name)
+        entryFilename : str = os.path.join(self.cachePath, name)
+        try:
+            data : np.ndarray = np.load(entryFilename)
+            os.utime(entryFilename)                             # persistent LRU order
+        except (OSError, ValueError):
+            with self.lock: self.nbBytes -= self.entries.pop(name, 0)
+            return None
+
+        if debug : print(f'PreviewCache.load({name})')
+        return data.astype(np.float32)/255 if data.dtype == np.uint8 else data.astype(np.float32)
+
+    # -----------------------------------------------------------------
+    def evict(self: PreviewCache) -> None:
+        """remove least recently used entries until cache size is under Prefs.previewCacheBytes."""
+        with self.lock:
+            while self.nbBytes > Prefs.previewCacheBytes and len(self.entries) > 1:
+                name, nbBytes = self.entries.popitem(last=False)
+                self.nbBytes -= nbBytes
+                try: os.remove(os.path.join(self.cachePath, name))
+                except OSError: pass
+# ------------------------------------------------------------------------------------------
+@functools.lru_cache(maxsize=4096)
+def _fastHash(filename: str, size: int, mtime: int) -> str:
+    # hash of size, modification time, first and last blocks: cached per (filename, size, mtime)
+    h = hashlib.blake2b(f'{size}:{mtime}'.encode(), digest_size=8)
+    with open(filename, 'rb') as f:
+        h.update(f.read(PreviewCache.hashBlockSize))
+        if size > PreviewCache.hashBlockSize:
+            f.seek(max(size - PreviewCache.hashBlockSize, PreviewCache.hashBlockSize))
+            h.update(f.read(PreviewCache.hashBlockSize))
+    return h.hexdigest()
+# ------------------------------------------------------------------------------------------
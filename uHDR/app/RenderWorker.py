@@ -0,0 +1,92 @@
+# uHDR: HDR image editing software
+#   Copyright (C) 2022  remi cozot
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+# hdrCore project 2020-2022
+# author: remi.cozot@univ-littoral.fr
+
+# import
+# ------------------------------------------------------------------------------------------
+from __future__ import annotations
+import numpy as np
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from hdrCore import image, processing
+# ------------------------------------------------------------------------------------------
+# --- class RenderWorker(QObject) ----------------------------------------------------------
+# ------------------------------------------------------------------------------------------
+debug : bool = False
+class RenderWorker(QObject):
+    """ renders a process pipe in a dedicated thread.
+        - requests are coalesced: only the latest parameters are computed (latest wins)
+        - a render in progress is cancelled between process nodes when parameters change
+          (ProcessPipe.setParameters/setImage increment ProcessPipe.generation)
+        - pipes of pointwise nodes without active color editor or lightness mask are rendered with a baked 3D LUT
+          (see ProcessPipe.isBakeable, ProcessPipe.computeLUT)
+        - other pipes are rendered coarse levels first (see ProcessPipe.computePreview), each level is sent as soon as
+          it is computed, levels not yet computed are cancelled when parameters change
+        - rendered images are sent with imageRendered signal (queued to the UI thread)
+    """
+    # class attributes
+    # -----------------------------------------------------------------
+    imageRendered : pyqtSignal = pyqtSignal(object, int, bool)  # ndarray: display (tone mapped) color data, process pipe generation, final (full resolution) level
+    renderRequested : pyqtSignal = pyqtSignal()             # internal: wakes up the worker thread
+
+    # constructor
+    # -----------------------------------------------------------------
+    def __init__(self: RenderWorker, processPipe: processing.ProcessPipe) -> None:
+        super().__init__()
+
+        self.processPipe : processing.ProcessPipe = processPipe
+        self.pending : bool = False
+
+        self.thread : QThread = QThread()
+        self.moveToThread(self.thread)
+        self.renderRequested.connect(self.render)
+        self.thread.start()
+
+    # -----------------------------------------------------------------
+    def requestRender(self: RenderWorker) -> None:
+        """request a render of the process pipe (called from UI thread)."""
+        if debug : print(f'RenderWorker.requestRender(generation={self.processPipe.generation})')
+
+        self.pending = True
+        self.renderRequested.emit()
+
+    # -----------------------------------------------------------------
+    @pyqtSlot()
+    def render(self: RenderWorker) -> None:
+        """render until no request is pending (worker thread)."""
+        while self.pending:
+            self.pending = False
+            generation : int = self.processPipe.generation
+            cancel = lambda: self.processPipe.generation != generation
+
+            if processing.ProcessPipe.lutPreview and self.processPipe.isBakeable():
+                self.processPipe.computeLUT()
+                if not cancel(): self.emitImage(self.processPipe.getImage(toneMap=True), generation, True)
+            else:
+                self.processPipe.computePreview(lambda img, level, final: self.emitImage(img, generation, final), toneMap=True, background=False)
+
+    # -----------------------------------------------------------------
+    def emitImage(self: RenderWorker, img: image.Image|None, generation: int, final: bool) -> None:
+        """send rendered image if parameters have not changed since render start (worker thread)."""
+        if img is None or self.processPipe.generation != generation: return
+        if debug : print(f'RenderWorker.emitImage(generation={generation}, shape={img.colorData.shape}, final={final})')
+        self.imageRendered.emit(np.array(img.colorData), generation, final)
+
+    # -----------------------------------------------------------------
+    def stop(self: RenderWorker) -> None:
+        """stop worker thread."""
+        self.pending = False
+        self.thread.quit()
+        self.thread.wait()
+# ------------------------------------------------------------------------------------------
@@ -16,123 +16,73 @@
 
 # import
 # ------------------------------------------------------------------------------------------
+import functools
 import numpy as np
+from core import colourSpace
 
 # ------------------------------------------------------------------------------------------
 
 # hueBarLch = buildLchColourData((75,75), (100,100), (0,360), (20,720), width='h', height='c')
 
+def _ramp(channel : str, bounds : tuple[float,float], t : np.ndarray) -> np.ndarray:
+    """linear ramp of channel (L, c or h) over bounds, t in [0,1]; hue range with hmin > hmax goes across 0/360."""
+    vmin, vmax = bounds
+    if channel == 'h' and vmin > vmax:
+        # hmin = 340 / hmax=20 -> hmin = hmin-360 >> hmin = -20, hmax =20
+        values : np.ndarray = (vmin-360)*(1-t) + vmax*t
+        return np.where(values < 0, 360 + values, values)
+    return vmin*(1-t) + vmax*t
+
 def buildLchcolourData( L : tuple[float,float],
                         c : tuple[float, float],
                         h :tuple[float,float],
                         size : tuple[int,int],
                         width: str,
                         height:str) -> np.ndarray:
+    """Lch gradient image: channel width varies along x, channel height along y, the third channel is constant (middle of its range).
 
+    Args:
+        L, c, h (tuple[float,float], Required): lightness, chroma and hue ranges
+        size (tuple[int,int], Required): height, width
+        width, height (str, Required): channel along x and y: 'L' | 'c' | 'h'
 
+    Returns:
+        (numpy.ndarray): height x width x 3 Lch data
+    """
     colourData : np.ndarray= np.zeros((size[0], size[1],3))
     Lmin, Lmax = L if L[0] < L[1] else (L[1], L[0])
     cmin, cmax = c if c[0] < c[1] else (c[1], c[0])
-    hmin, hmax = h
+    bounds : dict[str, tuple[float,float]] = {'L': (Lmin, Lmax), 'c': (cmin, cmax), 'h': h}
+    index : dict[str, int] = {'L': 0, 'c': 1, 'h': 2}
 
-    xmin, xmax = 0, size[1]
-    ymin, ymax = 0, size[0]
+    if (width not in index) or (height not in index) or (width == height): return colourData
 
-    if width=='L':
-        if height=='c':
-            #     +-------------------------------+
-            #  c  |                               |
-            #     +-------------------------------+
-            #                Lightness
-            for x in range(xmin,xmax):
-                for y in range(ymin,ymax):
-                    u, v = x/(xmax-1), y/(ymax-1)
-                    Lu = Lmin*(1-u)+Lmax*u
-                    cv = cmin*(1-v) + cmax*v
-                    hh = (hmin+hmax)/2
-                    colourData[y,x,:] = [Lu,cv,hh]
-        elif height=='h':
-            #     +-------------------------------+
-            #  h  |                               |
-            #     +-------------------------------+
-            #                Lightness
-            for x in range(xmin,xmax):
-                for y in range(ymin,ymax):
-                    u, v = x/(xmax-1), y/(ymax-1)
-                    Lu = Lmin*(1-u)+Lmax*u
-                    if hmin <= hmax:
-                        hv = hmin*(1-v) + hmax*v
-                    else:
-                        # hmin = 340 / hmax=20 -> hmin = hmin-360 >> hmin = -20, hmax =20
-                        hv = (hmin-360)*(1-v) + hmax*v
-                        if hv < 0: hv = 360 +hv
-                    cc = (cmin+cmax)/2
-                    colourData[y,x,:] = [Lu,cc,hv]
-    elif width=='c':
-        if height=='L':
-            #     +-------------------------------+
-            #  L  |                               |
-            #     +-------------------------------+
-            #                chroma
-            for x in range(xmin,xmax):
-                for y in range(ymin,ymax):
-                    u, v = x/(xmax-1), y/(ymax-1)
-                    cu = cmin*(1-u) + cmax*u
-                    Lv = Lmin*(1-v)+Lmax*v
-                    hh = (hmin+hmax)/2
-                    colourData[y,x,:] = [Lv,cu,hh]
-        elif height=='h':
-            #     +-------------------------------+
-            #  h  |                               |
-            #     +-------------------------------+
-            #                chroma
-            for x in range(xmin,xmax):
-                for y in range(ymin,ymax):
-                    u, v = x/(xmax-1), y/(ymax-1)
-                    cu = cmin*(1-u) + cmax*u
-                    if hmin <= hmax:
-                        hv = hmin*(1-v) + hmax*v
-                    else:
-                        # hmin = 340 / hmax=20 -> hmin = hmin-360 >> hmin = -20, hmax =20
-                        hv = (hmin-360)*(1-v) + hmax*v
-                        if hv < 0: hv = 360 +hv
-                    LL = (Lmin+Lmax)/2
-                    colourData[y,x,:] = [LL,cu,hv]
-    elif width == 'h':
-        if height=='L':
-            #     +-------------------------------+
-            #  L  |                               |
-            #     +-------------------------------+
-            #                hue
-            for x in range(xmin,xmax):
-                for y in range(ymin,ymax):
-                    u, v = x/(xmax-1), y/(ymax-1)
-                    if hmin <= hmax:
-                        hu = hmin*(1-u) + hmax*u
-                    else:
-                        # hmin = 340 / hmax=20 -> hmin = hmin-360 >> hmin = -20, hmax =20
-                        hu = (hmin-360)*(1-u) + hmax*u
-                        if hu < 0: hv = 360 +hu
-                    Lv = Lmin*(1-v)+Lmax*v
-                    cc = (cmin+cmax)/2
-                    colourData[y,x,:] = [Lv,cc,hu]
-        elif height=='c':
-            #     +-------------------------------+
-            #  c  |                               |
-            #     +-------------------------------+
-            #                hue
-            for x in range(xmin,xmax):
-                for y in range(ymin,ymax):
-                    u, v = x/(xmax-1), y/(ymax-1)
-                    if hmin <= hmax:
-                        hu = hmin*(1-u) + hmax*u
-                    else:
-                        # hmin = 340 / hmax=20 -> hmin = hmin-360 >> hmin = -20, hmax =20
-                        hu = (hmin-360)*(1-u) + hmax*u
-                        if hu < 0: hv = 360 +hu
-                    cv = cmin*(1-v)+cmax*v
-                    LL = (Lmin+Lmax)/2
-                    colourData[y,x,:] = [LL,cv,hu]
+    u : np.ndarray = np.linspace(0.0, 1.0, size[1])       # x/(xmax-1)
+    v : np.ndarray = np.linspace(0.0, 1.0, size[0])       # y/(ymax-1)
+    colourData[:,:,index[width]] = _ramp(width, bounds[width], u)[np.newaxis,:]
+    colourData[:,:,index[height]] = _ramp(height, bounds[height], v)[:,np.newaxis]
+    constant : str = ({'L','c','h'} - {width, height}).pop()
+    colourData[:,:,index[constant]] = sum(bounds[constant])/2
 
     return colourData
 
+# ------------------------------------------------------------------------------------------
+@functools.lru_cache(maxsize=64)
+def _cachedsRGBcolourData(L : tuple[float,float], c : tuple[float,float], h : tuple[float,float], size : tuple[int,int], width : str, height : str) -> np.ndarray:
+    RGB : np.ndarray = colourSpace.Lch_to_sRGB(buildLchcolourData(L, c, h, size, width, height), apply_cctf_encoding=True, clip=True)
+    RGB.flags.writeable = False
+    return RGB
+
+def buildsRGBcolourData(L : tuple[float,float],
+                        c : tuple[float, float],
+                        h :tuple[float,float],
+                        size : tuple[int,int],
+                        width: str,
+                        height:str) -> np.ndarray:
+    """sRGB (cctf encoded, clipped) rendering of an Lch gradient image (see buildLchcolourData).
+        rendered gradients are cached (LRU): selectors ask again for the same gradients when sliders move.
+
+    Returns:
+        (numpy.ndarray): read-only height x width x 3 sRGB data
+    """
+    return _cachedsRGBcolourData((float(L[0]), float(L[1])), (float(c[0]), float(c[1])), (float(h[0]), float(h[1])), (int(size[0]), int(size[1])), width, height)
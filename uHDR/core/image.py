@@ -22,6 +22,7 @@ from core.colourSpace import ColorSpace
 from copy import deepcopy
 import numpy as np, os, colour
 import skimage.transform
+from PIL import Image as PILImage
 
 # ------------------------------------------------------------------------------------------
 
@@ -77,16 +78,21 @@ class Image:
         path, name, ext = filenamesplit(fileName)
         if ext == "hdr":
             colour.write_image(self.cData, fileName, bit_depth='float32', method='Imageio')
+        elif self.cData.dtype == np.uint8:
+            colour.write_image(self.cData, fileName, bit_depth='uint8', method='Imageio')
         else:
             colour.write_image((self.cData * 255.0).astype(np.uint8), fileName, bit_depth='uint8', method='Imageio')
     # -----------------------------------------------------------------
     def buildThumbnail(self: Image, maxSize :int= 800) -> Image:
-        """build a thumbnail image."""
+        """build a thumbnail image: block average (integer factor), then resize to maxSize."""
         
         y, x, _ =  self.cData.shape
         factor : int = maxSize/max(y,x)
         if factor<1:
-            thumbcData = skimage.transform.resize(self.cData, (int(y * factor),int(x*factor) ))
+            thumbcData : np.ndarray = Image.blockAverage(self.cData, max(y,x)//maxSize)
+            ty, tx, _ = thumbcData.shape
+            if max(ty,tx) > maxSize: 
+                thumbcData = skimage.transform.resize(thumbcData, (int(y * factor),int(x*factor)), order=1, anti_aliasing=False, preserve_range=True).astype(np.float32)
 
             return Image(thumbcData, self.cSpace, self.hdr)
         else:
@@ -94,6 +100,34 @@ class Image:
 
 
     # static methods
+    # -----------------------------------------------------------------
+    @staticmethod
+    def blockAverage(data: np.ndarray, factor: int) -> np.ndarray:
+        """downsample by averaging factor x factor blocks (borders not fitting a block are dropped), float32 result."""
+        if factor <= 1: return data.astype(np.float32, copy=False)
+        y, x, c = data.shape
+        ny, nx = y//factor, x//factor
+        blocks : np.ndarray = data[:ny*factor, :nx*factor].reshape(ny, factor, nx, factor, c)
+        return blocks.mean(axis=(1,3), dtype=np.float32)
+
+    # -----------------------------------------------------------------
+    @staticmethod
+    def readThumbnail(fileName : str, maxSize : int = 800) -> Image:
+        """read image from system at thumbnail size (max(height, width) <= maxSize), without decoding full size pixels when possible:
+            - jpg: decoder reduced size mode (DCT scaling), then box filter, 8-bit
+            - hdr: block average
+        """
+        path, name, ext = filenamesplit(fileName)
+        if not os.path.exists(fileName): return Image.read(fileName)
+        if ext == "jpg":
+            with PILImage.open(fileName) as pil:
+                pil.draft('RGB', (maxSize, maxSize))        # DCT scaling: 1/2, 1/4 or 1/8 size, >= maxSize
+                pil = pil.convert('RGB')
+                pil.thumbnail((maxSize, maxSize), PILImage.Resampling.BOX)
+                return Image(np.asarray(pil), ColorSpace.sRGB, False)  # uint8 color data
+        img : Image = Image.read(fileName)
+        return img.buildThumbnail(maxSize)
+
     # -----------------------------------------------------------------
     @staticmethod
     def read(fileName : str) -> Image:
@@ -107,3 +141,17 @@ class Image:
         else:
             img = Image(np.ones((600,800,3))*0.50, ColorSpace.sRGB, False)
         return img
+# ------------------------------------------------------------------------------------------
+def writeThumbnail(fileName : str, thumbnailName : str, maxSize : int = 800) -> str:
+    """read image at thumbnail size and write thumbnail file (function run by thumbnail worker processes).
+
+    @Returns:
+        (str): thumbnailName
+    """
+    thumbnail : Image = Image.readThumbnail(fileName, maxSize)
+    path, name, ext = filenamesplit(thumbnailName)
+    tmpName : str = os.path.join(path, name + f'.{os.getpid()}.tmp.' + ext)
+    thumbnail.write(tmpName)
+    os.replace(tmpName, thumbnailName)          # atomic: readers never see a partial thumbnail
+    return thumbnailName
+# ------------------------------------------------------------------------------------------
@@ -26,7 +26,7 @@ from PyQt6.QtGui import QIntValidator
 from guiQt.AdvanceSliderLine import AdvanceSliderLine
 from guiQt.ChannelSelector import ChannelSelector
 
-from core import colourData, colourSpace
+from core import colourData
 
 # ------------------------------------------------------------------------------------------
 class Contrast(QFrame):
@@ -81,8 +81,7 @@ class Contrast(QFrame):
         self.containerScalingOffsetLayout.addWidget(self.offsetlider)        
 
         ### lightness  
-        lightnessBarLch : np.ndarray = colourData.buildLchcolourData((0,200), (0,0), (180,180), (20,720), width='L', height='c')
-        lightnessBarRGB : np.ndarray = colourSpace.Lch_to_sRGB(lightnessBarLch,apply_cctf_encoding=True, clip=True)
+        lightnessBarRGB : np.ndarray = colourData.buildsRGBcolourData((0,200), (0,0), (180,180), (20,720), width='L', height='c')
         self.lightnessSelector : ChannelSelector = ChannelSelector('lightness',lightnessBarRGB, (0,200),(0,150)) 
 
         ### show selction
@@ -27,7 +27,7 @@ from guiQt.AdvanceSliderLine import AdvanceSliderLine
 
 from numpy import ndarray
 import numpy as np
-from geomdl import BSpline, utilities
+from hdrCore.curve import ToneCurve
 import copy, time
 # ------------------------------------------------------------------------------------------
 # --- class CurveWidget(QSplitter) ---------------------------------------------------------
@@ -54,8 +54,7 @@ class CurveWidget(QFrame):
         self.control = {'start': [0.0, 0.0], 'shadows': [10.0, 10.0], 'blacks': [30.0, 30.0], 'mediums': [50.0, 50.0], 'whites': [70.0, 70.0], 'highlights': [90.0, 90.0], 'end': [100.0, 100.0]}
         self.default = {'start': [0.0, 0.0], 'shadows': [10.0, 10.0], 'blacks': [30.0, 30.0], 'mediums': [50.0, 50.0], 'whites': [70.0, 70.0], 'highlights': [90.0, 90.0], 'end': [100.0, 100.0]}
 
-        self.curve : BSpline.Curve = BSpline.Curve()
-        self.curve.degree = 2
+        self.curve : ToneCurve = ToneCurve.get(self.control)
         self.points : ndarray|None =None
 
         ## widgets
@@ -277,11 +276,9 @@ class CurveWidget(QFrame):
 
     ## evalutae curve
     def evaluate(self : Self) -> None:
-        self.curve.ctrlpts = copy.deepcopy([self.control['start'],self.control['shadows'],self.control['blacks'],self.control['mediums'], self.control['whites'], self.control['highlights'], [200, self.control['end'][1]]])
-        # auto-generate knot vector
-        self.curve.knotvector = utilities.generate_knot_vector(self.curve.degree, len(self.curve.ctrlpts))
-        # evaluate curve and get points
-        self.points = np.asarray(self.curve.evalpts)
+        # shared (cached) tone curve: evaluated once per control points
+        self.curve = ToneCurve.get(self.control)
+        self.points = self.curve.points
 
     ## plotCurve
     def plotCurve(self):
@@ -292,7 +289,7 @@ class CurveWidget(QFrame):
             self.curveWidget.plot(np.asarray([60,60]),np.asarray([0,100]),'r--', clear=False)
             self.curveWidget.plot(np.asarray([80,80]),np.asarray([0,100]),'r--', clear=False)
 
-            controlPointCoordinates= np.asarray(self.curve.ctrlpts)
+            controlPointCoordinates= np.asarray(self.curve.controlPoints)
             self.curveWidget.plot(controlPointCoordinates[1:-1,0],controlPointCoordinates[1:-1,1],'ro', clear=False)
             if isinstance(self.points, ndarray):
                 x = self.points[:,0]
@@ -26,6 +26,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, QLocale
 
 from guiQt.Editor import Editor
 from guiQt.ImageWidget import ImageWidget
+from guiQt.HistogramWidget import HistogramWidget
 
 # ------------------------------------------------------------------------------------------
 # --- class EditorBlock (QSplitter) ------------------------------------------------------
@@ -50,6 +51,7 @@ class EditorBlock(QSplitter):
 
         # attributes
         self.imageWidget : ImageWidget = ImageWidget() 
+        self.histogramWidget : HistogramWidget = HistogramWidget()
         self.edit : Editor = Editor()
         self.edit.highlightChanged.connect(self.onHighlightChanged)
         self.edit.shadowsChanged.connect(self.onShadowsChanged)
@@ -65,14 +67,19 @@ class EditorBlock(QSplitter):
 
         # adding widgets to self (QSplitter)
         self.addWidget(self.imageWidget)
+        self.addWidget(self.histogramWidget)
         self.addWidget(self.edit)
-        self.setSizes([20,80])
+        self.setSizes([20,5,75])
 
     # methods
     ## setImage
     def setImage(self: Self, image: ndarray | None):
         self.imageWidget.setPixmap(image)
 
+    ## setHistograms
+    def setHistograms(self: Self, histograms: dict | None):
+        self.histogramWidget.setHistograms(histograms)
+
         
     def onHighlightChanged(self, value: float) -> None:
         print(f"in EditorBlock: {value}")
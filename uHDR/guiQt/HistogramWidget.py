@@ -0,0 +1,73 @@
+# uHDR: HDR image editing software
+#   Copyright (C) 2022  remi cozot
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+# hdrCore project 2020-2022
+# author: remi.cozot@univ-littoral.fr
+
+# import
+# -----------------------------------------------------------------------------
+from typing_extensions import Self
+from PyQt6.QtWidgets import QWidget, QCheckBox, QHBoxLayout
+from PyQt6.QtGui import QPainter, QPen, QColor, QPolygonF, QPaintEvent
+from PyQt6.QtCore import Qt, QPointF
+import numpy as np
+
+# ------------------------------------------------------------------------------------------
+# --- class HistogramWidget(QWidget) -------------------------------------------------------
+# ------------------------------------------------------------------------------------------
+class HistogramWidget(QWidget):
+    """ draws R, G, B and Y histograms (see app.HistogramService), linear or log space """
+    # class attributes
+    colors : dict[str, QColor] = {'R': QColor(220,60,60), 'G': QColor(60,180,60), 'B': QColor(70,110,230), 'Y': QColor(230,230,230)}
+
+    def __init__(self: Self) -> None:
+        super().__init__()
+        self.setMinimumHeight(80)
+
+        # attributes
+        self.histograms : dict|None = None
+
+        self.logCheckBox : QCheckBox = QCheckBox('log')
+        self.logCheckBox.toggled.connect(self.update)
+
+        layout : QHBoxLayout = QHBoxLayout()
+        layout.addStretch()
+        layout.addWidget(self.logCheckBox, alignment=Qt.AlignmentFlag.AlignTop)
+        self.setLayout(layout)
+
+    # methods
+    # --------------------------------------------------
+    def setHistograms(self: Self, histograms: dict|None) -> None:
+        self.histograms = histograms
+        self.update()
+
+    # --------------------------------------------------
+    def paintEvent(self: Self, event: QPaintEvent) -> None:
+        painter : QPainter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(40,40,40))
+
+        if self.histograms:
+            histograms : dict = self.histograms['log' if self.logCheckBox.isChecked() else 'linear']
+            width, height = self.width(), self.height()
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            # common vertical scale, ignoring first/last bins (clipped values)
+            vmax : float = max(float(np.amax(h.histValue[1:-1])) for h in histograms.values())
+            if vmax <= 0: vmax = 1.0
+            for name, histogram in histograms.items():
+                values : np.ndarray = histogram.histValue
+                x : np.ndarray = np.linspace(0, width, len(values))
+                y : np.ndarray = height*(1.0 - np.minimum(values/vmax, 1.0))
+                painter.setPen(QPen(HistogramWidget.colors[name], 1))
+                painter.drawPolyline(QPolygonF([QPointF(float(u), float(v)) for u, v in zip(x, y)]))
+        painter.end()
+# ------------------------------------------------------------------------------------------
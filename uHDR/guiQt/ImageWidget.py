@@ -55,11 +55,10 @@ class ImageWidget(QWidget):
         height, width , channel  = colorData.shape   
         bytesPerLine = channel * width
 
-        # clip
-        colorData[colorData>1.0] = 1.0
-        colorData[colorData<0.0] = 0.0
+        # clip (not in place: colorData can be read-only or shared with other threads)
+        colorData8 : np.ndarray = (np.clip(colorData, 0.0, 1.0)*255).astype(np.uint8)
 
-        qImg : QImage= QImage(bytes((colorData*255).astype(np.uint8)), width, height, bytesPerLine, QImage.Format.Format_RGB888) # QImage
+        qImg : QImage= QImage(bytes(colorData8), width, height, bytesPerLine, QImage.Format.Format_RGB888) # QImage
         self.imagePixmap : QPixmap = QPixmap.fromImage(qImg)
         self.resize()
 
@@ -24,7 +24,7 @@ from PyQt6.QtGui import QIntValidator
 
 from guiQt.ImageWidget import ImageWidget
 from guiQt.ChannelSelector import ChannelSelector
-from core import colourData, colourSpace
+from core import colourData
 # ------------------------------------------------------------------------------------------
 class LchSelector(QFrame):
     # class attributes
@@ -64,18 +64,15 @@ class LchSelector(QFrame):
         self.containerLayout.addWidget(self.lightnessHue) 
 
         ### hue
-        hueBarLch : np.ndarray = colourData.buildLchcolourData((75,75), (100,100), (0,360+90), (20,720), width='h', height='c')
-        hueBarRGB : np.ndarray = colourSpace.Lch_to_sRGB(hueBarLch,apply_cctf_encoding=True, clip=True)
+        hueBarRGB : np.ndarray = colourData.buildsRGBcolourData((75,75), (100,100), (0,360+90), (20,720), width='h', height='c')
         self.hueSelector : ChannelSelector = ChannelSelector('hue',hueBarRGB, (0,360+90),(0,360+90))   
 
         ### chroma
-        chromaBarLch : np.ndarray = colourData.buildLchcolourData((75,75), (0,100), (180,180), (20,720), width='c', height='L')
-        chromaBarRGB : np.ndarray= colourSpace.Lch_to_sRGB(chromaBarLch,apply_cctf_encoding=True, clip=True)    
+        chromaBarRGB : np.ndarray = colourData.buildsRGBcolourData((75,75), (0,100), (180,180), (20,720), width='c', height='L')
         self.chromaSelector : ChannelSelector = ChannelSelector('chroma',chromaBarRGB, (0,100),(0,100)) 
 
         ### lightness  
-        lightnessBarLch : np.ndarray = colourData.buildLchcolourData((0,200), (0,0), (180,180), (20,720), width='L', height='c')
-        lightnessBarRGB : np.ndarray = colourSpace.Lch_to_sRGB(lightnessBarLch,apply_cctf_encoding=True, clip=True)
+        lightnessBarRGB : np.ndarray = colourData.buildsRGBcolourData((0,200), (0,0), (180,180), (20,720), width='L', height='c')
         self.lightnessSelector : ChannelSelector = ChannelSelector('lightness',lightnessBarRGB, (0,200),(0,150)) 
 
         ### show selction
@@ -119,8 +116,7 @@ class LchSelector(QFrame):
         hue : int  = (hueMin + hueMax)//2
         self.hueRange = (hueMin, hueMax)
         # compute chroma bar
-        chromaBarLch : np.ndarray = colourData.buildLchcolourData((75,75), (0,100), (hue,hue), (20,720), width='c', height='L')
-        chromaBarRGB : np.ndarray= colourSpace.Lch_to_sRGB(chromaBarLch,apply_cctf_encoding=True, clip=True)
+        chromaBarRGB : np.ndarray = colourData.buildsRGBcolourData((75,75), (0,100), (hue,hue), (20,720), width='c', height='L')
         self.chromaSelector.imageWidget.setPixmap(chromaBarRGB)
         self.updateView()
         self.emitSelectionChanged()
@@ -153,10 +149,8 @@ class LchSelector(QFrame):
     # update view
     def updateView(self: Self) -> None:
         # chrmaHue
-        chromaHueLCh : np.ndarray = colourData.buildLchcolourData((75,75), self.chromaRange, self.hueRange, (200,200), width='h', height='c')
-        chromaHueRGB : np.ndarray= colourSpace.Lch_to_sRGB(chromaHueLCh,apply_cctf_encoding=True, clip=True)
+        chromaHueRGB : np.ndarray = colourData.buildsRGBcolourData((75,75), self.chromaRange, self.hueRange, (200,200), width='h', height='c')
         self.chromaHue.setPixmap(chromaHueRGB)
         # chromaLightness
-        chromaLightnessLch : np.ndarray = colourData.buildLchcolourData(self.LightnessRange, self.chromaRange, self.hueRange, (200,200), width='h', height='L')
-        chromaLightnessRGB : np.ndarray= colourSpace.Lch_to_sRGB(chromaLightnessLch,apply_cctf_encoding=True, clip=True)
+        chromaLightnessRGB : np.ndarray = colourData.buildsRGBcolourData(self.LightnessRange, self.chromaRange, self.hueRange, (200,200), width='h', height='L')
         self.lightnessHue.setPixmap(chromaLightnessRGB)
@@ -183,6 +183,9 @@ class MainWindow(QMainWindow):
     def setEditorImage(self: Self, image: ndarray) -> None:
         self.editBlock.setImage(image)
 
+    def setEditorHistograms(self: Self, histograms: dict|None) -> None:
+        self.editBlock.setHistograms(histograms)
+
     ## tags
     def setTagsImage(self: Self, tags: dict[Tuple[str,str], bool]) -> None :
         self.metaBlock.setTags(tags)
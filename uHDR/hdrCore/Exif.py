@@ -16,43 +16,171 @@
 
 # import
 # ------------------------------------------------------------------------------------------
+from __future__ import annotations
 from typing_extensions import Self
-import os, subprocess
+import os, subprocess, shutil, threading, atexit
+from PIL import Image as PILImage, ExifTags
 # ------------------------------------------------------------------------------------------
-# --- class Exif ---------------------------------------------------------------------------
+# --- class ExifTool -----------------------------------------------------------------------
 # ------------------------------------------------------------------------------------------
 debug : bool = True
+class ExifTool:
+    """ long-lived exiftool process (-stay_open argument file protocol): many files per request, no process start per file.
+        one process is shared by the application (see ExifTool.get), requests are serialized.
+    """
+    # class attributes
+    # -----------------------------------------------------------------
+    instance : ExifTool|None = None
+    instanceLock : threading.Lock = threading.Lock()
+    readyMarker : str = '{ready}'
+    fileMarker : str = '======== '
+    messageTags : tuple[str, ...] = ('Error', 'Warning')     # exiftool messages, not tags
+
+    # constructor
+    # -----------------------------------------------------------------
+    def __init__(self: Self, executable: str) -> None:
+        self.lock : threading.Lock = threading.Lock()
+        self.process : subprocess.Popen = subprocess.Popen([executable, '-stay_open', 'True', '-@', '-'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True, encoding='utf-8', errors='replace')
+
+    # static methods
+    # -----------------------------------------------------------------
+    @staticmethod
+    def executable() -> str|None:
+        """exiftool executable: in PATH ('exiftool' or 'exiftool.exe') or in current directory, None if not found."""
+        for name in ('exiftool', 'exiftool.exe'):
+            path : str|None = shutil.which(name)
+            if path: return path
+        return os.path.abspath('exiftool.exe') if os.path.isfile('exiftool.exe') else None
+
+    # -----------------------------------------------------------------
+    @staticmethod
+    def get() -> ExifTool|None:
+        """shared exiftool process (started on first call), None if exiftool is not installed."""
+        with ExifTool.instanceLock:
+            if ExifTool.instance is None or ExifTool.instance.process.poll() is not None:
+                executable : str|None = ExifTool.executable()
+                if executable is None: return None
+                try:
+                    ExifTool.instance = ExifTool(executable)
+                    atexit.register(ExifTool.instance.close)
+                except OSError as e:
+                    print(f'ERROR: ExifTool.get(): can not start exiftool ({e})')
+                    return None
+            return ExifTool.instance
+
+    # methods
+    # -----------------------------------------------------------------
+    def execute(self: Self, args: list[str]) -> str:
+        """run exiftool command (arguments) in exiftool process, returns output."""
+        with self.lock:
+            self.process.stdin.write('\n'.join(args) + '\n-execute\n')
+            self.process.stdin.flush()
+            lines : list[str] = []
+            while True:
+                line : str = self.process.stdout.readline()
+                if line == '': raise OSError('exiftool process terminated')
+                if line.rstrip() == ExifTool.readyMarker: break
+                lines.append(line)
+        return ''.join(lines)
+
+    # -----------------------------------------------------------------
+    def readMany(self: Self, files: list[str]) -> dict[str, dict[str,str]]:
+        """exif of many files in one request: file -> {tag: value} (exiftool -a text output)."""
+        res : dict[str, dict[str,str]] = {file: {} for file in files}
+        if not files: return res
+        # relative paths prefixed with './': a file name starting with '-' is not read as an option
+        args : dict[str, str] = {file: file if os.path.isabs(file) else os.path.join('.', file) for file in files}
+        output : str = self.execute(['-a', '-charset', 'filename=utf8'] + list(args.values()))
+
+        # one file: no file header, several files: '======== file' before tags of each file
+        current : dict[str,str]|None = res[files[0]] if len(files) == 1 else None
+        names : dict[str, str] = {os.path.normpath(arg): file for file, arg in args.items()}
+        for line in output.splitlines():
+            if line.startswith(ExifTool.fileMarker):
+                current = res.setdefault(names.get(os.path.normpath(line[len(ExifTool.fileMarker):].strip()), line), {})
+            elif (current is not None) and (':' in line):
+                tag, val = line.split(':', 1)   # tags and values are separated by a colon
+                if tag.strip() in ExifTool.messageTags: continue
+                current[tag.strip()] = val.strip()
+        return res
+
+    # -----------------------------------------------------------------
+    def close(self: Self) -> None:
+        """stop exiftool process."""
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write('-stay_open\nFalse\n')
+                self.process.stdin.flush()
+                self.process.wait(timeout=5)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                self.process.kill()
+# ------------------------------------------------------------------------------------------
+# --- class Exif ---------------------------------------------------------------------------
+# ------------------------------------------------------------------------------------------
 class Exif:    
     @staticmethod
     def readExif(imagePath: str ,filename: str) -> dict[str,str]|None:
         """ returns a dict containing exif data.
         """
-        exifDict = {}
         file : str = os.path.join(imagePath, filename)
 
         if debug : print(f'EXif.readExif({imagePath},{filename}) -> {file}')
 
-        if os.path.isfile(file): # check if filename exists
-            if os.path.isfile('exiftool.exe'):# reading metadata with exiftool
-                try:
-                    exifdata : str = subprocess.check_output(['exiftool.exe','-a',file],
-                        shell=True, universal_newlines=True,
-                        stdin=subprocess.PIPE, stderr=subprocess.PIPE)
-                    exifdataLines :list[str] = exifdata.splitlines()
-                except:
-                    print("ERROR: Exif.readExif(",filename,"): error while reading!")
-                    exifdataLines : list[str]= ['']
-                # buid exif dict
-                for each in exifdataLines:
-                    tag,val = each.split(':',1)# tags and values are separated by a semi colon
-                    exifDict[tag.strip()] = val.strip()
-            else: print("ERROR: exiftool.exe not found!")
-
-        else: print("ERROR: Exif.readExif(",filename,"): file not found!")
+        if not os.path.isfile(file): # check if filename exists
+            print("ERROR: Exif.readExif(",filename,"): file not found!")
+            return {}
+        return Exif.readExifMany(imagePath, [filename])[filename]
 
+    @staticmethod
+    def readExifMany(imagePath: str, filenames: list[str]) -> dict[str, dict[str,str]]:
+        """ returns exif data of many files: filename -> dict containing exif data.
+            one request to exiftool process (see ExifTool), headers read with PIL if exiftool is not installed.
+        """
+        files : dict[str, str] = {filename: os.path.join(imagePath, filename) for filename in filenames if os.path.isfile(os.path.join(imagePath, filename))}
+        res : dict[str, dict[str,str]] = {filename: {} for filename in filenames}
+
+        exiftool : ExifTool|None = ExifTool.get()
+        if exiftool is not None:
+            try:
+                exifs : dict[str, dict[str,str]] = exiftool.readMany(list(files.values()))
+                for filename, file in files.items(): res[filename] = exifs.get(file, {})
+                return res
+            except OSError as e:
+                print(f"ERROR: Exif.readExifMany(): error while reading with exiftool ({e}), degraded mode!")
+
+        for filename, file in files.items(): res[filename] = Exif.readHeader(file)
+        return res
+
+    @staticmethod
+    def readHeader(file: str) -> dict[str,str]:
+        """ degraded mode (exiftool not installed): exif from image header, pixels are not decoded.
+            tags are named as exiftool tags: 'File Name', 'Image Width', 'Image Height', 'Color Space', 'Bits Per Sample', ...
+        """
+        exifDict : dict[str,str] = {'File Name': os.path.basename(file)}
+        try:
+            if file.lower().endswith('.hdr'):
+                # radiance header: lines until empty line, then resolution line: '-Y height +X width'
+                with open(file, 'rb') as f:
+                    line : bytes = f.readline()
+                    while line.strip(): line = f.readline()
+                    resolution : list[str] = f.readline().decode('ascii').split()
+                exifDict['Image Height'] = resolution[1]
+                exifDict['Image Width'] = resolution[3]
+            else:
+                with PILImage.open(file) as img:
+                    exifDict['Image Width'], exifDict['Image Height'] = str(img.width), str(img.height)
+                    exif : PILImage.Exif = img.getexif()
+                    for tag, val in list(exif.items()) + list(exif.get_ifd(ExifTags.IFD.Exif).items()):
+                        name : str = ExifTags.TAGS.get(tag, str(tag))
+                        # exiftool names: 'ExposureTime' -> 'Exposure Time'
+                        exifDict[''.join(' '+c if c.isupper() and i > 0 and not name[i-1].isupper() else c for i, c in enumerate(name))] = str(val)
+                    if exifDict.get('Color Space', None) == '1': exifDict['Color Space'] = 'sRGB'
+        except (OSError, ValueError, IndexError, UnicodeDecodeError) as e:
+            print(f"ERROR: Exif.readHeader({file}): {e}")
         return exifDict
-        
-        
+
     @staticmethod
     def recoverExifData(exif : dict[str, str]) -> dict[str, str]:
         """ filter raw dict to recover some data:
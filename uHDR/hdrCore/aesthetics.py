@@ -23,7 +23,7 @@ package hdrCore consists of the core classes for HDR imaging.
 
 # --- Import ------------------------------------------------------------------
 # -----------------------------------------------------------------------------
-import copy, colour, skimage.transform, math, os
+import copy, colour, skimage.transform, math, os, threading
 import sklearn.cluster, skimage.transform
 import numpy as np
 import functools
@@ -59,6 +59,10 @@ class Palette(ImageAestheticsModel):
                         sorted according to distance to black (in the palette colorSpace)
             type (image.imageType): image type (SDR|HDR)
 
+        Class Attributes:
+            nbSamples (int): number of pixels sampled by 'kmean-Lab-fast' method
+            seed (int): seed of pixel sampling and k-means ('kmean-Lab-fast' method), fixed: same image gives same palette
+
         Methods:
             createImageOfPalette
             __repr__
@@ -66,7 +70,11 @@ class Palette(ImageAestheticsModel):
 
         Static methods:
             build
+            samples
     """    
+    nbSamples = 16384
+    seed = 0
+
     # constructor
     def __init__(self, name, colors, colorSpace, type):
         """
@@ -86,7 +94,8 @@ class Palette(ImageAestheticsModel):
             Args:
                 processpipe (hdrCore.processing.ProcessPipe, Required): processpipe
                 nbColors (int, Optionnal): number of colors in the palette (5 default values)
-                method (str, Optionnal): 'kmean-Lab' (default value)
+                method (str, Optionnal): 'kmean-Lab' (default value): k-means on all pixels
+                    'kmean-Lab-fast': mini-batch k-means on stratified pixel samples (see Palette.nbSamples, Palette.seed)
                 processIdx (int, Optionnal): set the process after wihich computation of color palette is done
                 default= -1 at the end of editing
                 kwargs (dict, Otionnal): supplemental parameters according to method
@@ -98,7 +107,7 @@ class Palette(ImageAestheticsModel):
         image_ = processpipe.processNodes[processId].outputImage
 
         # according to method
-        if method == 'kmean-Lab':
+        if method in ['kmean-Lab', 'kmean-Lab-fast']:
             # taking into acount supplemental parameters of 'kmean-Lab'
             #  'removeblack' : bool
             defaultParams = {'removeBlack': True}
@@ -108,14 +117,24 @@ class Palette(ImageAestheticsModel):
             # get image according to processId
             image_ = processpipe.processNodes[processId].outputImage
 
+            if method == 'kmean-Lab-fast':
+                # stratified samples only are converted and clustered
+                nbSamples = kwargs['nbSamples'] if 'nbSamples' in kwargs else Palette.nbSamples
+                samples = image_.copy()
+                samples.colorData = Palette.samples(image_.colorData, nbSamples)
+                samples.shape = samples.colorData.shape
+                KMeans = functools.partial(sklearn.cluster.MiniBatchKMeans, random_state=Palette.seed, batch_size=2048, n_init=3)
+            else:
+                samples = image_
+                KMeans = sklearn.cluster.KMeans
 
             # to Lab then to Vector
-            imageLab = processing.ColorSpaceTransform().compute(image_,dest='Lab')
+            imageLab = processing.ColorSpaceTransform().compute(samples,dest='Lab')
             imgLabDataVector = utils.ndarray2vector(imageLab.colorData)
 
             if removeBlack:
                 # k-means: nb cluster = nbColors + 1
-                kmeans_cluster_Lab = sklearn.cluster.KMeans(n_clusters=nbColors+1)
+                kmeans_cluster_Lab = KMeans(n_clusters=nbColors+1)
                 kmeans_cluster_Lab.fit(imgLabDataVector)
 
                 cluster_centers_Lab = kmeans_cluster_Lab.cluster_centers_
@@ -126,7 +145,7 @@ class Palette(ImageAestheticsModel):
 
             else:
                 # k-means: nb cluster = nbColors
-                kmeans_cluster_Lab = sklearn.cluster.KMeans(n_clusters=nbColors)
+                kmeans_cluster_Lab = KMeans(n_clusters=nbColors)
                 kmeans_cluster_Lab.fit(imgLabDataVector)
                 cluster_centers_Lab = kmeans_cluster_Lab.cluster_centers_
 
@@ -135,6 +154,27 @@ class Palette(ImageAestheticsModel):
 
         return Palette('Palette_'+image_.name,colors, image.ColorSpace.Lab(), image_.type)
 
+    @staticmethod
+    def samples(colorData, nbSamples):
+        """samples: stratified sampling of pixels, one pixel at random position (Palette.seed) in each cell of a regular grid
+
+            Args:
+                colorData (numpy.ndarray, Required): h x w x 3 color data
+                nbSamples (int, Required): approximative number of samples
+
+            Returns:
+                (numpy.ndarray): rows x cols x 3 sampled pixels
+        """
+        height, width = colorData.shape[0], colorData.shape[1]
+        step = max(1, int(math.sqrt(height*width/nbSamples)))
+        if step == 1: return colorData
+
+        rng = np.random.default_rng(Palette.seed)
+        rows, cols = np.arange(0, height, step), np.arange(0, width, step)
+        y = np.minimum(rows[:,np.newaxis] + rng.integers(0, step, size=(len(rows), len(cols))), height-1)
+        x = np.minimum(cols[np.newaxis,:] + rng.integers(0, step, size=(len(rows), len(cols))), width-1)
+        return colorData[y, x]
+
     def createImageOfPalette(self, colorWidth=100):
         """
         """
@@ -184,24 +224,69 @@ class MultidimensionalImageAestheticsModel():
             1 - color palette
             2 - composition convex hull 
             3 - composition strength lines
-    
+
+        models are cached per process pipe state (input image and parameters, see pipeKey): build does nothing
+        when the model of key is up to date, buildAsync computes it in a background thread (editing is not blocked).
+
+        Methods:
+            add
+            get
+            isUpToDate
+            pipeKey
+            build
+            buildAsync
     """
     def __init__(self, processpipe):
         self.processpipe = processpipe
         self.processPipeChanged = True
         self.imageAestheticsModels = {}
+        self.modelKeys = {}                 # key -> pipeKey of model
+        self.lock = threading.Lock()
 
-    def add(self, key, imageAestheticsModel):
-        self.imageAestheticsModels[key] = imageAestheticsModel
+    def add(self, key, imageAestheticsModel, pipeKey=None):
+        with self.lock:
+            self.imageAestheticsModels[key] = imageAestheticsModel
+            self.modelKeys[key] = pipeKey
 
     def get(self, key):
         iam = None
         if key in self.imageAestheticsModels: iam = self.imageAestheticsModels[key]
         return iam
 
-    def build(self, key, builder, processpipe):
-        if not isintance(key,list):
+    def pipeKey(self):
+        """pipeKey: process pipe state (input image version, parameters)"""
+        inputImage = self.processpipe.getInputImage()
+        return (inputImage.dataVersion if inputImage is not None else None, repr(self.processpipe.toDict()))
+
+    def isUpToDate(self, key):
+        return (key in self.modelKeys) and (self.modelKeys[key] == self.pipeKey())
+
+    def build(self, key, builder, processpipe=None, **kwargs):
+        """build: build models of key(s) with builder(s) (ImageAestheticsModel subclass), kwargs are sent to builder.build"""
+        if processpipe is not None: self.processpipe = processpipe
+        if not isinstance(key,list):
             key, builder = [key],[builder]
-        for k in key:
-            self.add(k,builder.build(processpipe))
+        pipeKey = self.pipeKey()
+        for k, b in zip(key, builder):
+            if self.modelKeys.get(k, None) != pipeKey: self.add(k, b.build(self.processpipe, **kwargs), pipeKey)
+
+    def buildAsync(self, key, builder, callback=None, **kwargs):
+        """buildAsync: build in a background thread, callback(key, model) is called (from background thread) when done.
+            models of an outdated process pipe state are dropped.
+
+        Returns:
+            (threading.Thread|None): None if model is up to date
+        """
+        pipeKey = self.pipeKey()
+        if self.modelKeys.get(key, None) == pipeKey: return None
+
+        def run():
+            model = builder.build(self.processpipe, **kwargs)
+            if self.pipeKey() != pipeKey: return
+            self.add(key, model, pipeKey)
+            if callback: callback(key, model)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
 # -----------------------------------------------------------------------------
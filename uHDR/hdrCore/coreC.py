@@ -25,17 +25,80 @@ package hdrCore consists of the core classes for HDR imaging.
 # -----------------------------------------------------------------------------
 # --- Import ------------------------------------------------------------------
 # -----------------------------------------------------------------------------
-import ctypes, copy
+import ctypes, copy, os
 import numpy as np
-import hdrCore.image, hdrCore.processing, hdrCore.utils
-import preferences.Prefs as pref
+import hdrCore.image, hdrCore.processing, hdrCore.utils, hdrCore.numbafun
+from preferences.Prefs import Prefs as pref
+
+# -----------------------------------------------------------------------------
+# --- coreCparameters ---------------------------------------------------------
+# -----------------------------------------------------------------------------
+dllPath = './HDRip.dll'
+maxLCSize = 600         # sub-sampled grid size used to estimate color editors max lightness and chroma
+
+def coreCparameters(processPipe):
+    """extract fixed process pipe parameters (shared by C++ and numba computation)
+        process nodes are found by name (trailing digits ignored, see ProcessPipe.fromDict), inactive process nodes
+        and missing ones are identities: default parameters.
+
+        Args:
+            processPipe (hdrCore.processing.ProcessPipe, Required): process pipe, must be fusable (see ProcessPipe.isFusable)
+                
+        Returns:
+            (dict): parameters
+                'exposure': float, 'contrast': float, 'tonecurve': dict, 'lightnessmask': list[bool](5), 'saturation': float,
+                'colorEditors': list[list[float]](5 x 11), 'colorEditorsMask': list[bool](5)
+
+        Raises:
+            ValueError: process pipe is not fusable
+    """
+    defaultToneCurve = {'start':[0,0], 'shadows': [10,10], 'blacks': [30,30], 'mediums': [50,50], 'whites': [70,70], 'highlights': [90,90], 'end': [100,100]}
+    maskKeys = ['shadows', 'blacks', 'mediums', 'whites', 'highlights']
+
+    with processPipe.lock:
+        if not processPipe.isFusable():
+            raise ValueError('coreCparameters: process pipe can not be fused (see ProcessPipe.isFusable): '+str([node.name for node in processPipe.processNodes]))
+
+        nodes, editors = {}, []
+        for node in processPipe.processNodes:
+            if not processPipe.isActive(node): continue
+            name = node.name.rstrip('0123456789')
+            if name == 'colorEditor': editors.append(copy.deepcopy(node.params))
+            else: nodes[name] = copy.deepcopy(node.params)
+
+    colorEditors, colorEditorsMask = [], []
+    for i in range(5):
+        ce = editors[i] if i < len(editors) else {}
+        sel = ce.get('selection', {})
+        edit = ce.get('edit', {})
+        lightness = sel.get('lightness', (0,100))
+        chroma = sel.get('chroma', (0,100))
+        hue = sel.get('hue', (0,360))
+        colorEditors.append([lightness[0], lightness[1], chroma[0], chroma[1], hue[0], hue[1],
+                             ce.get('tolerance', 0.1),
+                             edit.get('hue', 0.0), edit.get('exposure', 0.0), edit.get('contrast', 0.0), edit.get('saturation', 0.0)])
+        colorEditorsMask.append(bool(ce.get('mask', False)))
+
+    lightnessMask = nodes.get('lightnessmask', {})
+
+    return {'exposure': nodes.get('exposure', {}).get('EV', 0.0),
+            'contrast': nodes.get('contrast', {}).get('contrast', 0.0),
+            'tonecurve': nodes.get('tonecurve') or defaultToneCurve,
+            'lightnessmask': [bool(lightnessMask.get(key, False)) for key in maskKeys],
+            'saturation': nodes.get('saturation', {}).get('saturation', 0.0),
+            'colorEditors': colorEditors,
+            'colorEditorsMask': colorEditorsMask}
 
 # -----------------------------------------------------------------------------
 # --- coreCcompute ------------------------------------------------------------
 # -----------------------------------------------------------------------------
 
 def coreCcompute(img, processPipe):
-    """compute image process-pipe in C++ (fast computation), fixed process pipe architecture: (1) exposure, (2) contrast, (3) tone-curve, (4)saturation, (5-10) 5 color editors)
+    """compute image process-pipe in a single pass (fast computation), fixed process pipe architecture: (1) exposure, (2) contrast, (3) tone-curve, (4)saturation, (5-10) 5 color editors)
+        the process pipe must be fusable (see ProcessPipe.isFusable), ProcessPipe.compute and ProcessPipe.export fall back to process nodes otherwise.
+
+    The numba fused kernel is used when pref.computation is 'numba' or when HDRip.dll is not available (non Windows platform),
+    otherwise the C++ library is used.
 
         Args:
             img (hdrCore.image.Image, Required): image
@@ -46,108 +109,86 @@ def coreCcompute(img, processPipe):
     """
     if pref.verbose:  print(f"[hdrCore] >> coreCcompute({img})") 
 
-    ppDict = processPipe.toDict()
-
-    exposure = ppDict[0]['exposure']['EV']
-
-    contrast = ppDict[1]['contrast']['contrast']
-
-    tonecurveS = ppDict[2]['tonecurve']['shadows'][1]
-    tonecurveB = ppDict[2]['tonecurve']['blacks'][1]
-    tonecurveM = ppDict[2]['tonecurve']['mediums'][1]
-    tonecurveW = ppDict[2]['tonecurve']['whites'][1]
-    tonecurveH = ppDict[2]['tonecurve']['highlights'][1]
-
-    lightnessMaskS = ppDict[3]['lightnessmask']['shadows']
-    lightnessMaskB = ppDict[3]['lightnessmask']['blacks']
-    lightnessMaskM = ppDict[3]['lightnessmask']['mediums']
-    lightnessMaskW = ppDict[3]['lightnessmask']['whites']
-    lightnessMaskH = ppDict[3]['lightnessmask']['highlights']
-
-    saturation = ppDict[4]['saturation']['saturation']
-
-    ce1_sel_lightness = ppDict[5]['colorEditor0']['selection']['lightness']
-    ce1_sel_chroma = ppDict[5]['colorEditor0']['selection']['chroma']
-    ce1_sel_hue = ppDict[5]['colorEditor0']['selection']['hue'] 
-    ce1_tolerance = 0.1
-    ce1_edit_hue = ppDict[5]['colorEditor0']['edit']['hue'] if 'hue' in ppDict[5]['colorEditor0']['edit'] else 0.0
-    ce1_edit_exposure = ppDict[5]['colorEditor0']['edit']['exposure']
-    ce1_edit_contrast = ppDict[5]['colorEditor0']['edit']['contrast']
-    ce1_edit_saturation = ppDict[5]['colorEditor0']['edit']['saturation']
-    ce1_mask = ppDict[5]['colorEditor0']['mask']
-
-    ce2_sel_lightness = ppDict[6]['colorEditor1']['selection']['lightness']
-    ce2_sel_chroma = ppDict[6]['colorEditor1']['selection']['chroma']
-    ce2_sel_hue = ppDict[6]['colorEditor1']['selection']['hue']
-    ce2_tolerance = 0.1
-    ce2_edit_hue = ppDict[6]['colorEditor1']['edit']['hue'] if 'hue' in ppDict[6]['colorEditor1']['edit'] else 0.0
-    ce2_edit_exposure = ppDict[6]['colorEditor1']['edit']['exposure']
-    ce2_edit_contrast = ppDict[6]['colorEditor1']['edit']['contrast']
-    ce2_edit_saturation = ppDict[6]['colorEditor1']['edit']['saturation']
-    ce2_mask = ppDict[6]['colorEditor1']['mask']
-
-    ce3_sel_lightness = ppDict[7]['colorEditor2']['selection']['lightness']
-    ce3_sel_chroma = ppDict[7]['colorEditor2']['selection']['chroma']
-    ce3_sel_hue = ppDict[7]['colorEditor2']['selection']['hue']
-    ce3_tolerance = 0.1
-    ce3_edit_hue = ppDict[7]['colorEditor2']['edit']['hue'] if 'hue' in ppDict[7]['colorEditor2']['edit'] else 0.0
-    ce3_edit_exposure = ppDict[7]['colorEditor2']['edit']['exposure']
-    ce3_edit_contrast = ppDict[7]['colorEditor2']['edit']['contrast']
-    ce3_edit_saturation = ppDict[7]['colorEditor2']['edit']['saturation']
-    ce3_mask = ppDict[7]['colorEditor2']['mask']
-
-    ce4_sel_lightness = ppDict[8]['colorEditor3']['selection']['lightness']
-    ce4_sel_chroma = ppDict[8]['colorEditor3']['selection']['chroma']
-    ce4_sel_hue = ppDict[8]['colorEditor3']['selection']['hue']
-    ce4_tolerance = 0.1
-    ce4_edit_hue = ppDict[8]['colorEditor3']['edit']['hue'] if 'hue' in ppDict[8]['colorEditor3']['edit'] else 0.0
-    ce4_edit_exposure = ppDict[8]['colorEditor3']['edit']['exposure']
-    ce4_edit_contrast = ppDict[8]['colorEditor3']['edit']['contrast']
-    ce4_edit_saturation = ppDict[8]['colorEditor3']['edit']['saturation']
-    ce4_mask = ppDict[8]['colorEditor3']['mask']
-
-    ce5_sel_lightness = ppDict[9]['colorEditor4']['selection']['lightness']
-    ce5_sel_chroma = ppDict[9]['colorEditor4']['selection']['chroma']
-    ce5_sel_hue = ppDict[9]['colorEditor4']['selection']['hue']
-    ce5_tolerance = 0.1
-    ce5_edit_hue = ppDict[9]['colorEditor4']['edit']['hue'] if 'hue' in ppDict[9]['colorEditor4']['edit'] else 0.0
-    ce5_edit_exposure = ppDict[9]['colorEditor4']['edit']['exposure']
-    ce5_edit_contrast = ppDict[9]['colorEditor4']['edit']['contrast']
-    ce5_edit_saturation = ppDict[9]['colorEditor4']['edit']['saturation']
-    ce5_mask = ppDict[9]['colorEditor4']['mask']
-
-
-
-    mylib = ctypes.cdll.LoadLibrary('./HDRip.dll')
+    params = coreCparameters(processPipe)
+
+    if pref.computation == 'numba' or not (os.name == 'nt' and os.path.isfile(dllPath)):
+        img.colorData = numbaCompute(img.colorData, img.linear, params)
+        img.linear = True
+    else:
+        img.colorData = copy.deepcopy(dllCompute(np.ascontiguousarray(img.colorData, dtype=np.float32), params))
+
+    return img
+
+# -----------------------------------------------------------------------------
+def numbaCompute(colorData, linear, params):
+    """compute fixed process pipe with hdrCore.numbafun.numba_full_process_5CO
+
+        Args:
+            colorData (numpy.ndarray, Required): sRGB color data
+            linear (bool, Required): True if colorData is linear
+            params (dict, Required): parameters (see coreCparameters)
+                
+        Returns:
+            (numpy.ndarray): linear sRGB color data (float32)
+    """
+    defaultToneCurve = {'start':[0,0], 'shadows': [10,10], 'blacks': [30,30], 'mediums': [50,50], 'whites': [70,70], 'highlights': [90,90], 'end': [100,100]}
+    if params['tonecurve'] != defaultToneCurve:
+        curveX, curveY = hdrCore.processing.Ycurve.curvePoints(params['tonecurve'])
+    else:
+        curveX, curveY = np.zeros(0), np.zeros(0)
+
+    colorData = np.ascontiguousarray(colorData)
+    stages = (bool(linear),
+              float(params['exposure']),
+              float(params['contrast']),
+              np.ascontiguousarray(curveX, dtype=np.float64), np.ascontiguousarray(curveY, dtype=np.float64),
+              np.asarray(params['lightnessmask'], dtype=np.bool_),
+              float(params['saturation']))
+    colorEditors = np.asarray(params['colorEditors'], dtype=np.float64)
+    colorEditorsMask = np.asarray(params['colorEditorsMask'], dtype=np.bool_)
+
+    # max lightness and chroma at each color editor input (color editor selection scaling) estimated on a sub-sampled grid
+    maxLC = np.zeros((5,2))
+    if colorEditorsMask.any() or np.any(colorEditors[:,7:] != 0):
+        step = max(1, max(colorData.shape[0], colorData.shape[1])//maxLCSize)
+        maxLC = hdrCore.numbafun.numba_maxLC_5CO(colorData, *stages, colorEditors, colorEditorsMask, 
+                                                 hdrCore.numbafun.M_sRGB_to_XYZ, hdrCore.numbafun.M_XYZ_to_sRGB, hdrCore.numbafun.Lab_whitepoint, step)
+
+    return hdrCore.numbafun.numba_full_process_5CO(colorData, *stages, colorEditors, colorEditorsMask, maxLC,
+                                                   hdrCore.numbafun.M_sRGB_to_XYZ, hdrCore.numbafun.M_XYZ_to_sRGB, hdrCore.numbafun.Lab_whitepoint)
+
+# -----------------------------------------------------------------------------
+def dllCompute(colorData, params):
+    """compute fixed process pipe with HDRip.dll full_process_5CO (Windows only)
+
+        Args:
+            colorData (numpy.ndarray, Required): sRGB color data (float32)
+            params (dict, Required): parameters (see coreCparameters)
+                
+        Returns:
+            (numpy.ndarray): sRGB color data
+    """
+    tonecurve = params['tonecurve']
+    ce = params['colorEditors']
+    ceMask = params['colorEditorsMask']
+
+    mylib = ctypes.cdll.LoadLibrary(dllPath)
     mylib.full_process_5CO.argtypes = [np.ctypeslib.ndpointer(dtype=ctypes.c_float), ctypes.c_uint, ctypes.c_uint,
                                     ctypes.c_float,
                                     ctypes.c_float,
                                     ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float,
                                     ctypes.c_bool, ctypes.c_bool, ctypes.c_bool, ctypes.c_bool, ctypes.c_bool,
-                                    ctypes.c_float,
-                                    ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_bool,
-                                    ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_bool,
-                                    ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_bool,
-                                    ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_bool,
-                                    ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_float, ctypes.c_bool
-    ]
-    mylib.full_process_5CO.restype = np.ctypeslib.ndpointer(dtype=ctypes.c_float, shape=(img.colorData.shape[0],img.colorData.shape[1],3))
-
-    resDLL = mylib.full_process_5CO(img.colorData,
-                                img.colorData.shape[1],
-                                img.colorData.shape[0],
-                                exposure,
-                                contrast,
-                                tonecurveS, tonecurveB, tonecurveM, tonecurveW, tonecurveH,
-                                lightnessMaskS, lightnessMaskB, lightnessMaskM, lightnessMaskW, lightnessMaskH,
-                                saturation,
-                                ce1_sel_lightness[0], ce1_sel_lightness[1], ce1_sel_chroma[0], ce1_sel_chroma[1], ce1_sel_hue[0], ce1_sel_hue[1], ce1_tolerance, ce1_edit_hue, ce1_edit_exposure, ce1_edit_contrast, ce1_edit_saturation, ce1_mask,
-                                ce2_sel_lightness[0], ce2_sel_lightness[1], ce2_sel_chroma[0], ce2_sel_chroma[1], ce2_sel_hue[0], ce2_sel_hue[1], ce2_tolerance, ce2_edit_hue, ce2_edit_exposure, ce2_edit_contrast, ce2_edit_saturation, ce2_mask,
-                                ce3_sel_lightness[0], ce3_sel_lightness[1], ce3_sel_chroma[0], ce3_sel_chroma[1], ce3_sel_hue[0], ce3_sel_hue[1], ce3_tolerance, ce3_edit_hue, ce3_edit_exposure, ce3_edit_contrast, ce3_edit_saturation, ce3_mask,
-                                ce4_sel_lightness[0], ce4_sel_lightness[1], ce4_sel_chroma[0], ce4_sel_chroma[1], ce4_sel_hue[0], ce4_sel_hue[1], ce4_tolerance, ce4_edit_hue, ce4_edit_exposure, ce4_edit_contrast, ce4_edit_saturation, ce4_mask,
-                                ce5_sel_lightness[0], ce5_sel_lightness[1], ce5_sel_chroma[0], ce5_sel_chroma[1], ce5_sel_hue[0], ce5_sel_hue[1], ce5_tolerance, ce5_edit_hue, ce5_edit_exposure, ce5_edit_contrast, ce5_edit_saturation, ce5_mask
-                                )
-
-    img.colorData = copy.deepcopy(resDLL)
-
-    return img
+                                    ctypes.c_float] + 5*([ctypes.c_float]*11 + [ctypes.c_bool])
+    mylib.full_process_5CO.restype = np.ctypeslib.ndpointer(dtype=ctypes.c_float, shape=(colorData.shape[0],colorData.shape[1],3))
+
+    args = [colorData,
+            colorData.shape[1],
+            colorData.shape[0],
+            params['exposure'],
+            params['contrast'],
+            tonecurve['shadows'][1], tonecurve['blacks'][1], tonecurve['mediums'][1], tonecurve['whites'][1], tonecurve['highlights'][1],
+            *params['lightnessmask'],
+            params['saturation']]
+    for i in range(5): args += ce[i] + [ceMask[i]]
+
+    return mylib.full_process_5CO(*args)
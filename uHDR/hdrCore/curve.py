@@ -0,0 +1,115 @@
+# uHDR: HDR image editing software
+#   Copyright (C) 2021  remi cozot
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+# hdrCore project 2020
+# author: remi.cozot@univ-littoral.fr
+
+# -----------------------------------------------------------------------------
+# --- Package hdrCore ---------------------------------------------------------
+# -----------------------------------------------------------------------------
+"""
+package hdrCore consists of the core classes for HDR imaging.
+"""
+
+# -----------------------------------------------------------------------------
+# --- Import ------------------------------------------------------------------
+# -----------------------------------------------------------------------------
+import functools
+import numpy as np
+from geomdl import BSpline
+from geomdl import utilities
+
+# -----------------------------------------------------------------------------
+# --- Class ToneCurve ---------------------------------------------------------
+# -----------------------------------------------------------------------------
+class ToneCurve(object):
+    """
+    class ToneCurve: B-spline tone curve (degree 2) shared by processing.Ycurve and guiQt.CurveWidget
+        the curve is evaluated once into a dense 1D LUT, recent curves are cached (see ToneCurve.get).
+
+    Attributes:
+        controlPoints (list[list[float]]): start, shadows, blacks, mediums, whites, highlights, extended end [200, end]
+        points (numpy.ndarray): evaluated curve points (x, y in [0,100] scale)
+        lut (numpy.ndarray): f(Y) sampled on [0, lutRange] (Y in [0,1] scale)
+
+    Class Attributes:
+        keys (list[str]): control points names
+        lutSize (int): number of LUT samples
+        lutRange (float): Y range of LUT (extended end x / 100)
+        cacheSize (int): number of cached curves
+
+    Methods:
+        apply               (numpy.ndarray) apply curve to luminance
+
+    Static methods:
+        get                 (ToneCurve) cached tone curve from control points dict
+    """
+    keys =      ['start', 'shadows', 'blacks', 'mediums', 'whites', 'highlights', 'end']
+    lutSize =   4096
+    lutRange =  2.0
+    cacheSize = 32
+
+    def __init__(self, controlPoints):
+        """
+        Args:
+            controlPoints (dict, Required): control points [x,y] in [0,100]
+                'start', 'shadows', 'blacks', 'mediums', 'whites', 'highlights', 'end'
+        """
+        # change for multi-threading computation
+        # Ymax =          np.amax(colorDataY)*100
+        # extendedEnd =   [Ymax, kwargs['end'][1]]
+        extendedEnd =   [100*ToneCurve.lutRange, controlPoints['end'][1]]
+        self.controlPoints = [list(controlPoints[key]) for key in ToneCurve.keys[:-1]] + [extendedEnd]
+
+        # create curve and evaluate points
+        curve =             BSpline.Curve()
+        curve.degree =      2
+        curve.ctrlpts =     self.controlPoints
+        curve.knotvector =  utilities.generate_knot_vector(curve.degree, len(curve.ctrlpts))
+        self.points = np.asarray(curve.evalpts)
+        self.points.flags.writeable = False
+
+        # dense LUT
+        self.lut = np.interp(np.linspace(0.0, ToneCurve.lutRange, ToneCurve.lutSize), self.points[:,0]/100, self.points[:,1]/100)
+        self.lut.flags.writeable = False
+
+    def apply(self, Y):
+        """apply curve to luminance (linear interpolation in LUT, Y clamped to [0, lutRange])
+
+        Args:
+            Y (numpy.ndarray, Required): luminance in [0,1] scale
+
+        Returns:
+            (numpy.ndarray): f(Y)
+        """
+        x = np.clip(Y, 0.0, ToneCurve.lutRange)*((ToneCurve.lutSize - 1)/ToneCurve.lutRange)
+        i = np.minimum(x.astype(np.int32), ToneCurve.lutSize - 2)
+        f = x - i
+        return self.lut[i]*(1 - f) + self.lut[i + 1]*f
+
+    @staticmethod
+    def get(controlPoints):
+        """get: tone curve from control points (cached: the B-spline is evaluated once per control points)
+
+        Args:
+            controlPoints (dict, Required): control points [x,y] in [0,100]
+                'start', 'shadows', 'blacks', 'mediums', 'whites', 'highlights', 'end'
+
+        Returns:
+            (ToneCurve)
+        """
+        return _cachedToneCurve(tuple(tuple(float(v) for v in controlPoints[key]) for key in ToneCurve.keys))
+# -----------------------------------------------------------------------------
+@functools.lru_cache(maxsize=ToneCurve.cacheSize)
+def _cachedToneCurve(key):
+    return ToneCurve(dict(zip(ToneCurve.keys, key)))
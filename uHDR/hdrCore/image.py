@@ -24,10 +24,10 @@ package hdrCoreconsists of the core classes for HDR imaging.
 # -----------------------------------------------------------------------------
 # --- Import ------------------------------------------------------------------
 # -----------------------------------------------------------------------------
-import enum, rawpy, colour, imageio, copy, os, functools, skimage.transform
+import enum, rawpy, colour, imageio, copy, os, functools, itertools, skimage.transform
 import numpy as np
-from . import utils, processing, metadata
-import preferences.Prefs as pref
+from . import utils, processing, metadata, numbafun, stats
+from preferences.Prefs import Prefs as pref
 
 imageio.plugins.freeimage.download()
 
@@ -145,16 +145,23 @@ class Image(object):
         scalingFactor (float):      scaling factor to range[0..1]
         metadata (hdrCore.metadatametadata): metadata
         histogram(hdrCore.image.Histogram): image histogram   
+        dataVersion (int):          unique identifier of colorData content, changes when colorData is set or touched
     
     Methods:
         isHDR:                      (boolean) returns True if image is HDR
+        copy:                       (hdrCore.image.Image) copy-on-write copy: pixels are shared (read-only) until written
+        ensureWritable:             () copy shared (read-only) pixels before in-place writing
+        touch:                      () invalidate derived representations after an in-place modification of colorData
+        getXYZ, getY, getLab, getLCH: (numpy.ndarray) derived representations (computed once, read-only)
         process:                    (hdrCore.image.Image) computes a processing and returns a new Image 
         write:                      () write image and json metadata on disk (HDR image only)
         getChannel:                 ()
-        getDynamicRange:
+        getDynamicRange:            (float) dynamic range in stops (from luminance statistics)
+        getLuminanceStats:          (hdrCore.stats.LuminanceStats) luminance statistics (computed once)
         buildHistogram:
         plot:
         __repr__:                   (str)
+        view:                       (hdrCore.image.Image) zero-copy sub-image
         split:                      (list[[hdrCore.image.Image]]) split an image into sub-images
 
     Static methods:
@@ -201,6 +208,115 @@ class Image(object):
         """
         return self.type == imageType.HDR
 
+    # colorData: derived representations (XYZ, Y, Lab, LCH) are cached until colorData is set or touched
+    versionCounter = itertools.count()
+
+    @property
+    def colorData(self):
+        return self._colorData
+
+    @colorData.setter
+    def colorData(self, colorData):
+        self._colorData = colorData
+        self.touch()
+
+    def touch(self):
+        """touch: invalidate derived representations, must be called after an in-place modification of colorData.
+        """
+        self.dataVersion = next(Image.versionCounter)
+        self._derived = {}                               # new dict: copy-on-write copies keep the previous one
+
+    def __getstate__(self):
+        # copy and pickle: derived representations are not copied, the copy has its own version
+        state = self.__dict__.copy()
+        state['_derived'] = {}
+        state['dataVersion'] = next(Image.versionCounter)
+        return state
+
+    def _getDerived(self, key, compute):
+        if key not in self._derived:
+            data = compute()
+            if np.issubdtype(self.colorData.dtype, np.floating) and (data.dtype != self.colorData.dtype): data = data.astype(self.colorData.dtype)
+            data.flags.writeable = False
+            self._derived[key] = data
+        return self._derived[key]
+
+    def getXYZ(self, decoding=None):
+        """getXYZ: XYZ representation of colorData (cached).
+
+        Args:
+            decoding (bool, Optional): apply sRGB cctf decoding, if None: decoding if image is not linear
+
+        Returns:
+            (numpy.ndarray): read-only XYZ array
+        """
+        if self.colorSpace.name == 'Lch': return self._getDerived(('XYZ',), lambda: processing.Lab_to_XYZ(self.getLab()))
+        if decoding is None: decoding = not self.linear
+        return self._getDerived(('XYZ', decoding), lambda: processing.sRGB_to_XYZ(self.colorData, apply_cctf_decoding=decoding))
+
+    def getY(self, decoding=None):
+        """getY: luminance (Y of XYZ) of colorData (cached).
+
+        Args:
+            decoding (bool, Optional): apply sRGB cctf decoding, if None: decoding if image is not linear
+
+        Returns:
+            (numpy.ndarray): read-only Y array
+        """
+        return self.getXYZ(decoding)[:,:,1]
+
+    def getLab(self, decoding=None):
+        """getLab: Lab representation of colorData (cached).
+
+        Args:
+            decoding (bool, Optional): apply sRGB cctf decoding, if None: decoding if image is not linear
+
+        Returns:
+            (numpy.ndarray): read-only Lab array
+        """
+        if self.colorSpace.name == 'Lch': return self._getDerived(('Lab',), lambda: colour.LCHab_to_Lab(self.colorData))
+        if decoding is None: decoding = not self.linear
+        return self._getDerived(('Lab', decoding), lambda: processing.XYZ_to_Lab(self.getXYZ(decoding)))
+
+    def getLCH(self, decoding=None):
+        """getLCH: LCH representation of colorData (cached).
+
+        Args:
+            decoding (bool, Optional): apply sRGB cctf decoding, if None: decoding if image is not linear
+
+        Returns:
+            (numpy.ndarray): read-only LCH array
+        """
+        if self.colorSpace.name == 'Lch': return self.colorData
+        if decoding is None: decoding = not self.linear
+        return self._getDerived(('LCH', decoding), lambda: colour.Lab_to_LCHab(self.getLab(decoding)))
+
+    def copy(self):
+        """copy: copy-on-write copy of image
+            pixels are shared with self through a read-only view of colorData: an in-place write raises an error 
+            instead of modifying self, call ensureWritable() before writing in place.
+            metadata, colour space and derived representations are shared.
+
+        Returns:
+            (hdrCore.image.Image)
+        """
+        res = object.__new__(type(self))
+        res.__dict__.update(self.__dict__)              # shallow copy (copy.copy would reset derived representations)
+        if isinstance(self.colorData, np.ndarray):
+            res._colorData = self.colorData.view()      # same data: derived representations are kept
+            res._colorData.flags.writeable = False
+        return res
+
+    def ensureWritable(self):
+        """ensureWritable: copy colorData if it is shared (read-only) by a copy-on-write copy.
+
+        Returns:
+            (hdrCore.image.Image): self
+        """
+        if isinstance(self.colorData, np.ndarray) and not self.colorData.flags.writeable:
+            self.colorData = self.colorData.copy()
+        return self
+
     def process(self, process, **kwargs):
         """
         compute a process according to the Processing object parameter.
@@ -327,8 +443,8 @@ class Image(object):
         # display ready image
         if 'display' in res.metadata.metadata.keys():
             disp = res.metadata.metadata['display']
-            if disp in pref.getHDRdisplays().keys():
-                scaling = pref.getHDRdisplays()[disp]['scaling']
+            if disp in pref.HDRdisplays.keys():
+                scaling = pref.HDRdisplays[disp]['scaling']
                 res.colorData = res.colorData/scaling  
 
         return res
@@ -386,12 +502,16 @@ class Image(object):
 
         # take into account colorSpace
         destColor = channel.colorSpace()
-        image = processing.ColorSpaceTransform().compute(self,dest=destColor)
+        if channel.getValue() >= 3: return None
 
-        if channel.getValue() <3:
-            return image.colorData[:,:,channel.getValue()]
-        else:
-            return None
+        if self.colorSpace.name == 'sRGB':
+            # use cached representations
+            if destColor == 'sRGB':  return self.colorData[:,:,channel.getValue()]
+            if destColor == 'XYZ':   return self.getXYZ(decoding=(self.type == imageType.SDR) and (not self.linear))[:,:,channel.getValue()]
+            if destColor == 'Lab':   return self.getLab()[:,:,channel.getValue()]
+
+        image = processing.ColorSpaceTransform().compute(self,dest=destColor)
+        return image.colorData[:,:,channel.getValue()]
 
     def getDynamicRange(self,percentile=None):
         """
@@ -403,16 +523,29 @@ class Image(object):
                 
         Returns:
             float
-                The dynamic range of the image
+                The dynamic range of the image (percentiles accurate to 1/32 stop, see getLuminanceStats)
         """
 
-        Y_min,Y_max = None, None
-        Y = self.getChannel(channel.Y)
+        return self.getLuminanceStats().dynamicRange(percentile)
+
+    def getLuminanceStats(self, decoding=None, exact=False):
+        """getLuminanceStats: luminance statistics from a log2 histogram (cached, see hdrCore.stats.LuminanceStats).
+
+        Args:
+            decoding (bool, Optional): apply sRGB cctf decoding, if None: decoding if image is SDR and not linear
+            exact (bool, Optional): exact percentiles (validation, not cached)
 
-        if percentile == None : Y_min, Y_max = np.amin(Y[Y>0]), np.amax(Y)                  # use min and max
-        else: Y_min, Y_max = np.percentile(Y[Y>0],percentile), np.percentile(Y,100-percentile)   # percentile
+        Returns:
+            (hdrCore.stats.LuminanceStats)
+        """
+        if decoding is None: decoding = (self.type == imageType.SDR) and (not self.linear)
+        if self.colorSpace.name in ['sRGB', 'Lch']: Y = lambda: self.getXYZ(decoding=decoding)[:,:,1]
+        else: Y = lambda: self.getChannel(channel.Y)
 
-        return np.log2(Y_max)-np.log2(Y_min)
+        if exact: return stats.LuminanceStats(Y(), exact=True)
+        key = ('stats', decoding)
+        if key not in self._derived: self._derived[key] = stats.LuminanceStats(Y())
+        return self._derived[key]
 
     #def getMinMaxPerChannel(self):
     #    """TODO - documentation de la méthode getMinMaxPerChannel
@@ -434,7 +567,7 @@ class Image(object):
             channel: TODO
                 TODO
         """
-        self.histogram = Histogram.buildbuild(self, channel, nbBins=100, range= None, logSpace = self.isHDR())
+        self.histogram = Histogram.build(self, channel, nbBins=100, range= None, logSpace = self.isHDR())
 
     def plot(self,ax,displayTitle=False,title=None,forceToneMapping=True,TMO=None):
         """
@@ -484,135 +617,69 @@ class Image(object):
     @staticmethod
     def buildLchColorData(L,c,h,size,width,height):
         """
-        TODO - Documentation de la méthode buildLchColorData
+        Build Lch gradient image: channel width varies along x, channel height along y, the third channel is constant (middle of its range).
 
         Args:
-            L: TODO
-                TODO
-            c: TODO
-                TODO
-            h: TODO
-                TODO
-            size: TODO
-                TODO
-            width: TODO
-                TODO
-            height: TODO
-                TODO
+            L: (float,float)
+                Required : lightness range
+            c: (float,float)
+                Required : chroma range
+            h: (float,float)
+                Required : hue range (h[0] > h[1]: range across 0/360)
+            size: (int,int)
+                Required : height, width
+            width: str
+                Required : channel along x: 'L' | 'c' | 'h'
+            height: str
+                Required : channel along y: 'L' | 'c' | 'h'
                 
         Returns:
-            TODO
-                TODO
+            numpy.ndarray
+                height x width x 3 Lch color data
         """
 
         colorData = np.zeros((size[0], size[1],3))
         Lmin, Lmax = L if L[0] < L[1] else (L[1], L[0])
         cmin, cmax = c if c[0] < c[1] else (c[1], c[0])
-        hmin, hmax = h
-
-        xmin, xmax = 0, size[1]
-        ymin, ymax = 0, size[0]
-
-        if width=='L':
-            if height=='c':
-                #     +-------------------------------+
-                #  c  |                               |
-                #     +-------------------------------+
-                #                Lightness
-                for x in range(xmin,xmax):
-                    for y in range(ymin,ymax):
-                        u, v = x/(xmax-1), y/(ymax-1)
-                        Lu = Lmin*(1-u)+Lmax*u
-                        cv = cmin*(1-v) + cmax*v
-                        hh = (hmin+hmax)/2
-                        colorData[y,x,:] = [Lu,cv,hh]
-            elif height=='h':
-                #     +-------------------------------+
-                #  h  |                               |
-                #     +-------------------------------+
-                #                Lightness
-                for x in range(xmin,xmax):
-                    for y in range(ymin,ymax):
-                        u, v = x/(xmax-1), y/(ymax-1)
-                        Lu = Lmin*(1-u)+Lmax*u
-                        if hmin <= hmax:
-                            hv = hmin*(1-v) + hmax*v
-                        else:
-                            # hmin = 340 / hmax=20 -> hmin = hmin-360 >> hmin = -20, hmax =20
-                            hv = (hmin-360)*(1-v) + hmax*v
-                            if hv < 0: hv = 360 +hv
-                        cc = (cmin+cmax)/2
-                        colorData[y,x,:] = [Lu,cc,hv]
-        elif width=='c':
-            if height=='L':
-                #     +-------------------------------+
-                #  L  |                               |
-                #     +-------------------------------+
-                #                chroma
-                for x in range(xmin,xmax):
-                    for y in range(ymin,ymax):
-                        u, v = x/(xmax-1), y/(ymax-1)
-                        cu = cmin*(1-u) + cmax*u
-                        Lv = Lmin*(1-v)+Lmax*v
-                        hh = (hmin+hmax)/2
-                        colorData[y,x,:] = [Lv,cu,hh]
-            elif height=='h':
-                #     +-------------------------------+
-                #  h  |                               |
-                #     +-------------------------------+
-                #                chroma
-                for x in range(xmin,xmax):
-                    for y in range(ymin,ymax):
-                        u, v = x/(xmax-1), y/(ymax-1)
-                        cu = cmin*(1-u) + cmax*u
-                        if hmin <= hmax:
-                            hv = hmin*(1-v) + hmax*v
-                        else:
-                            # hmin = 340 / hmax=20 -> hmin = hmin-360 >> hmin = -20, hmax =20
-                            hv = (hmin-360)*(1-v) + hmax*v
-                            if hv < 0: hv = 360 +hv
-                        LL = (Lmin+Lmax)/2
-                        colorData[y,x,:] = [LL,cu,hv]
-        elif width == 'h':
-            if height=='L':
-                #     +-------------------------------+
-                #  L  |                               |
-                #     +-------------------------------+
-                #                hue
-                for x in range(xmin,xmax):
-                    for y in range(ymin,ymax):
-                        u, v = x/(xmax-1), y/(ymax-1)
-                        if hmin <= hmax:
-                            hu = hmin*(1-u) + hmax*u
-                        else:
-                            # hmin = 340 / hmax=20 -> hmin = hmin-360 >> hmin = -20, hmax =20
-                            hu = (hmin-360)*(1-u) + hmax*u
-                            if hu < 0: hv = 360 +hu
-                        Lv = Lmin*(1-v)+Lmax*v
-                        cc = (cmin+cmax)/2
-                        colorData[y,x,:] = [Lv,cc,hu]
-            elif height=='c':
-                #     +-------------------------------+
-                #  c  |                               |
-                #     +-------------------------------+
-                #                hue
-                for x in range(xmin,xmax):
-                    for y in range(ymin,ymax):
-                        u, v = x/(xmax-1), y/(ymax-1)
-                        if hmin <= hmax:
-                            hu = hmin*(1-u) + hmax*u
-                        else:
-                            # hmin = 340 / hmax=20 -> hmin = hmin-360 >> hmin = -20, hmax =20
-                            hu = (hmin-360)*(1-u) + hmax*u
-                            if hu < 0: hv = 360 +hu
-                        cv = cmin*(1-v)+cmax*v
-                        LL = (Lmin+Lmax)/2
-                        colorData[y,x,:] = [LL,cv,hu]
+        bounds = {'L': (Lmin, Lmax), 'c': (cmin, cmax), 'h': tuple(h)}
+        index = {'L': 0, 'c': 1, 'h': 2}
+
+        if (width not in index) or (height not in index) or (width == height): return colorData
+
+        def ramp(ch, t):
+            vmin, vmax = bounds[ch]
+            if ch == 'h' and vmin > vmax:
+                # hmin = 340 / hmax=20 -> hmin = hmin-360 >> hmin = -20, hmax =20
+                values = (vmin-360)*(1-t) + vmax*t
+                return np.where(values < 0, 360 + values, values)
+            return vmin*(1-t) + vmax*t
+
+        colorData[:,:,index[width]] = ramp(width, np.linspace(0.0, 1.0, size[1]))[np.newaxis,:]
+        colorData[:,:,index[height]] = ramp(height, np.linspace(0.0, 1.0, size[0]))[:,np.newaxis]
+        constant = ({'L','c','h'} - {width, height}).pop()
+        colorData[:,:,index[constant]] = sum(bounds[constant])/2
 
         return colorData
 
+    def view(self, top, bottom, left=0, right=None):
+        """view: sub-image sharing pixels with self (zero-copy, copy-on-write, see copy())
+
+            Args:
+                top, bottom (int, Required): rows range [top, bottom[
+                left, right (int, Optional): columns range [left, right[, default all columns
+
+            Returns
+                (hdrCore.image.Image)
+        """
+        if right is None: right = self.colorData.shape[1]
+        res = self.copy()
+        res.colorData = res.colorData[top:bottom, left:right, :]
+        res.shape = res.colorData.shape
+        return res
+
     def split(self,widthSegment,heightSegment):
         """split: split an image widthSegment x heightSegment sub-images.
+            sub-images are zero-copy views (see view())
 
             Args:
                 widthSegment (int, Required): number of horizonatal segments
@@ -623,17 +690,14 @@ class Image(object):
         """
         imageHeight,imageWidth, _ = self.colorData.shape
         widthLimit = [(i*(imageWidth//widthSegment))  for i in range(widthSegment)]+[imageWidth]
-        heightLimit = [(i*(imageHeight//heightSegment))  for i in range(widthSegment)]+[imageHeight]
+        heightLimit = [(i*(imageHeight//heightSegment))  for i in range(heightSegment)]+[imageHeight]
 
         res = []
 
         for line in range(heightSegment):
             lines = []
             for col in range(widthSegment):
-                cData =  copy.deepcopy(self.colorData[(heightLimit[line]):(heightLimit[line+1]),(widthLimit[col]):(widthLimit[col+1]),:])
-                imgTemp = Image(copy.deepcopy(self.path), copy.deepcopy(self.name), cData, copy.deepcopy(self.type), self.linear, copy.deepcopy(self.colorSpace), self.scalingFactor)
-                imgTemp.metadata = copy.deepcopy(self.metadata)
-                lines.append(imgTemp)
+                lines.append(self.view(heightLimit[line], heightLimit[line+1], widthLimit[col], widthLimit[col+1]))
             res.append(lines)
 
         return res
@@ -651,7 +715,7 @@ class Image(object):
         totalWidth= functools.reduce(lambda x,y: x+y, map(lambda img: img.colorData.shape[1],imgList[0]),0)
         totalHeight= functools.reduce(lambda x,y: x+y,map(lambda imgList: imgList[0].shape[0],imgList),0)
 
-        cData = np.zeros((totalHeight,totalWidth,3))
+        cData = np.empty((totalHeight,totalWidth,3), dtype=imgList[0][0].colorData.dtype)
 
         y = 0
         for line in imgList:
@@ -742,8 +806,17 @@ class Histogram(object):
             TODO
         logSpace: TODO
             TODO
+
+    Class Attributes:
+        logRange (float): default log-space range in EV (log2) below the maximum, see buildRGBY
+
+    Static methods:
+        build               (Histogram) histogram of one channel
+        buildRGBY           (dict[str,Histogram]) R, G, B and Y histograms in one pass
+        binIndex            (numpy.ndarray) bin index of values
     """
-    
+    logRange = 12.0
+
     def __init__(self,histValue,edgeValue,name,channel,logSpace=False):
         """
         TODO - Documentation de la méthode __init__
@@ -834,8 +907,7 @@ class Histogram(object):
         if not isinstance(logSpace,(bool, str)): logSpace = 'auto'
         if isinstance(logSpace,str):
             if logSpace=='auto':
-                if img.type == image.imageType.imageType.SDR : logSpace = False
-                if img.type == image.imageType.imageType.HDR : logSpace = True
+                logSpace = (img.type == imageType.HDR)
             else: logSpace = False
 
         channelVector = utils.ndarray2vector(img.getChannel(channel))
@@ -850,16 +922,15 @@ class Histogram(object):
 
         # compute bins
         if logSpace:
-            minChannel = np.amin(channelVector)
-            maxChannel = np.amax(channelVector)
-            #bins
-            bins = 10 ** np.linspace(np.log10(minChannel), np.log10(maxChannel), nbBins+1)
+            positive = channelVector[channelVector>0]
+            range = (np.amin(positive), np.amax(positive)) if positive.size > 0 else (1.0, 1.0)
+            npedges = 2.0 ** np.linspace(np.log2(range[0]), np.log2(range[1]), nbBins+1)
         else:
-            bins = np.linspace(range[0],range[1],nbBins+1)
+            npedges = np.linspace(range[0],range[1],nbBins+1)
 
-        nphist, npedges = np.histogram(channelVector, bins)
+        nphist = np.bincount(Histogram.binIndex(channelVector, range, nbBins, logSpace).ravel(), minlength=nbBins)
 
-        nphist = nphist/channelVector.shape
+        nphist = nphist/channelVector.size
         return Histogram(nphist, 
                          npedges, 
                          'hist_'+str(channel)+'_'+img.name, 
@@ -867,6 +938,73 @@ class Histogram(object):
                          logSpace = logSpace
                          )
 
+    @staticmethod
+    def binIndex(values,range,nbBins,logSpace=False):
+        """
+        Bin index of values: bins are uniform in [range[0],range[1]] (log2 space if logSpace), out of range values are clamped to first/last bin.
+
+        Args:
+            values: numpy.ndarray
+                Required : values
+            range: (float,float)
+                Required : range of histogram (range[0] > 0 if logSpace)
+            nbBins: int
+                Required : number of bins
+            logSpace: boolean
+                Optional : bins uniform in log2 space
+
+        Returns:
+            numpy.ndarray
+                int32 bin index of values (same shape)
+        """
+        lo, hi = float(range[0]), float(range[1])
+        if logSpace:
+            values = np.log2(np.maximum(values, lo))
+            lo, hi = np.log2(lo), np.log2(hi)
+        scale = nbBins/(hi-lo) if hi > lo else 0.0
+        index = ((values-lo)*scale).astype(np.int32)
+        return np.clip(index, 0, nbBins-1, out=index)
+
+    @staticmethod
+    def buildRGBY(img,nbBins=256,logSpace=False,range=None):
+        """
+        Build R, G, B and Y histograms of image in one pass over pixels (numba kernel, see numbafun.numba_histogram_RGBY).
+        Y is the cached luminance plane of image (see Image.getY) without cctf decoding: R, G, B and Y are in the same encoding
+        (luma of encoded values for non linear images), colorData is not converted.
+
+        Args:
+            img: Image
+                Required : input image (sRGB colorSpace)
+            nbBins: int
+                Optional : histogram number of bins
+            logSpace: boolean
+                Optional : bins uniform in log2 space
+            range: (float,float)
+                Optional : range of histograms, if None: [0, max(1, max)] or [max/2^logRange, max] in log space
+
+        Returns:
+            dict[str,Histogram]
+                'R', 'G', 'B', 'Y' histograms (normalised by number of pixels)
+        """
+        colorData = img.colorData
+        Y = img.getY(decoding=False)
+
+        if not range:
+            maxValue = max(float(np.amax(colorData)), float(np.amax(Y)), 1.0)
+            range = (maxValue*2.0**(-Histogram.logRange), maxValue) if logSpace else (0.0, maxValue)
+
+        lo, hi = (np.log2(range[0]), np.log2(range[1])) if logSpace else range
+        counts = numbafun.numba_histogram_RGBY(colorData, Y, float(lo), float(hi), nbBins, bool(logSpace))
+        counts = counts/(colorData.shape[0]*colorData.shape[1])
+
+        if logSpace: edges = 2.0 ** np.linspace(np.log2(range[0]), np.log2(range[1]), nbBins+1)
+        else: edges = np.linspace(range[0], range[1], nbBins+1)
+
+        res = {}
+        for i, (name, ch) in enumerate([('R', channel.sR), ('G', channel.sG), ('B', channel.sB), ('Y', channel.Y)]):
+            res[name] = Histogram(counts[i], edges, 'hist_'+name+'_'+img.name, ch, logSpace=logSpace)
+        return res
+
     def plot(self,ax,color='r',shortName=True,title=True):
         """
         Method to plot the histogram
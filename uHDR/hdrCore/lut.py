@@ -0,0 +1,129 @@
+# uHDR: HDR image editing software
+#   Copyright (C) 2021  remi cozot
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+# hdrCore project 2020
+# author: remi.cozot@univ-littoral.fr
+
+# -----------------------------------------------------------------------------
+# --- Package hdrCore ---------------------------------------------------------
+# -----------------------------------------------------------------------------
+"""
+package hdrCore consists of the core classes for HDR imaging.
+"""
+
+# -----------------------------------------------------------------------------
+# --- Import ------------------------------------------------------------------
+# -----------------------------------------------------------------------------
+import colour
+import numpy as np
+from . import numbafun
+
+# -----------------------------------------------------------------------------
+# --- Class LUT3D -------------------------------------------------------------
+# -----------------------------------------------------------------------------
+class LUT3D(object):
+    """
+    class LUT3D: 3D look-up table on linear RGB
+        input values are mapped to [0,1] by a shaper before lookup:
+            'sRGB': sRGB cctf encoding, domain [0, 1] (SDR images)
+            'log2': log2 scale over domain [min, max] (HDR images)
+        output values are stored shaped (not clipped to domain max) and unshaped after interpolation,
+        so that exposure-like operators are interpolated exactly.
+
+    Attributes:
+        table (numpy.ndarray): size x size x size x 3 table indexed by shaped [R, G, B]
+        size (int): number of nodes per axis
+        shaper (str): 'sRGB' or 'log2'
+        domain (tuple(float, float)): input range
+
+    Methods:
+        shape               (numpy.ndarray) map linear values to [0,1]
+        unshape             (numpy.ndarray) map [0,1] to linear values
+        apply               (numpy.ndarray) lookup with trilinear or tetrahedral interpolation (numba)
+
+    Static methods:
+        grid                (numpy.ndarray) linear RGB values of LUT nodes
+    """
+
+    def __init__(self, table, shaper='sRGB', domain=(0.0, 1.0)):
+        """
+        Args:
+            table (numpy.ndarray, Required): size x size x size x 3 linear output values
+            shaper (str, Optional): 'sRGB' or 'log2'
+            domain (tuple(float, float), Optional): input range
+        """
+        self.size = table.shape[0]
+        self.shaper = shaper
+        self.domain = domain
+        self.table = np.float32(self.shape(table, clip=False))
+
+    def shape(self, x, clip=True):
+        """map linear values to [0,1] according to shaper.
+
+        Args:
+            x (numpy.ndarray, Required): linear values
+            clip (bool, Optional): clip to domain (input values), default True
+
+        Returns:
+            (numpy.ndarray)
+        """
+        lo, hi = self.domain
+        if self.shaper == 'log2':
+            x = np.log2(np.maximum(x, lo)/lo)/np.log2(hi/lo)
+        else:
+            x = colour.cctf_encoding(x, function='sRGB')
+        return np.clip(x, 0.0, 1.0) if clip else x
+
+    def unshape(self, s):
+        """map [0,1] to linear values according to shaper (inverse of shape).
+
+        Args:
+            s (numpy.ndarray, Required): values in [0,1]
+
+        Returns:
+            (numpy.ndarray)
+        """
+        lo, hi = self.domain
+        if self.shaper == 'log2':   return lo*np.power(hi/lo, s)
+        else:                       return colour.cctf_decoding(s, function='sRGB')
+
+    @staticmethod
+    def grid(size, shaper='sRGB', domain=(0.0, 1.0)):
+        """linear RGB values of LUT nodes (R major order).
+
+        Args:
+            size (int, Required): number of nodes per axis
+            shaper (str, Optional): 'sRGB' or 'log2'
+            domain (tuple(float, float), Optional): input range
+
+        Returns:
+            (numpy.ndarray): size x size x size x 3 array
+        """
+        axis = LUT3D(np.zeros((size, size, size, 3)), shaper, domain).unshape(np.linspace(0.0, 1.0, size))
+        r, g, b = np.meshgrid(axis, axis, axis, indexing='ij')
+        return np.stack((r, g, b), axis=-1)
+
+    def apply(self, colorData, interpolation='tetrahedral'):
+        """apply LUT to color data.
+
+        Args:
+            colorData (numpy.ndarray, Required): linear RGB data (... x 3)
+            interpolation (str, Optional): 'tetrahedral' or 'trilinear'
+
+        Returns:
+            (numpy.ndarray): float32 array, same shape as colorData
+        """
+        lo, hi = self.domain
+        res = numbafun.numba_lut3D_apply(np.ascontiguousarray(colorData.reshape(-1, 3)), self.table, self.shaper == 'log2',
+                                         np.float32(lo), np.float32(hi), interpolation != 'trilinear')
+        return res.reshape(colorData.shape)
@@ -28,7 +28,8 @@ package hdrCore consists of the core classes for HDR imaging.
 import enum, rawpy, colour, imageio, json, os, subprocess, ast, copy
 import numpy as np
 from . import utils, processing, image
-import preferences.Prefs as pref
+from .Exif import ExifTool
+from preferences.Prefs import Prefs as pref
 
 # -----------------------------------------------------------------------------
 # --- Class tags --------------------------------------------------------------
@@ -120,7 +121,8 @@ class metadata:
             #        'Translucent objects and stained glass':None,
             #        'Traditional tone mapping failing cases':None}}],
             'processpipe': None,
-            'display' : None
+            'display' : None,
+            'luminance': None       # luminance statistics summary (see hdrCore.stats.LuminanceStats.toDict)
             }
         # other metadta from tags.json
         self.otherTags = tags()
@@ -161,7 +163,7 @@ class metadata:
                 metaInFile = json.load(file)
                 # copy all metadata from files
                 if pref.keepAllMeta:
-                    for keyInFile in metaInFile.keys():  self.metadata[keyInFile] = copy.deepcopy(metaInFile[keyInFile])
+                    for keyInFile in metaInFile.keys():  res.metadata[keyInFile] = copy.deepcopy(metaInFile[keyInFile])
                 else:
                     for keyInFile in metaInFile.keys():  
                         if keyInFile in res.metadata :
@@ -171,6 +173,9 @@ class metadata:
 
                 if _image.isHDR(): res.metadata['exif']['Color Space']=   'scRGB'
 
+            # luminance statistics of images edited with previous versions: in memory, written by next explicit save
+            if not res.metadata.get('luminance', None): res.updateLuminance()
+
         else:
             exifDict = metadata.readExif(os.path.join(_image.path,_image.name))
             res.recoverData(exifDict)
@@ -203,23 +208,17 @@ class metadata:
         """
         exifDict = dict()
         if os.path.isfile(filename): # check if filename exists
-            if os.path.isfile('exiftool.exe'):# reading metadata with exiftool
+            exiftool = ExifTool.get()
+            if exiftool:# reading metadata with exiftool (long-lived process)
                 try:
-                    exifdata = subprocess.check_output(['exiftool.exe','-a',filename],
-                        shell=True, universal_newlines=True,
-                        stdin=subprocess.PIPE, stderr=subprocess.PIPE)
-                    exifdata = exifdata.splitlines()
-                except:
+                    exifDict = exiftool.readMany([filename])[filename]
+                except OSError:
                     print("ERROR[metadata.readExif(",filename,"): error while reading!]")
-                    exifdata =[]
-                # buid exif dict
-                for each in exifdata:
-                    tag,val = each.split(':',1)# tags and values are separated by a semi colon
-                    exifDict[tag.strip()] = val.strip()
             else: 
                 print("ERROR[metadata.readExif(",filename,"): consider installing exiftool for better exif metadata, degraded mode with imageio!]")
                 img = imageio.imread(filename)
-                exifDict = img.meta['EXIF_MAIN'] if 'EXIF_MAIN' in img.meta else {}
+                meta = getattr(img, 'meta', {})
+                exifDict = meta['EXIF_MAIN'] if 'EXIF_MAIN' in meta else {}
         else: print("ERROR[metadata.readExif(",filename,"): file not found]")
 
         return exifDict
@@ -322,8 +321,17 @@ class metadata:
 
         # over data
         # dynamic range
-        self.image.colorSpace= image.ColorSpace.sRGB()
-        self.metadata['exif']['Dynamic Range (stops)'] = self.image.getDynamicRange(0.5)
+        self.updateLuminance()
+    # ---------------------------------------------------------------------------
+    def updateLuminance(self):
+        """
+        Compute luminance statistics of image (one pass, see hdrCore.stats.LuminanceStats): dynamic range and 'luminance' summary,
+        so that dynamic range can be read from metadata without reading pixels.
+        """
+        if self.image.colorSpace is None: self.image.colorSpace= image.ColorSpace.sRGB()
+        luminanceStats = self.image.getLuminanceStats()
+        self.metadata['exif']['Dynamic Range (stops)'] = luminanceStats.dynamicRange(0.5)
+        self.metadata['luminance'] = luminanceStats.toDict()
     # ---------------------------------------------------------------------------
     def __repr__(self):
         """
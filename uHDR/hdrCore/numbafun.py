@@ -24,7 +24,7 @@ package hdrCore consists of the core classes for HDR imaging.
 # -----------------------------------------------------------------------------
 # --- Import ------------------------------------------------------------------
 # -----------------------------------------------------------------------------
-import numba
+import numba, numba.cuda
 import numpy as np
 # -----------------------------------------------------------------------------
 # --- Functions: numba version ------------------------------------------------
@@ -58,43 +58,433 @@ def numba_cctf_sRGB_decoding(V):
 # -----------------------------------------------------------------------------
 # --- Functions: cuda version ------------------------------------------------
 # -----------------------------------------------------------------------------
-@numba.vectorize('float32(float32)', target='cuda' )
-def cuda_cctf_sRGB_decoding(V):
-    """cctf sRGB decoding (cuda acceleration)
+# cuda kernels are only compiled when a cuda device is available, so that the
+# cpu (numba) functions can be imported on machines without cuda.
+try:
+    cudaAvailable = numba.cuda.is_available()
+except Exception:
+    cudaAvailable = False
+
+if cudaAvailable:
+    @numba.vectorize('float32(float32)', target='cuda' )
+    def cuda_cctf_sRGB_decoding(V):
+        """cctf sRGB decoding (cuda acceleration)
+
+            Args:
+                V (float or numpy.ndarray, Required)
+
+            Returns:
+                (float)
+        """
+
+        if V <= 0.040449935999999999:
+            L = V / 12.92
+        else:
+            L = ((V + 0.055) / 1.055)**( 2.4)
+        return L
+    # -----------------------------------------------------------------------------
+    @numba.vectorize('float32(float32)', target='cuda' )
+    def cuda_cctf_sRGB_encoding(L):
+        """cctf SRGB encoding (cuda acceleration)
+
+            Args:
+                L (float or numpy.ndarray, Required)
+
+            Returns:
+                (float)
+        """
+
+        if L <= 0.0031308:
+            v = L * 12.92
+        else:
+            v = 1.055 * (L**(1 / 2.4)) - 0.055
+        return v
+# -----------------------------------------------------------------------------
+# -----------------------------------------------------------------------------
+def numba_sRGB_to_XYZ(sRGB, cctf_decoding=None):
+    pass
+# -----------------------------------------------------------------------------
+# --- Functions: fused process-pipe (numba version) ---------------------------
+# -----------------------------------------------------------------------------
+# sRGB (D65) <-> XYZ matrices and Lab reference white used by hdrCore.processing
+# (illuminant [0.3127, 0.329], CAT02 between identical white points is identity)
+M_sRGB_to_XYZ = np.array([[0.4124, 0.3576, 0.1805],
+                          [0.2126, 0.7152, 0.0722],
+                          [0.0193, 0.1192, 0.9505]])
+M_XYZ_to_sRGB = np.linalg.inv(M_sRGB_to_XYZ)
+Lab_whitepoint = np.array([0.3127/0.329, 1.0, (1.0-0.3127-0.329)/0.329])
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _encode(L):
+    if L <= 0.0031308: return L * 12.92
+    return 1.055 * (L**(1 / 2.4)) - 0.055
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _decode(V):
+    if V <= 0.040449935999999999: return V / 12.92
+    return ((V + 0.055) / 1.055)**( 2.4)
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _labF(t):
+    if t > (24/116)**3: return np.cbrt(t)
+    return (841/108)*t + 16/116
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _labFinv(f):
+    if f > 24/116: return f**3
+    return (f - 16/116)*(108/841)
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _linear_to_LCH(r, g, b, M, W):
+    X = M[0,0]*r + M[0,1]*g + M[0,2]*b
+    Y = M[1,0]*r + M[1,1]*g + M[1,2]*b
+    Z = M[2,0]*r + M[2,1]*g + M[2,2]*b
+    fx, fy, fz = _labF(X/W[0]), _labF(Y/W[1]), _labF(Z/W[2])
+    L, a, bb = 116*fy - 16, 500*(fx - fy), 200*(fy - fz)
+    return L, np.hypot(a, bb), np.degrees(np.arctan2(bb, a)) % 360
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _LCH_to_linear(L, C, H, Minv, W):
+    h = np.radians(H)
+    fy = (L + 16)/116
+    fx, fz = fy + C*np.cos(h)/500, fy - C*np.sin(h)/200
+    X, Y, Z = W[0]*_labFinv(fx), W[1]*_labFinv(fy), W[2]*_labFinv(fz)
+    return (Minv[0,0]*X + Minv[0,1]*Y + Minv[0,2]*Z,
+            Minv[1,0]*X + Minv[1,1]*Y + Minv[1,2]*Z,
+            Minv[2,0]*X + Minv[2,1]*Y + Minv[2,2]*Z)
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _linearWeight(x, vmin, vmax, tol):
+    # scalar version of hdrCore.utils.NPlinearWeightMask
+    if x <= vmin - tol: return 0.0
+    if x <= vmin: return (x - (vmin - tol))/tol
+    if x <= vmax: return 1.0
+    if x <= vmax + tol: return 1.0 - (x - vmax)/tol
+    return 0.0
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _hueWeight(h, hmin, hmax, tol):
+    # _linearWeight on the hue circle: hmin > hmax selects across 0/360, tolerance wraps around
+    if hmax - hmin >= 360.0: return 1.0
+    if hmax < hmin: hmax += 360.0
+    return max(_linearWeight(h, hmin, hmax, tol), _linearWeight(h + 360.0, hmin, hmax, tol), _linearWeight(h - 360.0, hmin, hmax, tol))
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True, parallel=True)
+def numba_selection_mask(colorLCH, lMin, lMax, lTol, cMin, cMax, cTol, hMin, hMax, hTol, mask):
+    """trapezoidal selection mask min(wL, wC, wH) of a Lch image in one pass (see utils.NPlinearWeightMask).
+
+    Args:
+        colorLCH (numpy.ndarray, Required): h x w x 3 Lch data
+        lMin, lMax, lTol, cMin, cMax, cTol (float, Required): lightness and chroma ranges and tolerances
+        hMin, hMax, hTol (float, Required): hue range (hMin > hMax: range across 0/360) and tolerance
+        mask (numpy.ndarray, Required): h x w output buffer (float32)
+
+    Returns:
+        (numpy.ndarray): mask
+    """
+    h, w = mask.shape
+    for i in numba.prange(h):
+        for j in range(w):
+            m = _linearWeight(colorLCH[i,j,0], lMin, lMax, lTol)
+            if m > 0.0: m = min(m, _linearWeight(colorLCH[i,j,1], cMin, cMax, cTol))
+            if m > 0.0: m = min(m, _hueWeight(colorLCH[i,j,2], hMin, hMax, hTol))
+            mask[i,j] = m
+    return mask
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _binIndex(x, lo, scale, nbBins, logSpace):
+    # bin index of x, clamped to [0, nbBins-1] (lo and scale in log2 space if logSpace)
+    if logSpace: x = np.log2(x) if x > 0.0 else -np.inf
+    i = (x - lo)*scale
+    if i < 0.0: return 0
+    if i >= nbBins: return nbBins - 1
+    return int(i)
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def numba_histogram_RGBY(colorData, Y, lo, hi, nbBins, logSpace):
+    """R, G, B and Y histograms (bin counts) in one pass over pixels (see image.Histogram.buildRGBY).
+        sequential: called from worker threads (app.HistogramService) while rendering uses the parallel kernels
+
+    Args:
+        colorData (numpy.ndarray, Required): h x w x 3 RGB data
+        Y (numpy.ndarray, Required): h x w luminance
+        lo, hi (float, Required): histogram range (log2 of range if logSpace)
+        nbBins (int, Required): number of bins
+        logSpace (bool, Required): bins uniform in log2 space
+
+    Returns:
+        (numpy.ndarray): 4 x nbBins counts (int64)
+    """
+    h, w, _ = colorData.shape
+    scale = nbBins/(hi - lo) if hi > lo else 0.0
+    counts = np.zeros((4, nbBins), dtype=np.int64)
+    for i in range(h):
+        for j in range(w):
+            for c in range(3):
+                counts[c, _binIndex(colorData[i,j,c], lo, scale, nbBins, logSpace)] += 1
+            counts[3, _binIndex(Y[i,j], lo, scale, nbBins, logSpace)] += 1
+    return counts
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def numba_log2_histogram(Y, lo, binsPerStop, nbBins):
+    """log2 histogram of luminance with exact min (of positive values) and max in one pass (see stats.LuminanceStats).
+
+    Args:
+        Y (numpy.ndarray, Required): h x w luminance
+        lo (float, Required): log2 of first bin lower edge, values below are counted in first bin
+        binsPerStop (int, Required): number of bins per stop
+        nbBins (int, Required): number of bins, values above last bin are counted in last bin
+
+    Returns:
+        (tuple): counts (int64 array), number of values <= 0, min of values > 0 (inf if none), max
+    """
+    h, w = Y.shape
+    counts = np.zeros(nbBins, dtype=np.int64)
+    nbNonPositive = 0
+    minPositive, maxValue = np.inf, -np.inf
+    for i in range(h):
+        for j in range(w):
+            y = Y[i,j]
+            if y > maxValue: maxValue = y
+            if y <= 0.0:
+                nbNonPositive += 1
+                continue
+            if y < minPositive: minPositive = y
+            b = (np.log2(y) - lo)*binsPerStop
+            if b < 0.0: b = 0.0
+            if b >= nbBins: b = nbBins - 1
+            counts[int(b)] += 1
+    return counts, nbNonPositive, minPositive, maxValue
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _lutShape(x, log2Shaper, lo, hi):
+    # see hdrCore.lut.LUT3D.shape (clipped to [0,1]), single precision
+    x = np.float32(x)
+    if log2Shaper:              s = np.log2(max(x, lo)/lo)/np.log2(hi/lo)
+    elif x <= np.float32(0.0031308): s = x*np.float32(12.92)
+    else:                       s = np.float32(1.055)*x**np.float32(1/2.4) - np.float32(0.055)
+    return min(max(s, np.float32(0.0)), np.float32(1.0))
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _lutUnshape(v, log2Shaper, lo, hi):
+    # see hdrCore.lut.LUT3D.unshape, single precision
+    if log2Shaper:              return lo*(hi/lo)**v
+    if v <= np.float32(0.04045): return v/np.float32(12.92)
+    return ((v + np.float32(0.055))/np.float32(1.055))**np.float32(2.4)
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _lutTetrahedral(t, i, j, k, fr, fg, fb, c):
+    # path c000 -> c111 along axes sorted by decreasing fractional part
+    one = np.float32(1.0)
+    c000, c111 = t[i,j,k,c], t[i+1,j+1,k+1,c]
+    if fr >= fg:
+        if fg >= fb:    return (one-fr)*c000 + (fr-fg)*t[i+1,j,k,c] + (fg-fb)*t[i+1,j+1,k,c] + fb*c111
+        if fr >= fb:    return (one-fr)*c000 + (fr-fb)*t[i+1,j,k,c] + (fb-fg)*t[i+1,j,k+1,c] + fg*c111
+        return                 (one-fb)*c000 + (fb-fr)*t[i,j,k+1,c] + (fr-fg)*t[i+1,j,k+1,c] + fg*c111
+    if fb >= fg:        return (one-fb)*c000 + (fb-fg)*t[i,j,k+1,c] + (fg-fr)*t[i,j+1,k+1,c] + fr*c111
+    if fb >= fr:        return (one-fg)*c000 + (fg-fb)*t[i,j+1,k,c] + (fb-fr)*t[i,j+1,k+1,c] + fr*c111
+    return                     (one-fg)*c000 + (fg-fr)*t[i,j+1,k,c] + (fr-fb)*t[i+1,j+1,k,c] + fb*c111
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _lutTrilinear(t, i, j, k, fr, fg, fb, c):
+    one = np.float32(1.0)
+    c00 = t[i,j,k,c]*(one-fb)     + t[i,j,k+1,c]*fb
+    c01 = t[i,j+1,k,c]*(one-fb)   + t[i,j+1,k+1,c]*fb
+    c10 = t[i+1,j,k,c]*(one-fb)   + t[i+1,j,k+1,c]*fb
+    c11 = t[i+1,j+1,k,c]*(one-fb) + t[i+1,j+1,k+1,c]*fb
+    return (c00*(one-fg) + c01*fg)*(one-fr) + (c10*(one-fg) + c11*fg)*fr
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True, parallel=True)
+def numba_lut3D_apply(colorData, table, log2Shaper, lo, hi, tetrahedral):
+    """3D LUT lookup in one pass over pixels: shaper, interpolation and inverse shaper (see hdrCore.lut.LUT3D.apply).
+
+    Args:
+        colorData (numpy.ndarray, Required): n x 3 linear RGB data
+        table (numpy.ndarray, Required): size x size x size x 3 shaped output values
+        log2Shaper (bool, Required): log2 shaper over [lo, hi], otherwise sRGB cctf
+        lo, hi (numpy.float32, Required): shaper domain
+        tetrahedral (bool, Required): tetrahedral interpolation, otherwise trilinear
+
+    Returns:
+        (numpy.ndarray): n x 3 linear RGB data (float32)
+    """
+    n = table.shape[0]
+    scale = np.float32(n - 1)
+    res = np.empty((colorData.shape[0], 3), dtype=np.float32)
+    for p in numba.prange(colorData.shape[0]):
+        sr = _lutShape(colorData[p,0], log2Shaper, lo, hi)*scale
+        sg = _lutShape(colorData[p,1], log2Shaper, lo, hi)*scale
+        sb = _lutShape(colorData[p,2], log2Shaper, lo, hi)*scale
+        i, j, k = min(int(sr), n - 2), min(int(sg), n - 2), min(int(sb), n - 2)
+        fr, fg, fb = sr - np.float32(i), sg - np.float32(j), sb - np.float32(k)
+        for c in range(3):
+            if tetrahedral: v = _lutTetrahedral(table, i, j, k, fr, fg, fb, c)
+            else:           v = _lutTrilinear(table, i, j, k, fr, fg, fb, c)
+            res[p,c] = _lutUnshape(v, log2Shaper, lo, hi)
+    return res
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _process_5CO_firstStages(r, g, b, linear, exposure, contrast, curveX, curveY, lightnessMask, saturation, M, W):
+    # stages before color editors: exposure, contrast, tone-curve, lightness mask, saturation
+    # returns r, g, b, L, C, H, state with state: 0 linear sRGB, 1 prime sRGB, 2 Lch
+    state = 0 if linear else 1
+    L, C, H = 0.0, 0.0, 0.0
+
+    # (1) exposure
+    if exposure != 0:
+        if state == 1: r, g, b, state = _decode(r), _decode(g), _decode(b), 0
+        f = 2.0**exposure
+        r, g, b = r*f, g*f, b*f
+
+    # (2) contrast
+    if contrast != 0:
+        if state == 0: r, g, b, state = _encode(r), _encode(g), _encode(b), 1
+        s = abs(contrast)/100 + 1
+        if contrast < 0: s = 1/s
+        r, g, b = (r - 0.5)*s + 0.5, (g - 0.5)*s + 0.5, (b - 0.5)*s + 0.5
+
+    # (3) tone-curve
+    if curveX.shape[0] > 0:
+        if state == 0: r, g, b, state = _encode(r), _encode(g), _encode(b), 1
+        Y = M[1,0]*r + M[1,1]*g + M[1,2]*b
+        if Y != 0:
+            ratio = np.interp(Y, curveX, curveY)/Y
+            r, g, b = r*ratio, g*ratio, b*ratio
+
+    # (4) lightness mask
+    if lightnessMask[0] or lightnessMask[1] or lightnessMask[2] or lightnessMask[3] or lightnessMask[4]:
+        if state == 0: r, g, b, state = _encode(r), _encode(g), _encode(b), 1
+        Y = (M[1,0]*r + M[1,1]*g + M[1,2]*b)*100
+        if lightnessMask[0] and Y < 20: r, g, b = 0.0, 0.0, 1.0
+        elif lightnessMask[1] and 20 <= Y < 40: r, g, b = 0.0, 1.0, 1.0
+        elif lightnessMask[2] and 40 <= Y < 60: r, g, b = 0.0, 1.0, 0.0
+        elif lightnessMask[3] and 60 <= Y < 80: r, g, b = 1.0, 1.0, 0.0
+        elif lightnessMask[4] and 80 <= Y < 100: r, g, b = 1.0, 0.0, 0.0
+
+    # (5) saturation
+    if saturation != 0:
+        if state == 1: r, g, b, state = _decode(r), _decode(g), _decode(b), 0
+        L, C, H = _linear_to_LCH(r, g, b, M, W)
+        state = 2
+        gamma = 1/((saturation/25)+1) if saturation >= 0 else (-saturation/25)+1
+        C = ((C/100)**gamma)*100
+
+    return r, g, b, L, C, H, state
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True)
+def _process_5CO_colorEditors(r, g, b, L, C, H, state, colorEditors, colorEditorsMask, maxLC, nbEditors, M, Minv, W):
+    # color editors 0 .. nbEditors-1, editor k scales its lightness and chroma upper bounds by maxLC[k]
+    # returns r, g, b, L, C, H, state (see _process_5CO_firstStages)
+    for k in range(nbEditors):
+        ce = colorEditors[k]
+        if not colorEditorsMask[k] and ce[7] == 0 and ce[8] == 0 and ce[9] == 0 and ce[10] == 0: continue
+        if state == 1: r, g, b, state = _decode(r), _decode(g), _decode(b), 0
+        if state == 0:
+            L, C, H = _linear_to_LCH(r, g, b, M, W)
+            state = 2
+        lMax, cMax = ce[1]*max(100.0, maxLC[k,0])/100, ce[3]*max(100.0, maxLC[k,1])/100
+        mask = min(_linearWeight(L, ce[0], lMax, ce[6]*100), 
+                   _linearWeight(C, ce[2], cMax, ce[6]*100), 
+                   _hueWeight(H, ce[4], ce[5], ce[6]*360))
+        if colorEditorsMask[k]:
+            r, g, b, state = _decode(mask), _decode(mask), _decode(mask), 0
+            continue
+        comp = 1 - mask
+        if ce[7] != 0: H = ((H + ce[7]) % 360)*mask + H*comp
+        if ce[10] != 0:
+            gamma = 1/((ce[10]/25)+1) if ce[10] >= 0 else (-ce[10]/25)+1
+            C = ((C/100)**gamma)*100*mask + C*comp
+        r, g, b = _LCH_to_linear(L, C, H, Minv, W)
+        state = 0
+        if ce[8] != 0:
+            f = (2.0**ce[8])*mask + comp
+            r, g, b = r*f, g*f, b*f
+        if ce[9] != 0:
+            s = abs(ce[9])/100 + 1
+            if ce[9] < 0: s = 1/s
+            pivot = (2.0**ce[8])*((ce[0] + lMax)/2)/100
+            r, g, b = _encode(r), _encode(g), _encode(b)
+            r = ((r - pivot)*s + pivot)*mask + r*comp
+            g = ((g - pivot)*s + pivot)*mask + g*comp
+            b = ((b - pivot)*s + pivot)*mask + b*comp
+            r, g, b = _decode(r), _decode(g), _decode(b)
+    return r, g, b, L, C, H, state
+# -----------------------------------------------------------------------------
+@numba.njit(cache=True, parallel=True)
+def numba_maxLC_5CO(colorData, linear, exposure, contrast, curveX, curveY, lightnessMask, saturation, colorEditors, colorEditorsMask, M, Minv, W, step):
+    """maximum lightness and chroma at each color editor input (numba acceleration).
+
+    Color editors scale their lightness and chroma upper bounds by the maximum of their input image (see hdrCore.processing.colorEditor),
+    the maximum is estimated on a sub-sampled grid (one pixel every 'step' rows and columns), one pass per active color editor
+    (the input of color editor k depends on the maxima of color editors 0 .. k-1).
 
         Args:
-            V (float or numpy.ndarray, Required)
+            see numba_full_process_5CO
+            step (int, Required): sub-sampling step
 
         Returns:
-            (float)
+            (numpy.ndarray): 5 x 2 array, max lightness and max chroma at each color editor input
     """
-
-    if V <= 0.040449935999999999:
-        L = V / 12.92
-    else:
-        L = ((V + 0.055) / 1.055)**( 2.4)
-    return L
+    height, width = colorData.shape[0], colorData.shape[1]
+    rows = (height + step - 1)//step
+    maxLC = np.zeros((5, 2))
+    for k in range(5):
+        ce = colorEditors[k]
+        if not colorEditorsMask[k] and ce[7] == 0 and ce[8] == 0 and ce[9] == 0 and ce[10] == 0: continue
+        maxL, maxC = np.zeros(rows), np.zeros(rows)
+        for ii in numba.prange(rows):
+            i = ii*step
+            for j in range(0, width, step):
+                r, g, b, L, C, H, state = _process_5CO_firstStages(colorData[i,j,0], colorData[i,j,1], colorData[i,j,2], 
+                                                                   linear, exposure, contrast, curveX, curveY, lightnessMask, saturation, M, W)
+                r, g, b, L, C, H, state = _process_5CO_colorEditors(r, g, b, L, C, H, state, colorEditors, colorEditorsMask, maxLC, k, M, Minv, W)
+                if state == 1: r, g, b = _decode(r), _decode(g), _decode(b)
+                if state != 2: L, C, H = _linear_to_LCH(r, g, b, M, W)
+                maxL[ii], maxC[ii] = max(maxL[ii], L), max(maxC[ii], C)
+        maxLC[k,0], maxLC[k,1] = maxL.max(), maxC.max()
+    return maxLC
 # -----------------------------------------------------------------------------
-@numba.vectorize('float32(float32)', target='cuda' )
-def cuda_cctf_sRGB_encoding(L):
-    """cctf SRGB encoding (cuda acceleration)
+@numba.njit(cache=True, parallel=True)
+def numba_full_process_5CO(colorData, linear, exposure, contrast, curveX, curveY, lightnessMask, saturation, colorEditors, colorEditorsMask, maxLC, M, Minv, W):
+    """fused process-pipe (numba acceleration): same semantics as HDRip.dll full_process_5CO.
+    
+    The fixed pipeline (exposure, contrast, tone-curve, lightness-mask, saturation, 5 color editors) is applied 
+    pixel by pixel in a single pass, rows are processed in parallel.
 
         Args:
-            L (float or numpy.ndarray, Required)
+            colorData (numpy.ndarray, Required): sRGB image (height x width x 3)
+            linear (bool, Required): True if colorData is linear
+            exposure (float, Required): EV
+            contrast (float, Required): contrast value in [-100, +100]
+            curveX, curveY (numpy.ndarray, Required): evaluated tone-curve points (empty arrays: no tone-curve)
+            lightnessMask (numpy.ndarray, Required): 5 booleans (shadows, blacks, mediums, whites, highlights)
+            saturation (float, Required): saturation value in [-100, +100]
+            colorEditors (numpy.ndarray, Required): 5 x 11 array, each row:
+                lightness min/max, chroma min/max, hue min/max, tolerance, hue shift, exposure, contrast, saturation
+            colorEditorsMask (numpy.ndarray, Required): 5 booleans, True displays the color editor mask
+            maxLC (numpy.ndarray, Required): 5 x 2 array, max lightness and max chroma at each color editor input (see numba_maxLC_5CO)
+            M, Minv (numpy.ndarray, Required): sRGB to XYZ matrix and its inverse
+            W (numpy.ndarray, Required): Lab reference white (XYZ)
 
         Returns:
-            (float)
+            (numpy.ndarray): linear sRGB image (float32)
     """
-
-    if L <= 0.0031308:
-        v = L * 12.92
-    else:
-        v = 1.055 * (L**(1 / 2.4)) - 0.055
-    return v
-# -----------------------------------------------------------------------------
-# -----------------------------------------------------------------------------
-def numba_sRGB_to_XYZ(sRGB, cctf_decoding=None):
-    pass
+    height, width = colorData.shape[0], colorData.shape[1]
+    res = np.empty((height, width, 3), dtype=np.float32)
+
+    for i in numba.prange(height):
+        for j in range(width):
+            r, g, b, L, C, H, state = _process_5CO_firstStages(colorData[i,j,0], colorData[i,j,1], colorData[i,j,2], 
+                                                               linear, exposure, contrast, curveX, curveY, lightnessMask, saturation, M, W)
+
+            # (6-10) color editors
+            r, g, b, L, C, H, state = _process_5CO_colorEditors(r, g, b, L, C, H, state, colorEditors, colorEditorsMask, maxLC, 5, M, Minv, W)
+
+            # back to linear sRGB
+            if state == 1: r, g, b = _decode(r), _decode(g), _decode(b)
+            elif state == 2: r, g, b = _LCH_to_linear(L, C, H, Minv, W)
+            res[i,j,0], res[i,j,1], res[i,j,2] = r, g, b
+    return res
 # -----------------------------------------------------------------------------
 # -----------------------------------------------------------------------------
 #CAT_CAT02 = np.array([
@@ -26,17 +26,13 @@ package hdrCore consists of the core classes for HDR imaging.
 # --- Import ------------------------------------------------------------------
 # -----------------------------------------------------------------------------
 import copy, colour, skimage.transform, math, os
-import pathos.multiprocessing, multiprocessing, subprocess
+import multiprocessing, subprocess, threading
 import numpy as np
 import skimage.transform
 import functools
-from geomdl import BSpline
-from geomdl import utilities
-from . import image, utils, aesthetics
-# RCZT 2023
-# from . import image, utils, numbafun, aesthetics
+from . import image, utils, numbafun, aesthetics, lut, curve
 # import guiQt.controller as gc
-import preferences.Prefs as pref
+from preferences.Prefs import Prefs as pref
 from timeit import default_timer as timer
 
 import hdrCore.coreC
@@ -165,9 +161,30 @@ class Processing(object):
     """
     class Processing: abstract class for processing object
 
+    Attributes:
+        executionMode (str): how the result image is built from the input image
+            'copy':     deep copy of input image (default)
+            'cow':      copy-on-write copy of input image (see hdrCore.image.Image.copy)
+            'buffer':   copy-on-write, results are written in a preallocated buffer owned by the processing object
+                        (the buffer is reused by the next computation)
+            'inplace':  input image is modified
+
+        dtype (numpy.dtype): floating point type of output color data (see ProcessPipe.dtype), default numpy.float32
+
+    Class Attributes:
+        pointwise (bool): True if each output pixel only depends on the input pixel at the same position
+            (process can be baked into a 3D LUT, see ProcessPipe.bakeLUT)
+
     Methods:
         compute
+        output
+        outBuffer
+        cast
     """
+    executionModes = ['copy', 'cow', 'buffer', 'inplace']
+    executionMode = 'copy'
+    dtype = np.float32
+    pointwise = True
 
     def compute(self,image,**kwargs):
         """
@@ -182,7 +199,54 @@ class Processing(object):
             (hdrCore.image.Image)
 
         """
-        return copy.deepcopy(image)
+        return self.output(image)
+
+    def output(self,img):
+        """output: result image according to executionMode.
+
+        Args:
+            img (hdrCore.image.Image, Required): input image
+
+        Returns:
+            (hdrCore.image.Image): deep copy ('copy'), copy-on-write copy ('cow', 'buffer') or img ('inplace')
+        """
+        if self.executionMode == 'inplace':   return img
+        elif self.executionMode == 'copy':    return copy.deepcopy(img)
+        else:                                 return img.copy()
+
+    def outBuffer(self,colorData):
+        """outBuffer: output array for numpy 'out=' parameter according to executionMode.
+
+        Args:
+            colorData (numpy.ndarray, Required): array to be processed
+
+        Returns:
+            (numpy.ndarray or None): colorData itself ('inplace' and writable), preallocated buffer ('buffer') 
+                or None (numpy allocates a new array)
+        """
+        if self.executionMode == 'inplace':
+            return colorData if colorData.flags.writeable else None
+        elif self.executionMode == 'buffer':
+            buffer = getattr(self, '_buffer', None)
+            if (buffer is None) or (buffer.shape != colorData.shape) or (buffer.dtype != colorData.dtype) or np.may_share_memory(buffer, colorData):
+                buffer = np.empty_like(colorData)
+                self._buffer = buffer
+            return buffer
+        else: return None
+
+    def cast(self,img):
+        """cast: cast floating point color data of result image to self.dtype
+            (numpy and colour-science promote float32 data to float64).
+
+        Args:
+            img (hdrCore.image.Image, Required): result image
+
+        Returns:
+            (hdrCore.image.Image): img
+        """
+        if np.issubdtype(img.colorData.dtype, np.floating) and (img.colorData.dtype != self.dtype):
+            img.colorData = img.colorData.astype(self.dtype)
+        return img
 # -----------------------------------------------------------------------------
 # --- Class tmo_cctf ---------------------------------------------------------
 # -----------------------------------------------------------------------------
@@ -209,7 +273,7 @@ class tmo_cctf(Processing):
         function = 'sRGB'
         if 'function' in kwargs: function = kwargs['function']
  
-        res = copy.deepcopy(img)
+        res = self.output(img)
 
         # can tone map HDR only 
         if (img.type == image.imageType.HDR):
@@ -224,14 +288,18 @@ class tmo_cctf(Processing):
             res.scalingFactor   = 1.0
             res.colorSpace      = colour.models.RGB_COLOURSPACES[function].copy()
 
-        return res
+        return self.cast(res)
 # -----------------------------------------------------------------------------
 # --- Class exposure ---------------------------------------------------------
 # -----------------------------------------------------------------------------
 class exposure(Processing):
     """
     TODO - Documentation de la classe exposure
+
+    Class Attributes:
+        autoSize (int): size of sub-sampled image used by auto exposure
     """
+    autoSize = 512
     
     def compute(self,img,**kwargs):
         """exposure operator.
@@ -254,13 +322,11 @@ class exposure(Processing):
         if 'EV' in kwargs : EV = kwargs['EV']
         else:               EV = defaultEV
  
-        res = copy.deepcopy(img)
+        res = self.output(img)
 
         if EV != defaultEV:
             # exposure is done in linear RGB
-            print("oui")
             if not res.linear:
-                print("oui")
                 computation = 'python'
                 if computation == 'python':
                     start = timer()
@@ -279,63 +345,41 @@ class exposure(Processing):
 
                 dt = timer() - start
 
-            res.colorData =     res.colorData*math.pow(2,EV)
+            res.colorData =     np.multiply(res.colorData, math.pow(2,EV), out=self.outBuffer(res.colorData))
 
         end = timer()
         print (" [PROCESS-PROFILING](",end - start,") >> exposure(",img.name,"):", kwargs)
 
-        return res
+        return self.cast(res)
 
     def auto(self,img):
-        """
-        TODO - Documentation de la méthode auto
+        """auto exposure: EV in [-10, +10] (step 0.25) maximizing the number of pixels whose luminance is neither 
+        dark nor bright after exposure and sRGB encoding (prime luminance in [0.04, 0.96[).
+
+        Scaling by 2^EV is a shift in log-luminance: log-luminance is computed once on a sub-sampled image and 
+        sorted, then all EVs are scored with a single searchsorted.
 
         Args:
-            img: TODO
-                TODO
+            img (hdrCore.image.Image, Required): input image
                 
         Returns:
-            TODO
-                TODO
+            (dict): {'EV': float} best EV
         """
         minEV, maxEV, step =  -10,10,0.25
         evs = np.linspace(minEV,maxEV,num=int((maxEV-minEV)/step)+1)
 
-        rgb = copy.deepcopy(img.colorData)
-        nbPix = rgb.shape[0]*rgb.shape[1]
+        # sub-sampled image
+        subSampling = max(1, max(img.colorData.shape[0], img.colorData.shape[1])//exposure.autoSize)
+        rgb = img.colorData[::subSampling,::subSampling,:]
+        rgbLinear = rgb if img.linear else colour.cctf_decoding(rgb,function='sRGB')
 
-        if not img.linear:  rgbLinear = colour.cctf_decoding(rgb,function='sRGB')
-        else:               rgbLinear = rgb
+        # sorted log-luminance 
+        Y = utils.ndarray2vector(sRGB_to_XYZ(rgbLinear, apply_cctf_decoding=False))[:,1]
+        with np.errstate(divide='ignore', invalid='ignore'): logY = np.sort(np.log2(Y[Y>0]))
 
-        bins = np.linspace(0,1,25+1)
-
-        # local method for pool (not static!)
-        def evEval(ev):
-            """
-            TODO - Documentation de la méthode evEval
-
-            Args:
-                ev: TODO
-                    TODO
-                    
-            Returns:
-                TODO
-                    TODO
-            """
-            rgb_ev = rgbLinear*math.pow(2,ev)
-            rgb_ev_prime = colour.cctf_encoding(rgb_ev,function='sRGB')
-            rgb_ev_prime[rgb_ev_prime>1] = 1
-            XYZ = colour.sRGB_to_XYZ(rgb_ev_prime, apply_cctf_decoding=False)
-            Y = utils.ndarray2vector(XYZ)[:,1]
-            nphist_ev_prime, npedges = np.histogram(Y, bins)
-            nphist_ev_prime = nphist_ev_prime/nbPix
-            sumH = np.cumsum(nphist_ev_prime[1:-1])[-1]
-
-            return sumH
-
-        _pool = pathos.multiprocessing.ProcessPool()
-        results = _pool.map( evEval, evs)
-        sumsH  = list(results)
+        # bins [0.04, 0.96[ of prime luminance in linear log-luminance then shifted by -EV
+        low, high = np.log2(colour.cctf_decoding(np.array([1/25, 24/25]),function='sRGB'))
+        sumsH = np.searchsorted(logY, high - evs, side='left') - np.searchsorted(logY, low - evs, side='left')
         
         bestEV = evs[np.argmax(sumsH)]
         if pref.verbose: print('  [PROCESS] >> exposure.auto(',img.name,'):BEST EV:',bestEV)
@@ -371,7 +415,7 @@ class contrast(Processing):
         if 'contrast' in kwargs :   contrastValue = kwargs['contrast']
         else:                       contrastValue = defaultContrast
 
-        res = copy.deepcopy(img)
+        res = self.output(img)
 
         if contrastValue != defaultContrast:
             # contrast scaling is computed in prime colorspace
@@ -403,12 +447,14 @@ class contrast(Processing):
                 scalingFactor = 1*(1-contrastValue)+maxContrastFactor*contrastValue
                 scalingFactor = 1/scalingFactor
 
-            res.colorData = scalingFactor*(res.colorData-0.5)+0.5
+            out = np.subtract(res.colorData, 0.5, out=self.outBuffer(res.colorData))
+            np.multiply(out, scalingFactor, out=out)
+            res.colorData = np.add(out, 0.5, out=out)
         
         end=timer()    
         print(" [PROCESS-PROFILING] (",end-start,")>> contrast(",img.name,"):", kwargs)
 
-        return res
+        return self.cast(res)
 # -----------------------------------------------------------------------------
 # --- Class clip -------------------------------------------------------------
 # -----------------------------------------------------------------------------
@@ -433,11 +479,10 @@ class clip(Processing):
         if 'min' in kwargs: min = kwargs['min']
         if 'max' in kwargs: max = kwargs['max']
         
-        res = copy.deepcopy(img)
-        res.colorData[res.colorData>max] = max
-        res.colorData[res.colorData<min] = min
+        res = self.output(img)
+        res.colorData = np.clip(res.colorData, min, max, out=self.outBuffer(res.colorData))
 
-        return res
+        return self.cast(res)
 # -----------------------------------------------------------------------------
 # --- Class ColorSpaceTransform ----------------------------------------------
 # -----------------------------------------------------------------------------
@@ -460,7 +505,7 @@ class ColorSpaceTransform(Processing):
                 TODO
         """ 
         # first create a copy
-        res = copy.deepcopy(img)
+        res = self.output(img)
         if not kwargs: print("WARNING[Processing.ColorSpaceTransform(",img.name,"):", "no destination colour space >> return a copy of image]")
         else:
             if not 'dest'in kwargs: print("WARNING[Processing.ColorSpaceTransform(",img.name,"):", "no 'dest' colour space >> return a copy of image]")
@@ -520,7 +565,7 @@ class ColorSpaceTransform(Processing):
                         XYZ = colour.Lab_to_XYZ(Lab, illuminant=np.array([ 0.3127, 0.329 ]))
                         res.colorData, res.linear, res.colorSpace = XYZ, True, image.ColorSpace.buildXYZ()
 
-        return res
+        return self.cast(res)
 # -----------------------------------------------------------------------------
 # --- Class resize -----------------------------------------------------------
 # -----------------------------------------------------------------------------
@@ -528,6 +573,7 @@ class resize(Processing):
     """
     TODO - Documentation de la classe Resize image processing
     """
+    pointwise = False
     
     def compute(self,img, size=(None,None),anti_aliasing=False):
         """
@@ -545,7 +591,7 @@ class resize(Processing):
             TODO
                 TODO
         """
-        res = copy.deepcopy(img)
+        res = self.output(img)
         y, x, c =  tuple(res.colorData.shape)
         ny,nx = size
         if nx and (not ny): 
@@ -564,7 +610,7 @@ class resize(Processing):
             factor = ny/y
             res.colorData = skimage.transform.resize(res.colorData, (ny,int(x * factor)), anti_aliasing)
             res.shape = res.colorData.shape
-        return res
+        return self.cast(res)
 # -----------------------------------------------------------------------------
 # --- Class Ycurve -----------------------------------------------------------
 # -----------------------------------------------------------------------------
@@ -598,8 +644,7 @@ class Ycurve(Processing):
 
 
         # results image
-        res = copy.deepcopy(img)
-        print('kwargs', kwargs)
+        res = self.output(img)
 
         if kwargs != defaultControlPoints:
 
@@ -622,39 +667,35 @@ class Ycurve(Processing):
 
                 dt = timer() - start
 
-            colorDataY =    sRGB_to_XYZ(res.colorData, apply_cctf_decoding=False)[:,:,1] 
-            # change for multi-threading computation
-            # Ymax =          np.amax(colorDataY)*100
-            # extendedEnd =   [Ymax, kwargs['end'][1]]
-            extendedEnd =   [200, kwargs['end'][1]]
-
-            # create curve adn get y-curve
-            curve =         BSpline.Curve()
-            curve.degree =  2
-            points =        None
-            curve.ctrlpts =     copy.deepcopy([kwargs['start'], kwargs['shadows'], kwargs['blacks'],  kwargs['mediums'], kwargs['whites'], kwargs['highlights'], extendedEnd])
-            curve.knotvector =  utilities.generate_knot_vector(curve.degree, len(curve.ctrlpts))
-            # evaluate curve and get points
-            points = np.asarray(curve.evalpts)/100
-            Y = points[:,0]
-            FY = points[:,1]
-
-            # check validity: same shape
-            if Y.shape == FY.shape:
-                colorDataFY = np.interp(colorDataY, Y,FY)
-
-                # remove zeros
-                Ymin = np.amin(colorDataY[colorDataY>0])
-                colorDataY[colorDataY==0] = Ymin
-
-                # transform colorData
-                res.colorData[:,:,0] = res.colorData[:,:,0]*colorDataFY/colorDataY
-                res.colorData[:,:,1] = res.colorData[:,:,1]*colorDataFY/colorDataY
-                res.colorData[:,:,2] = res.colorData[:,:,2]*colorDataFY/colorDataY
+            colorDataY =    res.getY(decoding=False)
+
+            # tone curve: cached B-spline LUT
+            colorDataFY = curve.ToneCurve.get(kwargs).apply(colorDataY)
+
+            # remove zeros: min of positive luminance from cached statistics (shared with input image if not encoded)
+            statsY = res.getLuminanceStats(decoding=False)
+            if statsY.nbNonPositive > 0 and statsY.min() is not None: colorDataY = np.where(colorDataY==0, statsY.min(), colorDataY)
+
+            # transform colorData
+            res.colorData = np.multiply(res.colorData, (colorDataFY/colorDataY)[:,:,np.newaxis], out=self.outBuffer(res.colorData))
         
         end = timer()        
 
-        return res
+        return self.cast(res)
+
+    @staticmethod
+    def curvePoints(controlPoints):
+        """curvePoints: evaluate the B-spline tone curve defined by control points (see hdrCore.curve.ToneCurve).
+
+        Args:
+            controlPoints (dict, Required): control points
+                'start', 'shadows', 'blacks', 'mediums', 'whites', 'highlights', 'end': [x,y] in [0,100]
+
+        Returns:
+            (tuple(numpy.ndarray, numpy.ndarray)): Y, FY curve points in [0,1]
+        """
+        points = curve.ToneCurve.get(controlPoints).points/100
+        return points[:,0], points[:,1]
 # -----------------------------------------------------------------------------
 # --- Class saturation -------------------------------------------------------
 # -----------------------------------------------------------------------------
@@ -684,17 +725,13 @@ class saturation(Processing):
 
 
         # results image
-        res = copy.deepcopy(img)
+        res = self.output(img)
 
         value = kwargs["saturation"]
         if value != defaultValue['saturation']:
 
-            # go to Lab then Lch
-            if img.linear: 
-                colorLab = sRGB_to_Lab(res.colorData, apply_cctf_decoding=False)
-            else:
-                colorLab = sRGB_to_Lab(res.colorData, apply_cctf_decoding=True)
-            colorLCH = colour.Lab_to_LCHab(colorLab)
+            # go to Lab then Lch (cached by image)
+            colorLCH = np.array(res.getLCH(decoding=not img.linear))
 
             # saturation in Lch (chroma as saturation)
             gamma = 1/((value/25)+1) if value >= 0 else (-value/25)+1
@@ -712,14 +749,35 @@ class saturation(Processing):
         end = timer()
         print(" [PROCESS-PROFILING] (",end - start,")>> saturation(",img.name,"):", kwargs)
 
-        return res
+        return self.cast(res)
 # -----------------------------------------------------------------------------
 # --- Class colorEditor ------------------------------------------------------
 # -----------------------------------------------------------------------------
 class colorEditor(Processing):
     """
     TODO - Documentation de la classe colorEditor
+
+    Attributes:
+        imageMax (tuple(float,float)): max lightness and max chroma used to scale selection upper bounds,
+            if None (default) computed from input image
+
+    Class Attributes:
+        sparseCoverage (float): max fraction of selected pixels (mask > 0) for sparse processing: edits are computed
+            on selected pixels only, otherwise on the whole image
+
+    Methods:
+        compute             (hdrCore.image.Image) color editor operator
+        edit                (numpy.ndarray) edits blended by selection mask
+        selection           (numpy.ndarray, numpy.ndarray, numpy.ndarray, (float,float)) Lch data, selection mask and
+                            index (cached)
+
+    Static methods:
+        blend               (numpy.ndarray) blend edited and original data according to selection mask
+        selectionMask       (numpy.ndarray) trapezoidal lightness, chroma, hue selection mask
+        maxLightnessChroma  (tuple(float,float)) max lightness and max chroma of image
     """
+    imageMax = None
+    sparseCoverage = 0.5
     
     def compute(self,img, **kwargs):
         """color editor operator
@@ -750,108 +808,27 @@ class colorEditor(Processing):
 
 
         # results image
-        res = copy.deepcopy(img)
+        res = self.output(img)
 
         # computing
         if kwargs != defaultValue:
-            colorRGB = None
-            if res.colorSpace.name == 'Lch':
-                colorLCH = res.colorData
-            elif res.colorSpace.name == 'sRGB':
-
-                covnStart = timer()
-                if res.linear: 
-
-                    colorLab = sRGB_to_Lab(res.colorData, apply_cctf_decoding=False)
-                    colorLCH = colour.Lab_to_LCHab(colorLab)
-
-                else:
-
-                    colorLab = sRGB_to_Lab(res.colorData, apply_cctf_decoding=True)
-                    colorLCH = colour.Lab_to_LCHab(colorLab)
-                covnEnd = timer()
-
-            # selection from colorLCH
-            colorDataHue =          copy.deepcopy(colorLCH[:,:,2])
-            colorDataChroma =       copy.deepcopy(colorLCH[:,:,1])
-            colorDataLightness =    copy.deepcopy(colorLCH[:,:,0])
-
-            # selection mask
-            hMin, hMax = kwargs['selection']['hue'] if 'hue' in kwargs['selection'].keys() else defaultValue['selection']['hue']
-            cMin, cMax = kwargs['selection']['chroma'] if 'chroma' in kwargs['selection'].keys() else defaultValue['selection']['chroma']
-            lMin, lMax = kwargs['selection']['lightness']if 'hue' in kwargs['selection'].keys() else defaultValue['selection']['lightness']
-            # take into account Chroma, Lightness range
-            cMax = cMax*max(100.0,np.amax(colorDataChroma))/100.0
-            lMax = lMax*max(100.0,np.amax(colorDataLightness))/100.0
-
-            # tolerance
-            hueTolerance = kwargs['tolerance']*360      # hue range ~ 360
-            chromaTolerance = kwargs['tolerance']*100   # chroma range ~ 100
-            lightTolerance = kwargs['tolerance']*100    # lightness range ~ 100
-
-
+            # Lch data and selection mask (cached while input image, selection and tolerance are unchanged)
             maskStart = timer()
-
-            lightnessMask =     utils.NPlinearWeightMask(colorDataLightness, lMin, lMax, lightTolerance)
-            chromaMask =        utils.NPlinearWeightMask(colorDataChroma, cMin, cMax, chromaTolerance)
-            hueMask =           utils.NPlinearWeightMask(colorDataHue, hMin, hMax, hueTolerance)
-
+            colorLCH, mask, index, (lMin, lMax) = self.selection(img, kwargs['selection'], kwargs['tolerance'])
             maskEnd = timer()
 
-            mask = np.minimum(lightnessMask, np.minimum(chromaMask,hueMask))
-            compMask = 1.0 - mask
-            # hueShift (in Lch)
-            hueShift =  kwargs['edit']['hue']  if 'hue' in kwargs['edit'].keys() else defaultValue['edit']['hue']
-            if hueShift != 0.0:
-                colorLCH[:,:,2] = ((colorLCH[:,:,2]+hueShift)%360)*mask + colorLCH[:,:,2]*compMask
-
-            # saturation (in Lch)
-            saturation = kwargs['edit']['saturation'] if 'saturation' in kwargs['edit'].keys() else defaultValue['edit']['saturation']
-            if saturation != 0 :
-                gamma = 1/((saturation/25)+1) if saturation >= 0 else (-saturation/25)+1
-                colorLCH[:,:,1] =np.power(colorLCH[:,:,1]/100, gamma)*100*mask + colorLCH[:,:,1]*compMask
-
-            # exposure (in RGB)
-            ev =  kwargs['edit']['exposure'] if 'exposure' in kwargs['edit'].keys() else defaultValue['edit']['exposure']
-            if ev != 0.0 :
-                colorRGB = Lch_to_sRGB(colorLCH,apply_cctf_encoding=False, clip=False)
-                colorRGBev = copy.deepcopy(colorRGB*math.pow(2,ev))
-                colorRGBev[:,:,0] = colorRGBev[:,:,0]*mask
-                colorRGBev[:,:,1] = colorRGBev[:,:,1]*mask
-                colorRGBev[:,:,2] = colorRGBev[:,:,2]*mask
-
-                colorRGB[:,:,0] = colorRGB[:,:,0]*compMask
-                colorRGB[:,:,1] = colorRGB[:,:,1]*compMask
-                colorRGB[:,:,2] = colorRGB[:,:,2]*compMask
-                colorRGB = colorRGB + colorRGBev
-
-            # contrast (in RGB prime)
-            con =  kwargs['edit']['contrast'] if 'exposure' in kwargs['edit'].keys() else defaultValue['edit']['contrast']
-            if con != 0 :
-                con = con/100
-                maxContrastFactor = 2.0
-                if con>=0.0:
-                    scalingFactor = 1*(1-con)+maxContrastFactor*con
-                else:
-                    con = -con
-                    scalingFactor = 1*(1-con)+maxContrastFactor*con
-                    scalingFactor = 1/scalingFactor
-
-                pivot = math.pow(2,ev)*(lMin+lMax)/2/100
-
-                if not isinstance(colorRGB, np.ndarray):    colorRGB = Lch_to_sRGB(colorLCH,apply_cctf_encoding=True, clip=False)
-                else :                                      colorRGB = colour.cctf_encoding(colorRGB, function='sRGB')
-                
-                colorRGBcon = (colorRGB-pivot)*scalingFactor+pivot
-
-                colorRGB[:,:,0] = colorRGBcon[:,:,0]*mask+ colorRGB[:,:,0]*compMask
-                colorRGB[:,:,1] = colorRGBcon[:,:,1]*mask+ colorRGB[:,:,1]*compMask
-                colorRGB[:,:,2] = colorRGBcon[:,:,2]*mask+ colorRGB[:,:,2]*compMask
-
-                colorRGB = colour.cctf_decoding(colorRGB, function='sRGB')
+            edit = dict(defaultValue['edit'], **kwargs['edit'])
+            if (index is not None) and (not kwargs['mask']):
+                # sparse: only selected pixels are edited, other pixels are input pixels (as linear sRGB)
+                if img.colorSpace.name == 'Lch':    colorRGB = Lch_to_sRGB(colorLCH,apply_cctf_encoding=False, clip=False).astype(self.dtype)
+                elif img.linear:                    colorRGB = np.array(img.colorData, dtype=self.dtype)
+                else:                               colorRGB = colour.cctf_decoding(img.colorData, function='sRGB').astype(self.dtype)
+                nbSelected = index.size
+                colorRGBselected = self.edit(colorLCH.reshape(-1,3)[index].reshape(nbSelected,1,3), mask.reshape(-1)[index].reshape(nbSelected,1), edit, lMin, lMax)
+                colorRGB.reshape(-1,3)[index] = colorRGBselected.reshape(nbSelected,3)
+            else:
+                colorRGB = self.edit(colorLCH, mask, edit, lMin, lMax)
 
-            # final step
-            if not isinstance(colorRGB, np.ndarray): colorRGB = Lch_to_sRGB(colorLCH,apply_cctf_encoding=False, clip=False)
             res.colorData = colorRGB
             res.colorSpace = image.ColorSpace.build('sRGB')
             res.linear = True
@@ -867,9 +844,8 @@ class colorEditor(Processing):
 
         showMask = kwargs['mask']
         if showMask:
-            res.colorData[:,:,0] = copy.deepcopy(mask)
-            res.colorData[:,:,1] = copy.deepcopy(mask)
-            res.colorData[:,:,2] = copy.deepcopy(mask)
+            if mask is None: mask = np.ones(res.colorData.shape[:2], dtype=np.float32)     # full range selection
+            res.colorData = np.dstack((mask, mask, mask))
 
             res.colorSpace = image.ColorSpace.build('sRGB')
             res.linear = False
@@ -877,7 +853,163 @@ class colorEditor(Processing):
         end = timer()
         print(" [PROCESS-PROFILING](",end - start,") >> colorEditor(",img.name,"):", kwargs)
 
-        return res
+        return self.cast(res)
+
+    def edit(self, colorLCH, mask, edit, lMin, lMax):
+        """edit: hue shift and saturation (Lch), exposure (linear sRGB) and contrast (sRGB prime) blended by selection mask
+
+        Args:
+            colorLCH (numpy.ndarray, Required): ... x 3 Lch data (not modified)
+            mask (numpy.ndarray or None, Required): selection mask (colorLCH shape without last axis), None: full range
+            edit (dict, Required): {'hue': float, 'exposure': float, 'contrast': float, 'saturation': float}
+            lMin, lMax (float, Required): selection lightness range (contrast pivot)
+
+        Returns:
+            (numpy.ndarray): linear sRGB data
+        """
+        colorRGB = None
+
+        # Lch edits: writable copy
+        if (edit['hue'] != 0.0) or (edit['saturation'] != 0.0): colorLCH = np.array(colorLCH)
+
+        # hueShift (in Lch)
+        hueShift =  edit['hue']
+        if hueShift != 0.0:
+            colorLCH[:,:,2] = colorEditor.blend((colorLCH[:,:,2]+hueShift)%360, colorLCH[:,:,2], mask)
+
+        # saturation (in Lch)
+        saturation = edit['saturation']
+        if saturation != 0 :
+            gamma = 1/((saturation/25)+1) if saturation >= 0 else (-saturation/25)+1
+            colorLCH[:,:,1] = colorEditor.blend(np.power(colorLCH[:,:,1]/100, gamma)*100, colorLCH[:,:,1], mask)
+
+        # exposure (in RGB)
+        ev =  edit['exposure']
+        if ev != 0.0 :
+            colorRGB = Lch_to_sRGB(colorLCH,apply_cctf_encoding=False, clip=False)
+            colorRGB = colorEditor.blend(colorRGB*math.pow(2,ev), colorRGB, mask)
+
+        # contrast (in RGB prime)
+        con =  edit['contrast']
+        if con != 0 :
+            con = con/100
+            maxContrastFactor = 2.0
+            if con>=0.0:
+                scalingFactor = 1*(1-con)+maxContrastFactor*con
+            else:
+                con = -con
+                scalingFactor = 1*(1-con)+maxContrastFactor*con
+                scalingFactor = 1/scalingFactor
+
+            pivot = math.pow(2,ev)*(lMin+lMax)/2/100
+
+            if not isinstance(colorRGB, np.ndarray):    colorRGB = Lch_to_sRGB(colorLCH,apply_cctf_encoding=True, clip=False)
+            else :                                      colorRGB = colour.cctf_encoding(colorRGB, function='sRGB')
+            
+            colorRGB = colorEditor.blend((colorRGB-pivot)*scalingFactor+pivot, colorRGB, mask)
+
+            colorRGB = colour.cctf_decoding(colorRGB, function='sRGB')
+
+        # final step
+        if not isinstance(colorRGB, np.ndarray): colorRGB = Lch_to_sRGB(colorLCH,apply_cctf_encoding=False, clip=False)
+        return colorRGB
+
+    def selection(self, img, selection, tolerance):
+        """selection: Lch data and selection mask of input image
+            the result is cached: edit only parameter changes (hue, saturation, exposure, contrast) do not recompute it.
+            cache key: (input image dataVersion, color space, linear, selection, tolerance, imageMax)
+
+        Args:
+            img (hdrCore.image.Image, Required): input image (sRGB or Lch)
+            selection (dict, Required): {'lightness': (min,max), 'chroma': (min,max), 'hue': (min,max)}
+            tolerance (float, Required): tolerance (fraction of range)
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray or None, numpy.ndarray or None, (float,float)): read-only Lch data, read-only 
+                mask (None: full range selection), flat index of selected pixels (None: coverage above 
+                colorEditor.sparseCoverage), lightness range (max scaled by image max lightness)
+        """
+        key = (img.dataVersion, img.colorSpace.name, img.linear, repr(selection), tolerance, self.imageMax)
+        cache = getattr(self, '_selectionCache', None)
+        if cache and (cache[0] == key): return cache[1:]
+
+        defaultSelection = {'lightness': (0,100),'chroma': (0,100),'hue':(0,360)}
+        if img.colorSpace.name == 'Lch':    colorLCH = img.colorData
+        else:                               colorLCH = img.getLCH(decoding=not img.linear)     # cached by image
+
+        hMin, hMax = selection['hue'] if 'hue' in selection.keys() else defaultSelection['hue']
+        cMin, cMax = selection['chroma'] if 'chroma' in selection.keys() else defaultSelection['chroma']
+        lMin, lMax = selection['lightness'] if 'lightness' in selection.keys() else defaultSelection['lightness']
+        # take into account Chroma, Lightness range
+        maxLightness, maxChroma = self.imageMax if self.imageMax else (np.amax(colorLCH[:,:,0]), np.amax(colorLCH[:,:,1]))
+        cMax = cMax*max(100.0,maxChroma)/100.0
+        lMax = lMax*max(100.0,maxLightness)/100.0
+
+        # tolerance
+        hueTolerance = tolerance*360      # hue range ~ 360
+        chromaTolerance = tolerance*100   # chroma range ~ 100
+        lightTolerance = tolerance*100    # lightness range ~ 100
+
+        mask = colorEditor.selectionMask(colorLCH, (lMin, lMax, lightTolerance), (cMin, cMax, chromaTolerance), (hMin, hMax, hueTolerance), (maxLightness, maxChroma))
+
+        # index of selected pixels if coverage is low (sparse processing)
+        index = None
+        if mask is not None:
+            mask.flags.writeable = False
+            if np.count_nonzero(mask) <= colorEditor.sparseCoverage*mask.size: index = np.flatnonzero(mask)
+
+        self._selectionCache = (key, colorLCH, mask, index, (lMin, lMax))
+        return self._selectionCache[1:]
+
+    @staticmethod
+    def blend(edited, original, mask):
+        """blend: edited*mask + original*(1-mask), edited if mask is None (full range selection)
+
+        Args:
+            edited (numpy.ndarray, Required): edited data (h x w or h x w x 3)
+            original (numpy.ndarray, Required): original data (same shape)
+            mask (numpy.ndarray or None, Required): h x w selection mask
+
+        Returns:
+            (numpy.ndarray)
+        """
+        if mask is None: return edited
+        if edited.ndim == 3: mask = mask[:,:,np.newaxis]
+        return edited*mask + original*(1.0 - mask)
+
+    @staticmethod
+    def selectionMask(colorLCH, lightness, chroma, hue, imageMax):
+        """selectionMask: trapezoidal selection mask (single pass numba kernel, see numbafun.numba_selection_mask)
+
+        Args:
+            colorLCH (numpy.ndarray, Required): Lch data
+            lightness, chroma, hue (tuple(float,float,float), Required): min, max and tolerance
+                hue min > hue max selects hues across 0/360
+            imageMax (tuple(float,float), Required): max lightness and max chroma of image
+
+        Returns:
+            (numpy.ndarray or None): float32 mask, None if the selection covers the full range (mask = 1)
+        """
+        (lMin, lMax, lTol), (cMin, cMax, cTol), (hMin, hMax, hTol) = lightness, chroma, hue
+        hueRange = (hMax - hMin) if hMax >= hMin else (hMax + 360 - hMin)
+        if (lMin <= 0) and (lMax >= imageMax[0]) and (cMin <= 0) and (cMax >= imageMax[1]) and (hueRange >= 360): return None
+
+        mask = np.empty(colorLCH.shape[:2], dtype=np.float32)
+        return numbafun.numba_selection_mask(colorLCH, float(lMin), float(lMax), float(lTol), float(cMin), float(cMax), float(cTol), 
+                                             float(hMin), float(hMax), float(hTol), mask)
+
+    @staticmethod
+    def maxLightnessChroma(img):
+        """maxLightnessChroma: max lightness and max chroma of image (see colorEditor.imageMax)
+
+        Args:
+            img (hdrCore.image.Image, Required): input image of color editor
+
+        Returns:
+            (tuple(float,float)): max lightness, max chroma
+        """
+        colorLCH = img.getLCH(decoding=not img.linear)
+        return np.amax(colorLCH[:,:,0]), np.amax(colorLCH[:,:,1])
 # -----------------------------------------------------------------------------
 # --- Class lightnessMask ----------------------------------------------------
 # -----------------------------------------------------------------------------
@@ -917,15 +1049,17 @@ class lightnessMask(Processing):
             kwargs = defaultMask  # Use default values if no kwargs provided
         
         # Results image
-        res = copy.deepcopy(img)
+        res = self.output(img)
 
         if kwargs != defaultMask:
             if img.linear:
                 res.colorData = colour.cctf_encoding(res.colorData, function='sRGB')  # Encode to prime
                 res.linear = False
 
-            colorDataY = sRGB_to_XYZ(res.colorData, apply_cctf_decoding=False)[:, :, 1]
-            mask = copy.deepcopy(res.colorData)
+            colorDataY = res.getY(decoding=False)
+            mask = self.outBuffer(res.colorData)
+            if mask is None:    mask = np.copy(res.colorData)
+            else:               np.copyto(mask, res.colorData)
 
             for key in rangeMask.keys():
                 if kwargs.get(key, False):  # Mask on
@@ -936,7 +1070,7 @@ class lightnessMask(Processing):
         end = timer()
         print(f" [PROCESS-PROFILING] ({end - start}) >> lightnessMask({res.name}): {kwargs}")
 
-        return res
+        return self.cast(res)
 
 # -----------------------------------------------------------------------------
 # --- Class geometry ---------------------------------------------------------
@@ -945,6 +1079,7 @@ class geometry(Processing):
     """
     TODO - Documentation de la classe geometry
     """
+    pointwise = False
     
     def compute(self, img, **kwargs): 
         """geometry operator.
@@ -969,36 +1104,64 @@ class geometry(Processing):
         rotation =  kwargs['rotation']  if 'rotation' in kwargs.keys()  else defaultValue['rotation']
 
         # results image
-        res = copy.deepcopy(img)
+        res = self.output(img)
 
         ##if kwargs != defaultValue:
         h,w, c = res.colorData.shape
-        imgRatio = w/h
+        top, bottom, left, right = geometry.cropWindow(h, w, ratio, up)
+        if (top, bottom, left, right) != (0, h, 0, w):
+            res.colorData = res.colorData[top:bottom, left:right, :]
+            res.shape = res.colorData.shape
+
+        if rotation != 0 :
+            res.colorData = geometry.rotate(res.ensureWritable().colorData, rotation)
+            res.shape = res.colorData.shape
+
+        end = timer()
+        if pref.verbose: print(" [PROCESS-PROFILING] (",end-start,")>> geometry(",res.name,"):", kwargs)
+
+        return self.cast(res)
+
+    @staticmethod
+    def cropWindow(h, w, ratio=(16,9), up=0):
+        """cropWindow: crop window (before rotation) of geometry operator for a h x w image.
 
+        Args:
+            h, w (int, Required): image height and width
+            ratio ((int,int), Optional): target aspect ratio
+            up (int, Optional): vertical shift in percent
+
+        Returns:
+            (int, int, int, int): top, bottom, left, right
+        """
+        imgRatio = w/h
         if int(imgRatio*1000) != int(ratio[0]/ratio[1]*1000):
             if imgRatio < (ratio[0]/ratio[1]):
                 hh16x9 = int(w*ratio[1]/ratio[0]/2)
                 ch = h//2
                 up = int((h//2-hh16x9)*up/100)
-                res.colorData = res.colorData[(ch-hh16x9-up):(ch+hh16x9-up),:,:]
-                res.shape = res.colorData.shape
+                return (ch-hh16x9-up, ch+hh16x9-up, 0, w)
             else:
                 ww16x9 = int(h*ratio[0]/ratio[1]/2)
                 ch = w//2
-                res.colorData = res.colorData[:,(ch-ww16x9):(ch+ww16x9),:]
-                res.shape = res.colorData.shape
+                return (0, h, ch-ww16x9, ch+ww16x9)
+        return (0, h, 0, w)
 
-        if rotation != 0 :
-            res.colorData = skimage.transform.rotate(res.colorData, rotation, clip = False, resize=False)
-            h,w, _ = res.colorData.shape
-            hh,ww = utils.croppRotated(h,w,rotation)
-            res.colorData = res.colorData[int(h/2-hh/2):int(h/2+hh/2), int(w/2-ww/2):int(w/2+ww/2),:]
-            res.shape = res.colorData.shape
+    @staticmethod
+    def rotate(colorData, rotation):
+        """rotate: rotation of geometry operator (after crop), result is cropped to largest inner rectangle.
 
-        end = timer()
-        if pref.verbose: print(" [PROCESS-PROFILING] (",end-start,")>> geometry(",res.name,"):", kwargs)
+        Args:
+            colorData (numpy.ndarray, Required): writable image data
+            rotation (float, Required): angle in degrees
 
-        return res
+        Returns:
+            (numpy.ndarray)
+        """
+        colorData = skimage.transform.rotate(colorData, rotation, clip = False, resize=False)
+        h,w, _ = colorData.shape
+        hh,ww = utils.croppRotated(h,w,rotation)
+        return colorData[int(h/2-hh/2):int(h/2+hh/2), int(w/2-ww/2):int(w/2+ww/2),:]
 # -----------------------------------------------------------------------------
 
 # -----------------------------------------------------------------------------
@@ -1021,27 +1184,89 @@ class ProcessPipe(object):
         autoResize (boolean): True resize automatically image for faster computation
         maxSize (int): 
         maxWorking (int):       
+        executionMode (str): execution mode of process nodes (see Processing.executionMode), default 'cow'
+            'inplace' is for one shot computation (export): nodes modify the output of previous node so all nodes 
+            require update after computation
+        lutSize (int): number of nodes per axis of baked 3D LUT (33 or 65)
+        lutStops (float): dynamic range (in stops) of the log2 shaper used for HDR images
+        lutInterpolation (str): 'tetrahedral' or 'trilinear'
+        lutPreview (bool): True renders previews with baked 3D LUT when possible (see isBakeable)
+        exportBudget (int): working memory budget (bytes) of tiled export, None: export computed on whole image
+        exportBytesPerPixel (int): estimated working memory per pixel of a band (intermediate images, LCH, masks)
+        previewLevels (list[int]): sizes of coarse preview levels (below maxWorking) computed first by computePreview
+        dtype (numpy.dtype): floating point type of input image and process nodes output (precision policy)
+        cacheDtype (numpy.dtype): if not None (e.g. numpy.float16) floating point type used to store intermediate
+            outputs of process nodes (cast back to dtype when used as input), not used in 'inplace' execution mode
+        processNames (dict): process node names (metadata) to processing class (see fromDict)
+        fusedStages (list[str]): process node names of the fused kernel, in kernel order (see isFusable)
 
     Methods:
         append:                 (int) append a process node (ProcessNode) to process pipe (self)
         getName:                (str) return image name associated to processpipe
         setImage:               ()
         getInputImage           ()
-        compute                 ()
+        compute                 (bool) compute the process pipe, False if cancelled
+        isFusable               (bool) True if the process pipe can be computed by the fused kernel (hdrCore.coreC)
+        isActive                (bool) False if a process node is an identity (static)
+        nodeInput               (hdrCore.image.Image) output of a process node cast to dtype
+        computePreview          () progressive preview: coarse levels first, finer levels in background
+        buildPyramid            () build coarse preview levels
+        bakeLUT                 (hdrCore.lut.LUT3D) bake pointwise process nodes into a 3D LUT
+        computeLUT              () compute output image using baked 3D LUT (preview)
+        isBakeable              (bool) True if the preview can be computed with baked 3D LUT
+        setColorEditorsMax      () set color editors selection scaling from a whole image
+        isTileable              (bool) True if the process pipe can be computed by tiles
+        computeTiled            (hdrCore.image.Image) memory-bounded computation by bands (export)
         setParameters           ()
         getParameters           ()
         getProcessNodeByName    ()
         __repr__                (str)
         __str__                 (str)
+        toDict                  (list[dict]) dict representation of process nodes ('processpipe' metadata)
         updateProcessPipeMetadata ()
         updateHDRuseCase        ()
         export                  ()
+
+    Static methods:
+        fromDict                (ProcessPipe) build a process pipe from its dict representation
     """
     
     # autoresizing for fast computation
     autoResize =    True
     maxSize =       1200 
     maxWorking =    1200 #800
+    executionMode = 'cow'
+
+    # 3D LUT for preview
+    lutSize =           33
+    lutStops =          16
+    lutInterpolation =  'tetrahedral'
+    lutPreview =        True
+
+    # tiled export
+    exportBudget =          512*1024*1024
+    exportBytesPerPixel =   3*8*12
+
+    # progressive preview
+    previewLevels = [300, 600]
+
+    # precision policy
+    dtype =         np.float32
+    cacheDtype =    None
+
+    # process node names (metadata) to processing class, see fromDict
+    processNames = {
+        'exposure':         exposure,
+        'contrast':         contrast,
+        'tonecurve':        Ycurve,
+        'lightnessmask':    lightnessMask,
+        'saturation':       saturation,
+        'colorEditor':      colorEditor,
+        'geometry':         geometry
+        }
+
+    # fused kernel stages (hdrCore.coreC.coreCcompute), in kernel order
+    fusedStages = ['exposure', 'contrast', 'tonecurve', 'lightnessmask', 'saturation', 'colorEditor']
      
     # -------------------------------------------------------------------------
     # --- Class ProcessNode --------------------------------------------------
@@ -1056,6 +1281,8 @@ class ProcessPipe(object):
             defaultParams (dict):
             requireUpdate (bool):
             outputImage (hdrCore.image.Image):   
+            castImage (hdrCore.image.Image): outputImage cast to pipe dtype (see ProcessPipe.nodeInput)
+            castKey (tuple): (outputImage dataVersion, dtype, castImage dataVersion)
             
         Methods:
             compute 
@@ -1081,6 +1308,8 @@ class ProcessPipe(object):
             self.defaultParams = copy.deepcopy(paramDict)
             self.requireUpdate = True # require a first process
             self.outputImage = None # store results image (Image)
+            self.castImage = None   # outputImage cast to pipe dtype, same Image while outputImage is unchanged
+            self.castKey = None
 
         def compute(self,img):
 
@@ -1123,6 +1352,14 @@ class ProcessPipe(object):
         self.previewHDR = True
         self.previewHDR_process = None
 
+        self.lut = None         # baked 3D LUT (hdrCore.lut.LUT3D)
+        self.lutKey = None      # parameters and input image of baked LUT
+
+        self.pyramid = None                     # coarse preview levels ([ProcessPipe]), see buildPyramid
+        self.generation = 0                     # incremented by each change (image, parameters): cancels previews
+        self.previewLock = threading.Lock()     # held while finer preview levels are computed
+        self.lock = threading.RLock()           # pipe state (images, parameters, node outputs): setImage, setParameters, compute steps
+
     def append(self,process,paramDict=None,name=None):
         """
         TODO - Documentation de la méthode append
@@ -1177,10 +1414,10 @@ class ProcessPipe(object):
             elif (width>=height) and (width>ProcessPipe.maxWorking):   
                 img = img.process(resize(),size=(None,ProcessPipe.maxWorking))
 
-        self.originalImage= copy.deepcopy(img)
+        originalImage = self.copyImage(img)
 
         # a copy is set as __outputImage
-        self.__outputImage = copy.deepcopy(img)
+        outputImage = self.copyImage(img)
      
         if not img.linear: 
 
@@ -1202,31 +1439,53 @@ class ProcessPipe(object):
 
             dt = timer() - start
 
-        # input image is set as __inputImage
-        self.__inputImage = img
+        if np.issubdtype(img.colorData.dtype, np.floating) and (img.colorData.dtype != self.dtype):
+            img.colorData = img.colorData.astype(self.dtype)
+
+        with self.lock:
+            self.originalImage = originalImage
+            self.__outputImage = outputImage
 
-        # requireUpdate is set to True
-        for processNode in self.processNodes: processNode.requireUpdate = True
+            # input image is set as __inputImage
+            self.__inputImage = img
+            self.pyramid = None
 
-        # recover medata to initialize processPipe
-        if 'processpipe' in img.metadata.metadata:
-            processpipeMetadata = img.metadata.metadata['processpipe']
+            # requireUpdate is set to True
+            for processNode in self.processNodes: processNode.requireUpdate = True
 
-            if isinstance(processpipeMetadata,list):
-                for pMeta in processpipeMetadata:
+            # recover medata to initialize processPipe
+            if img.metadata and ('processpipe' in img.metadata.metadata):
+                processpipeMetadata = img.metadata.metadata['processpipe']
 
-                    key = list(pMeta.keys())[0]
-                    param = pMeta[key]
-                    idProcess = self.getProcessNodeByName(key)
-                    if idProcess != -1:
-                        self.setParameters(idProcess,param)
+                if isinstance(processpipeMetadata,list):
+                    for pMeta in processpipeMetadata:
+
+                        key = list(pMeta.keys())[0]
+                        param = pMeta[key]
+                        idProcess = self.getProcessNodeByName(key)
+                        if idProcess != -1:
+                            self.setParameters(idProcess,param)
+
+            # last: a render started with this generation uses this image and its parameters
+            self.generation += 1
 
     def setOutput(self, img):
         """setOuput: set the output image
         """
-        self.__outputImage = copy.deepcopy(img)
+        self.__outputImage = self.copyImage(img)
         pass
 
+    def copyImage(self, img):
+        """copyImage: copy of image according to executionMode: deep copy ('copy') or copy-on-write copy
+
+        Args:
+            img (hdrCore.image.Image, Required): image
+
+        Returns:
+            (hdrCore.image.Image)
+        """
+        return copy.deepcopy(img) if self.executionMode == 'copy' else img.copy()
+
     def getInputImage(self):
         """return input image
         
@@ -1247,29 +1506,33 @@ class ProcessPipe(object):
             TODO
                 TODO
         """
+        with self.lock: return self.__getImage(toneMap)
+
+    def __getImage(self,toneMap):
+        # see getImage (pipe lock held)
         if isinstance(self.originalImage, image.Image): # if pipe has an image
             # conditionnal encoding or decoding to prime, linear
 
             if (not self.originalImage.linear) and self.__outputImage.linear:
-                self.__outputImage.colorData = colour.cctf_encoding(self.__outputImage.colorData, function='sRGB')
+                self.__outputImage.colorData = colour.cctf_encoding(self.__outputImage.colorData, function='sRGB').astype(self.dtype, copy=False)
                 self.__outputImage.linear =  False
 
                 if pref.verbose: print(" [PROCESS] >> ProcessPipe.getImage(",self.__outputImage.name,", toneMap:",toneMap,"): encode to sRGB !")
 
             elif self.__outputImage.isHDR() and self.__outputImage.linear and toneMap:
-                self.__outputImage.colorData = colour.cctf_encoding(self.__outputImage.colorData, function='sRGB')
+                self.__outputImage.colorData = colour.cctf_encoding(self.__outputImage.colorData, function='sRGB').astype(self.dtype, copy=False)
                 self.__outputImage.linear =  False
 
                 if pref.verbose: print(" [PROCESS] >> ProcessPipe.getImage(",self.__outputImage.name,", ,toneMap:",toneMap,"): tone map using cctf encoding !")
 
             elif self.__outputImage.isHDR() and (not self.__outputImage.linear) and (not toneMap):
-                self.__outputImage.colorData = colour.cctf_decoding(self.__outputImage.colorData, function='sRGB')
+                self.__outputImage.colorData = colour.cctf_decoding(self.__outputImage.colorData, function='sRGB').astype(self.dtype, copy=False)
                 self.__outputImage.linear =  True
 
                 if pref.verbose: print(" [PROCESS] >> ProcessPipe.getImage(",self.__outputImage.name,", toneMap:",toneMap,"): decoding to linear colorspace !")
 
             elif (not self.__outputImage.linear) and (not toneMap):
-                self.__outputImage.colorData = colour.cctf_decoding(self.__outputImage.colorData, function='sRGB')
+                self.__outputImage.colorData = colour.cctf_decoding(self.__outputImage.colorData, function='sRGB').astype(self.dtype, copy=False)
                 self.__outputImage.linear =  True
 
                 if pref.verbose: print(" [PROCESS] >> ProcessPipe.getImage(",self.__outputImage.name,", toneMap:",toneMap,"): decoding to linear colorspace !")
@@ -1280,36 +1543,391 @@ class ProcessPipe(object):
             return self.__outputImage
         else: return None
 
-    def compute(self,progress=None):
+    def compute(self,progress=None,cancel=None):
         """compute the processpipe
+            the pipe lock is held for each process node: setImage and setParameters wait for the node in progress.
+            when pref.computation is not 'python' and the process pipe is fusable (see isFusable), the output is computed
+            in a single pass by the fused kernel (see hdrCore.coreC.coreCcompute).
 
         Args:
             progress: (object with showMessage and repaint method) object used to display progress
+            cancel: (callable, Optional) checked before each process node (pipe lock held), computation stops when it returns True
 
         Returns:
-                
+            (bool): False if computation has been cancelled
         """
-        if self.__inputImage:
-
-            if len(self.processNodes)>0: 
-                # first node
+        with self.lock:
+            if not self.__inputImage: return True
+            if pref.computation != 'python' and self.processNodes and self.isFusable(): return self.__computeFused(progress, cancel)
+
+            # intermediate outputs are stored with cacheDtype, last output with dtype
+            cacheDtype = self.cacheDtype if (self.cacheDtype and self.executionMode != 'inplace') else self.dtype
+            for processNode in self.processNodes: 
+                processNode.process.executionMode = self.executionMode
+                processNode.process.dtype = cacheDtype
+            if len(self.processNodes)>0: self.processNodes[-1].process.dtype = self.dtype
+
+        for i,processNode in enumerate(self.processNodes):
+            with self.lock:
+                if cancel and cancel():
+                    # output of previous node may have been computed with outdated parameters
+                    if i>0: self.processNodes[i-1].requireUpdate = True
+                    return False
                 if progress:
-                    progress.showMessage('computing: '+self.processNodes[0].name+' start!')
+                    progress.showMessage('computing: '+processNode.name+' start!')
                     progress.repaint()
-                self.processNodes[0].condCompute(self.__inputImage)
+                if i == 0:
+                    if self.executionMode == 'inplace':
+                        # input image must not be modified: first write copies it
+                        for node in self.processNodes: node.requireUpdate = True
+                        processNode.condCompute(self.__inputImage.copy())
+                    else:
+                        processNode.condCompute(self.__inputImage)
+                elif processNode.requireUpdate: processNode.condCompute(self.nodeInput(self.processNodes[i-1]))
                 if progress:
-                    progress.showMessage('computing: '+self.processNodes[0].name+' done!')
+                    progress.showMessage('computing: '+processNode.name+' done!')
                     progress.repaint()
-                # other nodes
-                for i,processNode in enumerate(self.processNodes[1:]):
-                    if progress:
-                        progress.showMessage('computing: '+processNode.name+' start!')
-                        progress.repaint()
-                    processNode.condCompute(self.processNodes[i].outputImage)
-                    if progress:
-                        progress.showMessage('computing: '+processNode.name+' done!')
-                        progress.repaint()
+
+        with self.lock:
+            if len(self.processNodes)>0:
+                if cancel and cancel():
+                    self.processNodes[-1].requireUpdate = True
+                    return False
             self.__outputImage=self.processNodes[-1].outputImage
+        return True
+
+    def __computeFused(self, progress, cancel):
+        # see compute (pipe lock held): intermediate outputs are not computed, the last node stores the output
+        if cancel and cancel(): return False
+        if progress:
+            progress.showMessage('computing: fused process pipe start!')
+            progress.repaint()
+
+        res = hdrCore.coreC.coreCcompute(self.copyImage(self.__inputImage), self)
+        if res.colorData.dtype != self.dtype: res.colorData = res.colorData.astype(self.dtype)
+
+        for node in self.processNodes[:-1]: node.requireUpdate = True
+        self.processNodes[-1].outputImage, self.processNodes[-1].requireUpdate = res, False
+        self.__outputImage = res
+
+        if progress:
+            progress.showMessage('computing: fused process pipe done!')
+            progress.repaint()
+        return True
+
+    def isFusable(self):
+        """True if the process pipe can be computed by the fused kernel (see hdrCore.coreC.coreCcompute): the kernel applies
+            exposure, contrast, tone curve, lightness mask, saturation and 5 color editors in this fixed order, so
+            - process node names (trailing digits ignored, see fromDict) are fusedStages names
+            - active process nodes (see isActive) are in kernel order: at most one of each stage, at most 5 color editors
+            - inactive process nodes are identities, they are ignored
+        """
+        last, editors = -1, 0
+        for node in self.processNodes:
+            name = node.name.rstrip('0123456789')
+            if (name not in ProcessPipe.fusedStages) or not isinstance(node.process, ProcessPipe.processNames[name]): return False
+            if not ProcessPipe.isActive(node): continue
+            stage = ProcessPipe.fusedStages.index(name)
+            if name == 'colorEditor':
+                editors += 1
+                if (editors > 5) or (stage < last): return False
+            elif stage <= last: return False
+            last = stage
+        return True
+
+    @staticmethod
+    def isActive(node):
+        """False if a process node is an identity with its current parameters (e.g. exposure with 0 EV), True otherwise.
+
+        Args:
+            node (ProcessPipe.ProcessNode, Required): process node
+
+        Returns:
+            (bool)
+        """
+        if isinstance(node.process, exposure):      return bool(node.params.get('EV', 0.0))
+        if isinstance(node.process, colorEditor):   return bool(node.params.get('mask', False) or any(node.params.get('edit', {}).values()))
+        if isinstance(node.process, lightnessMask): return any(node.params.values())
+        if isinstance(node.process, saturation):    return bool(node.params.get('saturation', 0.0))
+        if isinstance(node.process, contrast):      return bool(node.params.get('contrast', 0.0))
+        if isinstance(node.process, Ycurve):        return any(point[0] != point[1] for point in node.params.values())
+        return True
+
+    def nodeInput(self, processNode):
+        """output image of a process node as input of the next node: cast to dtype if stored with cacheDtype.
+
+        Args:
+            processNode (ProcessNode, Required): process node
+
+        Returns:
+            (hdrCore.image.Image)
+        """
+        img = processNode.outputImage
+        if np.issubdtype(img.colorData.dtype, np.floating) and (img.colorData.dtype != self.dtype):
+            # cached per output version: same Image (and dataVersion) for downstream caches, e.g. colorEditor selection
+            # (cast image modified in place since: cast again)
+            key = (img.dataVersion, np.dtype(self.dtype))
+            if (processNode.castKey is None) or (processNode.castKey[:2] != key) or (processNode.castKey[2] != processNode.castImage.dataVersion):
+                processNode.castImage = img.copy()
+                processNode.castImage.colorData = img.colorData.astype(self.dtype)
+                processNode.castKey = key + (processNode.castImage.dataVersion,)
+            img = processNode.castImage
+        return img
+
+    def buildPyramid(self):
+        """build coarse preview levels: one process pipe per size of ProcessPipe.previewLevels smaller than the input image
+            level pipes have their own process nodes (and output cache) with the parameters of self, their input image
+            is resized from self input image.
+        """
+        self.pyramid = []
+        if not isinstance(self.__inputImage, image.Image): return
+
+        height, width, _ = self.__inputImage.shape
+        for size in sorted(ProcessPipe.previewLevels or []):
+            if size >= max(height, width): break
+            level = ProcessPipe()
+            level.executionMode = self.executionMode
+            level.dtype, level.cacheDtype = self.dtype, self.cacheDtype
+            for node in self.processNodes: level.append(type(node.process)(), paramDict=node.params, name=node.name)
+            levelImage = self.__inputImage.process(resize(), size=(size,None) if height >= width else (None,size))
+            level.originalImage = self.originalImage
+            level.__inputImage = levelImage
+            level.__outputImage = levelImage
+            self.pyramid.append(level)
+
+    def computePreview(self, callback, toneMap=True, background=True):
+        """progressive preview of the process pipe
+            the coarsest level (see ProcessPipe.previewLevels) is computed first, then finer levels up to self
+            (maxWorking size) in a background thread, each output is sent to callback as it is ready.
+            Any change of parameters or input image (setParameters, setImage) cancels the levels not yet computed.
+
+        Args:
+            callback (callable, Required): called with (output image, level index, final), final is True for the last
+                level (self)
+                with background=True, called from the background thread for finer levels
+            toneMap (bool, Optional): see getImage
+            background (bool, Optional): compute finer levels in a background thread
+        """
+        # snapshot of levels and generation (pipe lock held: setImage and setParameters update the pyramid)
+        with self.lock:
+            if not isinstance(self.__inputImage, image.Image): return
+            if (self.pyramid is None) or any(len(level.processNodes) != len(self.processNodes) for level in self.pyramid): self.buildPyramid()
+            generation = self.generation
+            levels = self.pyramid + [self]
+        cancel = lambda: self.generation != generation
+
+        # coarsest level
+        with levels[0].previewLock:
+            if levels[0].compute(cancel=cancel): callback(levels[0].getImage(toneMap=toneMap), 0, len(levels) == 1)
+
+        def refine():
+            with self.previewLock:
+                for i, level in enumerate(levels[1:], 1):
+                    if cancel(): return
+                    if level.compute(cancel=cancel): callback(level.getImage(toneMap=toneMap), i, i == len(levels)-1)
+
+        if len(levels) > 1:
+            if background: threading.Thread(target=refine, daemon=True).start()
+            else: refine()
+
+    def bakeLUT(self, size=None):
+        """bake pointwise process nodes into a 3D LUT
+            the LUT is re-baked only when parameters or input image change.
+            HDR images use a log2 shaper (ProcessPipe.lutStops below input max), SDR images the sRGB cctf.
+            Non pointwise nodes (geometry, resize) are skipped.
+
+        Args:
+            size (int, Optional): number of nodes per axis, default ProcessPipe.lutSize
+
+        Returns:
+            (hdrCore.lut.LUT3D): LUT mapping linear input RGB to linear output RGB
+        """
+        if not isinstance(self.__inputImage, image.Image): return None
+        if not size: size = ProcessPipe.lutSize
+
+        key = (size, repr(self.toDict()), self.__inputImage.dataVersion)
+        if self.lut and (self.lutKey == key): return self.lut
+
+        start = timer()
+        inputImage = self.__inputImage
+        nodes = [node for node in self.processNodes if node.process.pointwise]
+
+        # color editors: selection scaling by image max (not grid max)
+        self.setColorEditorsMax(inputImage, nodes)
+
+        # domain and shaper
+        if inputImage.isHDR():
+            hi = max(1.0, float(np.amax(inputImage.colorData)))
+            shaper, domain = 'log2', (hi/2**ProcessPipe.lutStops, hi)
+        else:
+            shaper, domain = 'sRGB', (0.0, 1.0)
+
+        # process LUT nodes as an image
+        grid = lut.LUT3D.grid(size, shaper, domain)
+        gridImage = inputImage.copy()
+        gridImage.colorData = np.float32(grid.reshape(size*size, size, 3))
+        gridImage.shape = gridImage.colorData.shape
+        gridImage.linear, gridImage.colorSpace = True, image.ColorSpace.build('sRGB')
+        try:
+            for node in nodes: gridImage = node.process.compute(gridImage,**node.params)
+        finally:
+            self.setColorEditorsMax(None, nodes)
+
+        # output as linear sRGB
+        if gridImage.colorSpace.name == 'Lch':  table = Lch_to_sRGB(gridImage.colorData, apply_cctf_encoding=False, clip=False)
+        elif not gridImage.linear:              table = colour.cctf_decoding(gridImage.colorData, function='sRGB')
+        else:                                   table = gridImage.colorData
+
+        self.lut, self.lutKey = lut.LUT3D(table.reshape(size, size, size, 3), shaper, domain), key
+
+        end = timer()
+        if pref.verbose: print(" [PROCESS-PROFILING] (",end-start,")>> ProcessPipe.bakeLUT(",size,"):", inputImage.name)
+
+        return self.lut
+
+    def setColorEditorsMax(self, img, nodes, proxySize=256):
+        """set (or reset if img is None) max lightness and chroma of color editor nodes.
+            color editors scale their selection by the max of their input image: when nodes are applied to a part of
+            the image (LUT grid, export tiles) the max is computed once on a sub-sampled version of the whole image.
+
+        Args:
+            img (hdrCore.image.Image, Required): whole input image (linear or not) or None to reset
+            nodes ([ProcessNode], Required): pointwise process nodes applied to img (in order)
+            proxySize (int, Optional): size of sub-sampled image
+        """
+        if img is None:
+            for node in nodes:
+                if isinstance(node.process, colorEditor): node.process.imageMax = None
+            return
+
+        step = max(1, max(img.shape[0], img.shape[1])//proxySize)
+        proxy = img.copy()
+        proxy.colorData = img.colorData[::step,::step,:]
+        if not proxy.linear:
+            proxy.colorData = np.float32(colour.cctf_decoding(proxy.colorData, function='sRGB'))
+            proxy.linear = True
+        proxy.shape = proxy.colorData.shape
+        for node in nodes:
+            node.process.executionMode, node.process.dtype = 'cow', self.dtype
+            if isinstance(node.process, colorEditor): node.process.imageMax = colorEditor.maxLightnessChroma(proxy)
+            proxy = node.process.compute(proxy,**node.params)
+
+    def isTileable(self):
+        """True if the process pipe can be computed by tiles (see computeTiled):
+            all nodes are pointwise except at most one geometry node, that must be the last one if it rotates the image.
+        """
+        others = [i for i, node in enumerate(self.processNodes) if not node.process.pointwise]
+        if not others: return True
+        if len(others) > 1 or not isinstance(self.processNodes[others[0]].process, geometry): return False
+        return (not self.processNodes[others[0]].params.get('rotation', 0)) or (others[0] == len(self.processNodes)-1)
+
+    def computeTiled(self, img, budget=None, progress=None):
+        """compute process pipe on a full size image by horizontal bands (memory-bounded export)
+            - the process pipe must be tileable (see isTileable), its state (input, output, nodes cache) is left unchanged
+            - bands are zero-copy views of img (see hdrCore.image.Image.view), decoded and processed one at a time,
+              each band result is written into a single float32 output
+            - the geometry node crop is mapped back to a source window, so only the cropped source pixels are
+              processed; rotation is computed on the output
+            - color editors selection scaling uses the max of the whole image (see setColorEditorsMax)
+
+        Args:
+            img (hdrCore.image.Image, Required): full size input image (linear or not)
+            budget (int, Optional): working memory budget in bytes, default ProcessPipe.exportBudget
+            progress (object with showMessage, Optional): progress display
+
+        Returns:
+            (hdrCore.image.Image): linear sRGB output image (not clipped)
+        """
+        start = timer()
+        if not budget: budget = ProcessPipe.exportBudget
+
+        nodes = [node for node in self.processNodes if node.process.pointwise]
+        geometryParams = [node.params for node in self.processNodes if not node.process.pointwise]
+        geometryParams = geometryParams[0] if geometryParams else None
+
+        # geometry: source crop window
+        h, w, _ = img.shape
+        top, bottom, left, right = 0, h, 0, w
+        if geometryParams is not None:
+            top, bottom, left, right = geometry.cropWindow(h, w, geometryParams.get('ratio', (16,9)), geometryParams.get('up', 0))
+        source = img.view(top, bottom, left, right)
+
+        # band height from memory budget
+        height, width, _ = source.shape
+        rows = max(1, min(height, int(budget//(width*ProcessPipe.exportBytesPerPixel))))
+
+        colorData = np.empty((height, width, 3), dtype=np.float32)
+        self.setColorEditorsMax(source, nodes)
+        try:
+            for y in range(0, height, rows):
+                if progress: progress.showMessage('export: band '+str(y//rows+1)+'/'+str(-(-height//rows)))
+                band = source.view(y, min(y+rows, height))
+                if not band.linear:
+                    band.colorData = np.float32(colour.cctf_decoding(band.colorData, function='sRGB'))
+                    band.linear = True
+                for node in nodes:
+                    node.process.executionMode, node.process.dtype = 'cow', self.dtype
+                    band = node.process.compute(band,**node.params)
+
+                # output as linear sRGB
+                if band.colorSpace.name == 'Lch':   bandData = Lch_to_sRGB(band.colorData, apply_cctf_encoding=False, clip=False)
+                elif not band.linear:               bandData = colour.cctf_decoding(band.colorData, function='sRGB')
+                else:                               bandData = band.colorData
+                colorData[y:y+bandData.shape[0]] = bandData
+        finally:
+            self.setColorEditorsMax(None, nodes)
+
+        if geometryParams is not None and geometryParams.get('rotation', 0):
+            colorData = np.float32(geometry.rotate(colorData, geometryParams['rotation']))
+
+        res = source.copy()
+        res.colorData = colorData
+        res.shape = colorData.shape
+        res.linear, res.colorSpace = True, image.ColorSpace.build('sRGB')
+
+        end = timer()
+        if pref.verbose: print(" [PROCESS-PROFILING] (",end-start,")>> ProcessPipe.computeTiled(",img.name,"): bands of", rows, "rows")
+
+        return res
+
+    def isBakeable(self):
+        """True if the preview can be computed with a baked 3D LUT (see computeLUT): all nodes are pointwise and the
+            process pipe is smooth enough for the LUT grid (33 nodes per axis):
+            - color editors and lightness masks are inactive: selection edges and mask bands are smoothed by the grid
+              (color editor error up to 0.3)
+            - active saturation is the last active node: following nodes process its Lch output, not smooth across hue 0/360
+            - active contrast is not followed by an active tone curve: dark saturated colors get negative luminance,
+              where the tone curve is not continuous
+            (see isActive)
+        """
+        active = ProcessPipe.isActive
+        for i, node in enumerate(self.processNodes):
+            following = [other for other in self.processNodes[i+1:] if active(other)]
+            if not node.process.pointwise: return False
+            if isinstance(node.process, (colorEditor, lightnessMask)) and active(node): return False
+            if isinstance(node.process, saturation) and active(node) and following: return False
+            if isinstance(node.process, contrast) and active(node) and any(isinstance(other.process, Ycurve) for other in following): return False
+        return True
+
+    def computeLUT(self):
+        """compute output image using baked 3D LUT (fast preview of the process pipe)
+            non pointwise nodes (geometry, resize) are computed before LUT lookup.
+        """
+        with self.lock:
+            if not self.__inputImage: return
+            lut3D = self.bakeLUT()
+
+            img = self.__inputImage
+            for node in self.processNodes:
+                if not node.process.pointwise: img = node.process.compute(img,**node.params)
+
+            # LUT maps linear input RGB
+            colorData = img.colorData if img.linear else colour.cctf_decoding(img.colorData, function='sRGB')
+
+            res = img.copy()
+            res.colorData = lut3D.apply(colorData, interpolation=ProcessPipe.lutInterpolation)
+            res.linear, res.colorSpace = True, image.ColorSpace.build('sRGB')
+            self.__outputImage = res
 
     def setParameters(self,id,paramDicts):
         """
@@ -1321,9 +1939,17 @@ class ProcessPipe(object):
             paramDicts: TODO
                 TODO
         """
-        self.processNodes[id].setParameters(paramDicts)
-        for processNode in self.processNodes[id:]: processNode.requireUpdate = True
-        self.updateProcessPipeMetadata()
+        with self.lock:
+            self.processNodes[id].setParameters(paramDicts)
+            for processNode in self.processNodes[id:]: processNode.requireUpdate = True
+            for level in (self.pyramid or []):
+                if len(level.processNodes) == len(self.processNodes):
+                    with level.lock:
+                        level.processNodes[id].params = paramDicts
+                        for processNode in level.processNodes[id:]: processNode.requireUpdate = True
+            self.updateProcessPipeMetadata()
+            # last: a render started with this generation uses these parameters
+            self.generation += 1
 
     def getParameters(self,id):
         """
@@ -1398,15 +2024,36 @@ class ProcessPipe(object):
         for p in self.processNodes: res.append(p.toDict())
         return res
 
+    @staticmethod
+    def fromDict(processpipeMetadata):
+        """build a process pipe from its dict representation (see toDict, 'processpipe' metadata)
+            process nodes are created according to their names: ProcessPipe.processNames keys, 
+            trailing digits are ignored (e.g. 'colorEditor0').
+
+        Args:
+            processpipeMetadata (list[dict], Required): [{name: params}, ...]
+
+        Returns:
+            (ProcessPipe)
+        """
+        res = ProcessPipe()
+        for pMeta in processpipeMetadata:
+            name = list(pMeta.keys())[0]
+            processName = name.rstrip('0123456789')
+            if processName not in ProcessPipe.processNames:
+                raise ValueError('ProcessPipe.fromDict: unknown process "'+name+'"')
+            res.append(ProcessPipe.processNames[processName](), paramDict=copy.deepcopy(pMeta[name]), name=name)
+        return res
+
     def updateProcessPipeMetadata(self):
         """
         TODO - Documentation de la méthode updateProcessPipeMetadata
         """
         ppMeta = self.toDict()
         if pref.verbose: print(" [PROCESS] >> ProcessPipe.updateMetadata(","):",ppMeta)
-        if isinstance(self.originalImage,image.Image):  self.originalImage.metadata.metadata['processpipe'] =   copy.deepcopy(ppMeta)
-        if isinstance(self.__inputImage,image.Image):   self.__inputImage.metadata.metadata['processpipe'] =    copy.deepcopy(ppMeta)
-        if isinstance(self.__outputImage,image.Image):  self.__outputImage.metadata.metadata['processpipe'] =   copy.deepcopy(ppMeta)
+        if isinstance(self.originalImage,image.Image) and self.originalImage.metadata: self.originalImage.metadata.metadata['processpipe'] =   copy.deepcopy(ppMeta)
+        if isinstance(self.__inputImage,image.Image) and self.__inputImage.metadata: self.__inputImage.metadata.metadata['processpipe'] =    copy.deepcopy(ppMeta)
+        if isinstance(self.__outputImage,image.Image) and self.__outputImage.metadata: self.__outputImage.metadata.metadata['processpipe'] =   copy.deepcopy(ppMeta)
 
     def updateUserMeta(self,tagRootName,meta):
         """
@@ -1417,9 +2064,9 @@ class ProcessPipe(object):
                 TODO
         """
         if pref.verbose: print(" [PROCESS] >> ProcessPipe.updateUserMeta(",")")
-        if isinstance(self.originalImage,image.Image):  self.originalImage.metadata.metadata[tagRootName] =   copy.deepcopy(meta)
-        if isinstance(self.__inputImage,image.Image):   self.__inputImage.metadata.metadata[tagRootName] =    copy.deepcopy(meta)
-        if isinstance(self.__outputImage,image.Image):  self.__outputImage.metadata.metadata[tagRootName] =   copy.deepcopy(meta)
+        if isinstance(self.originalImage,image.Image) and self.originalImage.metadata: self.originalImage.metadata.metadata[tagRootName] =   copy.deepcopy(meta)
+        if isinstance(self.__inputImage,image.Image) and self.__inputImage.metadata: self.__inputImage.metadata.metadata[tagRootName] =    copy.deepcopy(meta)
+        if isinstance(self.__outputImage,image.Image) and self.__outputImage.metadata: self.__outputImage.metadata.metadata[tagRootName] =   copy.deepcopy(meta)
 
     def export(self,dirName,size=None,to=None,progress=None):
         """
@@ -1443,22 +2090,32 @@ class ProcessPipe(object):
         img = image.Image.read(self.originalImage.path+'/'+self.originalImage.name)
         if size: img = img.process(resize(),size=(None, size[1]))
 
-        ProcessPipe.autoResize = False # set off autoresize
+        fused = (pref.computation != 'python') and self.isFusable()
+        tiled = (not fused) and bool(ProcessPipe.exportBudget) and self.isTileable()
+        if fused:
+            # single pass on full size image: process pipe state is not modified
+            res = hdrCore.coreC.coreCcompute(img.copy(), self)
+            np.clip(res.colorData, 0.0, 1.0, out=res.colorData)
+        elif tiled:
+            # memory-bounded: process pipe state is not modified
+            res = self.computeTiled(img, progress=progress)
+            np.clip(res.colorData, 0.0, 1.0, out=res.colorData)
+        else:
+            ProcessPipe.autoResize = False # set off autoresize
 
-        self.setImage(img)
+            self.setImage(img)
 
-        self.compute(progress=progress)
-        ###### res = hdrCore.coreC.coreCcompute(img, self)
+            self.compute(progress=progress)
 
-        res = self.getImage(toneMap=False)
-        res = res.process(clip())
+            res = self.getImage(toneMap=False)
+            res = res.process(clip())
 
         res.metadata = copy.deepcopy(img.metadata)                  # exif, hdr use case, ...
         res.metadata.metadata['processpipe'] = None                  # reset process pipe  
         
         ProcessPipe.autoResize = True# restore autoresize
         if to:
-            res.colorData = res.colorData*to['scaling']
+            np.multiply(res.colorData, to['scaling'], out=res.colorData)
             res.metadata.metadata['display'] = to['tag']     # set display
 
         if dirName:
@@ -1466,7 +2123,8 @@ class ProcessPipe(object):
             res.write(pathExport)
 
         #restore input
-        self.setImage(input)
-        self.compute()
+        if not (fused or tiled):
+            self.setImage(input)
+            self.compute()
 
         return res
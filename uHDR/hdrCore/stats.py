@@ -0,0 +1,147 @@
+# uHDR: HDR image editing software
+#   Copyright (C) 2021  remi cozot
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+# hdrCore project 2020
+# author: remi.cozot@univ-littoral.fr
+
+# -----------------------------------------------------------------------------
+# --- Package hdrCore ---------------------------------------------------------
+# -----------------------------------------------------------------------------
+"""
+package hdrCore consists of the core classes for HDR imaging.
+"""
+
+# -----------------------------------------------------------------------------
+# --- Import ------------------------------------------------------------------
+# -----------------------------------------------------------------------------
+import numpy as np
+from . import numbafun
+
+# -----------------------------------------------------------------------------
+# --- Class LuminanceStats ----------------------------------------------------
+# -----------------------------------------------------------------------------
+class LuminanceStats(object):
+    """
+    class LuminanceStats: luminance statistics from a fine log2 histogram
+        the histogram is built in one pass (see numbafun.numba_log2_histogram), then min, max, percentile and
+        dynamic range queries are answered in O(bins). Min and max are exact, percentiles are accurate to one bin
+        (1/binsPerStop stop). In exact mode the luminance is kept and percentiles are computed with numpy (validation).
+
+    Attributes:
+        counts (numpy.ndarray): histogram of positive values, bin i: [2^(lo+i/binsPerStop), 2^(lo+(i+1)/binsPerStop)[
+        nbNonPositive (int): number of values <= 0
+        nbPixels (int): number of values
+        minPositive (float): min of positive values (None if no positive value)
+        maxValue (float): max value
+        Y (numpy.ndarray): luminance, exact mode only (None otherwise)
+
+    Class Attributes:
+        lo (float): log2 of histogram lower bound
+        stops (int): histogram range in stops
+        binsPerStop (int): number of bins per stop
+
+    Methods:
+        min                 (float) min of positive values
+        max                 (float) max value
+        percentile          (float) percentile of values
+        dynamicRange        (float) dynamic range in stops
+        toDict              (dict) summary for metadata
+    """
+    lo =            -32.0
+    stops =         64
+    binsPerStop =   32
+
+    def __init__(self, Y, exact=False):
+        """
+        Args:
+            Y (numpy.ndarray, Required): luminance (2D)
+            exact (bool, Optional): exact mode, keep Y and compute percentiles with numpy
+        """
+        Y = np.asarray(Y)
+        if Y.ndim != 2: Y = Y.reshape(1, -1)
+        counts, nbNonPositive, minPositive, maxValue = numbafun.numba_log2_histogram(Y, LuminanceStats.lo, LuminanceStats.binsPerStop, LuminanceStats.stops*LuminanceStats.binsPerStop)
+
+        self.counts =           counts
+        self.nbNonPositive =    int(nbNonPositive)
+        self.nbPixels =         Y.size
+        self.minPositive =      float(minPositive) if np.isfinite(minPositive) else None
+        self.maxValue =         float(maxValue) if Y.size > 0 else None
+        self.Y =                Y if exact else None
+
+    def min(self):
+        """min of positive values (None if no positive value)"""
+        return self.minPositive
+
+    def max(self):
+        """max value"""
+        return self.maxValue
+
+    def percentile(self, q, positive=True):
+        """percentile of values (linear interpolation between ranks as numpy.percentile)
+
+        Args:
+            q (float, Required): percentile in [0,100]
+            positive (bool, Optional): of positive values only, else of all values (non positive values count as 0)
+
+        Returns:
+            (float)
+        """
+        if self.Y is not None:
+            Y = self.Y[self.Y>0] if positive else np.maximum(self.Y, 0.0)
+            return float(np.percentile(Y, q)) if Y.size > 0 else None
+
+        nbPositive = self.nbPixels - self.nbNonPositive
+        if nbPositive == 0: return None if positive else 0.0
+
+        n = nbPositive if positive else self.nbPixels
+        rank = q/100*(n - 1)
+        if not positive:
+            if rank < self.nbNonPositive: return 0.0
+            rank -= self.nbNonPositive
+        if rank <= 0: return self.minPositive
+        if rank >= nbPositive - 1: return self.maxValue
+
+        # bin of rank, position of rank in bin (values uniformly distributed in log2 in bin)
+        cumulative = np.cumsum(self.counts)
+        i = int(np.searchsorted(cumulative, rank, side='right'))
+        before = cumulative[i-1] if i > 0 else 0
+        f = (rank - before + 0.5)/self.counts[i]
+        value = 2.0**(LuminanceStats.lo + (i + f)/LuminanceStats.binsPerStop)
+        return float(min(max(value, self.minPositive), self.maxValue))
+
+    def dynamicRange(self, percentile=None):
+        """dynamic range in stops (see image.Image.getDynamicRange)
+
+        Args:
+            percentile (float, Optional): if None: between min of positive values and max,
+                else between percentile of positive values and 100-percentile of all values
+
+        Returns:
+            (float)
+        """
+        if percentile is None:  Ymin, Ymax = self.min(), self.max()
+        else:                   Ymin, Ymax = self.percentile(percentile), self.percentile(100-percentile, positive=False)
+        if (not Ymin) or (not Ymax) or (Ymax <= 0): return 0.0
+        return float(np.log2(Ymax) - np.log2(Ymin))
+
+    def toDict(self):
+        """summary for metadata (json): min, max, 0.5/50/99.5 percentiles and dynamic range"""
+        return {
+            'min':                      self.min(),
+            'max':                      self.max(),
+            'p0.5':                     self.percentile(0.5),
+            'median':                   self.percentile(50),
+            'p99.5':                    self.percentile(99.5, positive=False),
+            'Dynamic Range (stops)':    self.dynamicRange(0.5)
+            }
+# -----------------------------------------------------------------------------
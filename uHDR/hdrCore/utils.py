@@ -125,7 +125,7 @@ def NPlinearWeightMask(x,xMin,xMax,xTolerance):
     # reshape x
     h,w  = x.shape  # 2D array
     xv = np.reshape(x,(h*w,1))
-    y = np.ones((h*w,1))
+    y = np.ones((h*w,1), dtype=x.dtype if np.issubdtype(x.dtype, np.floating) else np.float64)
     y = np.where((xv <= (xMin - xTolerance)),               0,y)                                        # (0)                +-----------+
     y = np.where((xv > (xMin - xTolerance))&(xv <= xMin),   (xv -(xMin - xTolerance))/xTolerance,y)     # (1)               /             \
     y = np.where((xv > (xMin))&(xv <= xMax),                1,y)                                        # (2)              /               \
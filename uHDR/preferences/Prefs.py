@@ -37,6 +37,10 @@ class Prefs:
     extraPath : str = '.uHDR'
     thumbnailPrefix : str = "_"
     thumbnailMaxSize : int = 800
+    keepAllMeta : bool = False
+    previewCacheBytes : int = 256*1024*1024         # size cap of rendered previews cache (extraPath/previews)
+    previewCacheFormat : str = 'uint8'              # 'uint8' | 'float16'
+    imageCacheBytes : int = 512*1024*1024           # memory budget of decoded images and previews (see app.ImageCache)
 
     tags : dict[str, dict[str,bool]] = {}
 
@@ -58,7 +62,7 @@ class Prefs:
     # static methods
     @staticmethod
     def load() -> None:
-        with open('./preferences/prefs.json') as f: 
+        with open(Prefs.prefsFile) as f: 
             allPrefs : dict =  json.load(f)
             if "imagePath" in allPrefs.keys(): Prefs.currentDir = allPrefs["imagePath"]
             if "extraPath" in allPrefs.keys(): Prefs.extraPath = allPrefs["extraPath"]
@@ -67,6 +71,17 @@ class Prefs:
             if "imgExt" in allPrefs.keys(): Prefs.imgExt = allPrefs["imgExt"]
             if "thumbnailPrefix" in allPrefs.keys(): Prefs.thumbnailPrefix = allPrefs["thumbnailPrefix"]
             if "thumbnailMaxSize" in allPrefs.keys(): Prefs.thumbnailMaxSize = allPrefs["thumbnailMaxSize"]
+            if "keepAllMeta" in allPrefs.keys(): Prefs.keepAllMeta = allPrefs["keepAllMeta"]
+            if "previewCacheBytes" in allPrefs.keys(): Prefs.previewCacheBytes = allPrefs["previewCacheBytes"]
+            if "imageCacheBytes" in allPrefs.keys(): Prefs.imageCacheBytes = allPrefs["imageCacheBytes"]
+            if "previewCacheFormat" in allPrefs.keys() and allPrefs["previewCacheFormat"] in ['uint8', 'float16']: Prefs.previewCacheFormat = allPrefs["previewCacheFormat"]
+            if "computation" in allPrefs.keys() and allPrefs["computation"] in Prefs.target: Prefs.computation = allPrefs["computation"]
+            if Prefs.computation == 'cuda':
+                # cuda kernels (hdrCore.numbafun.cuda_*) are only defined when a cuda device is available
+                import hdrCore.numbafun
+                if not hdrCore.numbafun.cudaAvailable:
+                    print(" [PREFS] >> Prefs.load(): cuda is not available, 'numba' computation is used")
+                    Prefs.computation = 'numba'
 
             # tags
             if "tags" in allPrefs.keys():
@@ -76,7 +91,7 @@ class Prefs:
 
                 for tagFile in listFileTags:
 
-                    with open(os.path.join('./preferences/',tagFile)) as f: 
+                    with open(os.path.join(os.path.dirname(Prefs.prefsFile),tagFile)) as f: 
                             tags : dict =  json.load(f)    
                             allTags.append(tags)
                     
@@ -0,0 +1,27 @@
+import os, json, tempfile
+from app.Catalog import Catalog
+
+def test() -> dict[str, int]:
+    """check catalog sidecar import: sidecars are resolved with image files, not with '.json' metadata files."""
+
+    with tempfile.TemporaryDirectory() as imageDir:
+        extraDir : str = '.uHDR'
+        os.makedirs(os.path.join(imageDir, extraDir))
+        names : list[str] = [f'{c}.jpg' for c in 'abcdefgh']
+        for i, name in enumerate(names):
+            open(os.path.join(imageDir, name), 'wb').close()
+            with open(os.path.join(imageDir, name[:-3]+'json'), 'w') as f: json.dump({}, f)                       # metadata file
+            with open(os.path.join(imageDir, extraDir, name[:-3]+'score'), 'w') as f: json.dump({'score': i%6}, f)
+        with open(os.path.join(imageDir, extraDir, 'b.tags'), 'w') as f: json.dump({'Sky': {'blue': True}}, f)
+        with open(os.path.join(imageDir, extraDir, 'orphan.score'), 'w') as f: json.dump({'score': 5}, f)     # no image file
+
+        catalog : Catalog = Catalog(imageDir, extraDir)
+        scores : dict[str, int] = catalog.scores()
+        records : dict[str, dict] = catalog.records()
+        catalog.close()
+
+    assert sorted(records.keys()) == names, sorted(records.keys())
+    assert scores == {name: i%6 for i, name in enumerate(names)}, scores
+    assert records['b.jpg']['tags'] == {'Sky': {'blue': True}}
+
+    return scores
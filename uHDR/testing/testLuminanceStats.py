@@ -0,0 +1,22 @@
+import numpy as np
+from hdrCore import image
+
+def test() -> dict[str, tuple[float, float]]:
+    """check luminance statistics: histogram queries against exact mode (percentiles within one bin)."""
+
+    rng : np.random.Generator = np.random.default_rng(0)
+    colorData : np.ndarray = (2.0**rng.uniform(-12, 2, size=(64, 64, 3))).astype(np.float32)     # HDR, 14 stops
+    colorData[:4] = 0.0                                                                             # black rows
+    img : image.Image = image.Image('.', 'stats.hdr', colorData, image.imageType.HDR, True, image.ColorSpace.sRGB())
+
+    fast, exact = img.getLuminanceStats(), img.getLuminanceStats(exact=True)
+    res : dict[str, tuple[float, float]] = {}
+    for q in [0.5, 10, 50, 90, 99.5]:
+        res[f'p{q}'] = (fast.percentile(q), exact.percentile(q))
+        assert abs(np.log2(res[f'p{q}'][0]) - np.log2(res[f'p{q}'][1])) <= 1/fast.binsPerStop, q
+    res['min'], res['max'] = (fast.min(), float(exact.Y[exact.Y>0].min())), (fast.max(), float(exact.Y.max()))
+    assert res['min'][0] == res['min'][1] and res['max'][0] == res['max'][1]
+    res['dynamicRange'] = (img.getDynamicRange(0.5), exact.dynamicRange(0.5))
+    assert abs(res['dynamicRange'][0] - res['dynamicRange'][1]) <= 2/fast.binsPerStop
+
+    return res
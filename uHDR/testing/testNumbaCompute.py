@@ -0,0 +1,80 @@
+import numpy as np
+from hdrCore import image, processing, coreC
+from preferences.Prefs import Prefs
+
+def test() -> dict[str, float]:
+    """check numba fused kernel (coreC.numbaCompute) against python operators (ProcessPipe.compute): max abs difference per parameter set."""
+
+    tolerance : float = 1e-3
+
+    rng : np.random.Generator = np.random.default_rng(0)
+    colorData : np.ndarray = rng.random((64, 64, 3)).astype(np.float32)
+
+    noEditor : dict = {'selection': {'lightness': (0,100), 'chroma': (0,100), 'hue': (0,360)}, 'tolerance': 0.1, 'edit': {'hue': 0.0, 'exposure': 0.0, 'contrast': 0.0, 'saturation': 0.0}, 'mask': False}
+    toneCurve : dict = {'start':[0,0], 'shadows':[10,15], 'blacks':[30,35], 'mediums':[50,55], 'whites':[70,75], 'highlights':[90,92], 'end':[100,100]}
+    noMask : dict = {'shadows': False, 'blacks': False, 'mediums': False, 'whites': False, 'highlights': False}
+
+    # parameter sets: fixed pipe (exposure, contrast, tonecurve, lightnessmask, saturation, 5 color editors)
+    parameterSets : dict[str, dict] = {
+        'identity':         {},
+        'light':            {'exposure': {'EV': 0.5}, 'contrast': {'contrast': 20.0}, 'tonecurve': toneCurve, 'saturation': {'saturation': 20.0, 'method': 'gamma'}},
+        'colorEditor':      {'colorEditor0': {'selection': {'lightness': (20,80), 'chroma': (10,60), 'hue': (30,200)}, 'tolerance': 0.1, 'edit': {'hue': 10.0, 'exposure': 0.5, 'contrast': 10.0, 'saturation': 10.0}, 'mask': False}},
+        'colorEditor.wrap': {'colorEditor0': {'selection': {'lightness': (0,100), 'chroma': (5,100), 'hue': (330,30)}, 'tolerance': 0.1, 'edit': {'hue': -15.0, 'exposure': 0.3, 'contrast': 0.0, 'saturation': 20.0}, 'mask': False},
+                             'colorEditor1': {'selection': {'lightness': (10,90), 'chroma': (0,80), 'hue': (300,60)}, 'tolerance': 0.1, 'edit': {'hue': 0.0, 'exposure': -0.5, 'contrast': 15.0, 'saturation': 0.0}, 'mask': False}},
+        'colorEditor.mask': {'exposure': {'EV': 0.3}, 'colorEditor0': {'selection': {'lightness': (0,100), 'chroma': (0,100), 'hue': (350,10)}, 'tolerance': 0.1, 'edit': {'hue': 0.0, 'exposure': 0.0, 'contrast': 0.0, 'saturation': 0.0}, 'mask': True}},
+    }
+
+    differences : dict[str, float] = {}
+    for name, parameters in parameterSets.items():
+        pipe : processing.ProcessPipe = processing.ProcessPipe()
+        pipe.append(processing.exposure(),      parameters.get('exposure', {'EV': 0.0}),               'exposure')
+        pipe.append(processing.contrast(),      parameters.get('contrast', {'contrast': 0.0}),         'contrast')
+        pipe.append(processing.Ycurve(),        parameters.get('tonecurve', {}),                       'tonecurve')
+        pipe.append(processing.lightnessMask(), parameters.get('lightnessmask', noMask),               'lightnessmask')
+        pipe.append(processing.saturation(),    parameters.get('saturation', {'saturation': 0.0, 'method': 'gamma'}), 'saturation')
+        for i in range(5): pipe.append(processing.colorEditor(), parameters.get('colorEditor'+str(i), noEditor), 'colorEditor'+str(i))
+
+        img : image.Image = image.Image('.', 'numba.jpg', colorData.copy(), image.imageType.SDR, True, image.ColorSpace.sRGB())
+        pipe.setImage(img)
+        pipe.compute()
+        reference : np.ndarray = pipe.getImage(toneMap=False).colorData
+
+        numba : np.ndarray = coreC.numbaCompute(colorData.copy(), True, coreC.coreCparameters(pipe))
+        differences[name] = float(np.abs(numba - reference).max())
+        assert differences[name] < tolerance, f'{name}: max difference {differences[name]}'
+
+    # app process pipe order (exposure, contrast, saturation, lightnessmask, tonecurve, colorEditor): ProcessPipe.compute
+    # uses the fused kernel when saturation is inactive, process nodes otherwise
+    def appPipe(saturation : float) -> processing.ProcessPipe:
+        pipe : processing.ProcessPipe = processing.ProcessPipe()
+        pipe.append(processing.exposure(),      {'EV': 0.5},                        'exposure')
+        pipe.append(processing.contrast(),      {'contrast': 20.0},                 'contrast')
+        pipe.append(processing.saturation(),    {'saturation': saturation},         'saturation')
+        pipe.append(processing.lightnessMask(), noMask,                             'lightnessmask')
+        pipe.append(processing.Ycurve(),        toneCurve,                          'tonecurve')
+        pipe.append(processing.colorEditor(),   parameterSets['colorEditor']['colorEditor0'], 'colorEditor')
+        pipe.setImage(image.Image('.', 'numba.jpg', colorData.copy(), image.imageType.SDR, True, image.ColorSpace.sRGB()))
+        return pipe
+
+    computation : str = Prefs.computation
+    try:
+        Prefs.computation = 'python'
+        reference = appPipe(0.0); reference.compute()
+        Prefs.computation = 'numba'
+        fused = appPipe(0.0); fused.compute()
+        assert fused.isFusable() and (fused.processNodes[0].outputImage is None)
+        differences['app'] = float(np.abs(fused.getImage(toneMap=False).colorData - reference.getImage(toneMap=False).colorData).max())
+        assert differences['app'] < tolerance, f'app: max difference {differences["app"]}'
+
+        unfusable = appPipe(20.0)
+        assert not unfusable.isFusable()
+        try:
+            coreC.coreCparameters(unfusable)
+            raise AssertionError('app.saturation: coreCparameters accepts an unfusable process pipe')
+        except ValueError: pass
+        unfusable.compute()
+        assert unfusable.processNodes[0].outputImage is not None
+    finally:
+        Prefs.computation = computation
+
+    return differences
@@ -0,0 +1,40 @@
+import numpy as np
+from hdrCore import image, processing
+
+def test() -> dict[str, np.dtype]:
+    """check precision policy: output dtype of each operator and of the process pipe (float32, float16 cache)."""
+
+    colorData : np.ndarray = np.linspace(0.0, 1.0, 8*8*3).reshape(8, 8, 3)      # float64 input
+    img : image.Image = image.Image('.', 'dtype.jpg', colorData, image.imageType.SDR, False, image.ColorSpace.sRGB())
+
+    operators : dict[str, tuple[processing.Processing, dict]] = {
+        'exposure':         (processing.exposure(),        {'EV': 0.5}),
+        'contrast':         (processing.contrast(),        {'contrast': 20.0}),
+        'clip':             (processing.clip(),            {}),
+        'tonecurve':        (processing.Ycurve(),          {'start':[0,0], 'shadows':[10,15], 'blacks':[30,35], 'mediums':[50,55], 'whites':[70,75], 'highlights':[90,92], 'end':[100,100]}),
+        'saturation':       (processing.saturation(),      {'saturation': 20.0, 'method': 'gamma'}),
+        'lightnessmask':    (processing.lightnessMask(),   {'shadows': True, 'blacks': False, 'mediums': False, 'whites': False, 'highlights': False}),
+        'colorEditor':      (processing.colorEditor(),     {'selection': {'lightness': (20,80), 'chroma': (10,60), 'hue': (30,200)}, 'tolerance': 0.1, 'edit': {'hue': 10.0, 'exposure': 0.5, 'contrast': 10.0, 'saturation': 10.0}, 'mask': False}),
+        'geometry':         (processing.geometry(),        {'ratio': (16,9), 'up': 0, 'rotation': 0.0}),
+        'resize':           (processing.resize(),          {'size': (4, None)}),
+    }
+
+    dtypes : dict[str, np.dtype] = {}
+    for name, (operator, params) in operators.items():
+        dtypes[name] = operator.compute(img, **params).colorData.dtype
+        assert dtypes[name] == np.float32, name
+
+    # process pipe: float32 output, float16 intermediates
+    pipe : processing.ProcessPipe = processing.ProcessPipe()
+    for name in ['exposure', 'contrast', 'saturation', 'colorEditor']: pipe.append(operators[name][0], operators[name][1], name)
+    pipe.cacheDtype = np.float16
+    pipe.setImage(img)
+    pipe.compute()
+    dtypes['processpipe.input'] =   pipe.getInputImage().colorData.dtype
+    dtypes['processpipe.cache'] =   pipe.processNodes[0].outputImage.colorData.dtype
+    dtypes['processpipe.output'] =  pipe.getImage(toneMap=False).colorData.dtype
+    assert dtypes['processpipe.input'] == np.float32
+    assert dtypes['processpipe.cache'] == np.float16
+    assert dtypes['processpipe.output'] == np.float32
+
+    return dtypes
@@ -0,0 +1,149 @@
+# uHDR: HDR image editing software
+#   Copyright (C) 2022  remi cozot
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+# hdrCore project 2020-2022
+# author: remi.cozot@univ-littoral.fr
+
+# import
+# ------------------------------------------------------------------------------------------
+
+"""Headless batch rendering: renders images edited with uHDR (process pipe stored in json metadata).
+
+usage: python uHDRbatch.py images/ "other/*.hdr" -o export -j 4 --display vesaDisplayHDR1000
+"""
+
+import argparse, copy, glob, os, sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import freeze_support
+from timeit import default_timer as timer
+
+import numpy as np
+
+from preferences.Prefs import Prefs
+from hdrCore import image, processing
+
+# preferences of uHDR installation: batch can be run from any directory
+Prefs.prefsFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preferences', 'prefs.json')
+
+# ------------------------------------------------------------------------------------------
+def listImages(inputs: list[str]) -> list[str]:
+    """list image files from directories (files with Prefs.imgExt extension) or glob patterns."""
+    res : list[str] = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            res += sorted(os.path.join(entry, f) for f in os.listdir(entry) if os.path.splitext(f)[1] in Prefs.imgExt)
+        else:
+            res += sorted(glob.glob(entry))
+    return list(dict.fromkeys(res)) # remove duplicates, keep order
+
+# ------------------------------------------------------------------------------------------
+def initWorker(budget: int|None, verbose: bool) -> None:
+    """process pool initializer: preferences and export settings of worker process."""
+    if os.path.exists(Prefs.prefsFile): Prefs.load()
+    Prefs.verbose = verbose
+    processing.ProcessPipe.exportBudget = budget
+
+# ------------------------------------------------------------------------------------------
+def renderImage(filename: str, outputDir: str, display: str, width: int|None) -> tuple[str, str|None, float, str|None]:
+    """render an image with the process pipe of its metadata.
+
+    Returns:
+        (filename, output filename or None, megapixels, error message or None)
+    """
+    try:
+        img : image.Image = image.Image.read(filename)
+        ppMeta = img.metadata.metadata.get('processpipe', None)
+        if not ppMeta: return (filename, None, 0.0, 'no processpipe metadata')
+
+        pipe : processing.ProcessPipe = processing.ProcessPipe.fromDict(ppMeta)
+        if width: img = img.process(processing.resize(), size=(None, width))
+        megapixels : float = img.shape[0]*img.shape[1]/1e6
+
+        if processing.ProcessPipe.exportBudget and pipe.isTileable():
+            res : image.Image = pipe.computeTiled(img)
+        else:
+            processing.ProcessPipe.autoResize = False
+            pipe.setImage(img)
+            pipe.compute()
+            res = pipe.getImage(toneMap=False)
+        np.clip(res.colorData, 0.0, 1.0, out=res.colorData)
+
+        # display scaling, output is a display referred HDR image (see ProcessPipe.export)
+        to : dict = Prefs.HDRdisplays[display]
+        np.multiply(res.colorData, to['scaling'], out=res.colorData)
+        res.type = image.imageType.HDR
+        res.metadata = copy.deepcopy(img.metadata)
+        res.metadata.metadata['processpipe'] = None
+        res.metadata.metadata['display'] = to['tag']
+
+        name : str = os.path.splitext(os.path.basename(filename))[0]
+        outputFilename : str = os.path.join(outputDir, name+to['post']+'.hdr')
+        res.write(outputFilename)
+
+        return (filename, outputFilename, megapixels, None)
+    except Exception as e:
+        return (filename, None, 0.0, repr(e))
+
+# ------------------------------------------------------------------------------------------
+def main(argv: list[str]|None = None) -> int:
+    if os.path.exists(Prefs.prefsFile): Prefs.load()
+    else: print(f'WARNING[uHDRbatch: preferences file not found: {Prefs.prefsFile}, default preferences]')
+
+    parser = argparse.ArgumentParser(description='uHDR headless batch rendering of edited images (processpipe metadata).')
+    parser.add_argument('inputs', nargs='+', help='image directories or glob patterns')
+    parser.add_argument('-o', '--output', default='export', help='output directory (default: export)')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(), help='number of worker processes (default: number of cpus)')
+    parser.add_argument('--display', default=Prefs.HDRdisplay, help=f'target HDR display, one of {list(Prefs.HDRdisplays.keys())} (default: {Prefs.HDRdisplay})')
+    parser.add_argument('--width', type=int, default=None, help='output width (default: full size)')
+    parser.add_argument('--budget', type=int, default=(processing.ProcessPipe.exportBudget or 0)//(1024*1024), help='working memory budget per worker in MB, 0: no tiling')
+    parser.add_argument('-v', '--verbose', action='store_true', help='processing traces')
+    args = parser.parse_args(argv)
+
+    if args.display not in Prefs.HDRdisplays:
+        print(f'ERROR[uHDRbatch: unknown display "{args.display}", check preferences file: {Prefs.prefsFile}]')
+        return 2
+
+    filenames : list[str] = listImages(args.inputs)
+    if not filenames:
+        print('uHDRbatch: no image found')
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+
+    budget : int|None = args.budget*1024*1024 if args.budget > 0 else None
+    nbRendered, megapixels, nbErrors = 0, 0.0, 0
+
+    start = timer()
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=initWorker, initargs=(budget, args.verbose)) as pool:
+        futures = [pool.submit(renderImage, filename, args.output, args.display, args.width) for filename in filenames]
+        for future in as_completed(futures):
+            filename, outputFilename, mp, error = future.result()
+            if error:
+                nbErrors += 1
+                print(f'[skip] {filename}: {error}')
+            else:
+                nbRendered += 1
+                megapixels += mp
+                print(f'[done] {filename} -> {outputFilename} ({mp:.1f} MP)')
+    duration : float = timer() - start
+
+    print('---------------------------------------------------------------------------------------')
+    print(f'uHDRbatch: {nbRendered} image(s) rendered, {nbErrors} skipped, {args.workers} worker(s), {duration:.2f} s')
+    print(f'throughput: {nbRendered/duration:.2f} images/s, {megapixels/duration:.2f} MP/s')
+
+    return 0 if nbErrors == 0 else 1
+# ------------------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    freeze_support()
+    sys.exit(main())
+# ------------------------------------------------------------------------------------------